@@ -0,0 +1,96 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+"""
+Compare the JSON codecs available for the "json_codec" config setting, on a
+zone retrieve response and a batch of record updates.
+
+    python benchmarks/json_codec.py --records 100000
+
+Requires ns1 to be importable, e.g. after `pip install -e .`.
+"""
+
+import argparse
+import timeit
+
+from ns1.rest.json_codec import CODECS, STDLIB
+
+
+def make_zone(records):
+    return {
+        "zone": "example.com",
+        "ttl": 3600,
+        "records": [
+            {
+                "id": "%024x" % i,
+                "domain": "host%d.example.com" % i,
+                "type": "A",
+                "ttl": 300,
+                "tier": 1,
+                "short_answers": [
+                    "10.%d.%d.%d" % (i >> 16, i >> 8 & 255, i & 255)
+                ],
+                "meta": {"up": True, "weight": 1.5},
+            }
+            for i in range(records)
+        ],
+    }
+
+
+def make_updates(records):
+    return [
+        {
+            "zone": "example.com",
+            "domain": "host%d.example.com" % i,
+            "type": "A",
+            "answers": [{"answer": ["10.0.0.%d" % (i & 255)]}],
+        }
+        for i in range(records)
+    ]
+
+
+def best(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    zone = make_zone(args.records)
+    body = STDLIB.dumps(zone).encode("utf-8")
+    updates = make_updates(args.records)
+    print(
+        "zone of %d records, %.1f MB"
+        % (args.records, len(body) / 1024.0 / 1024.0)
+    )
+
+    baseline = None
+    print("%-8s %12s %12s %12s" % ("codec", "decode", "encode", "speedup"))
+    for name, codec in reversed(list(CODECS.items())):
+        if codec is None:
+            print("%-8s not installed" % name)
+            continue
+        decode = best(lambda: codec.loads(body), args.repeat)
+        encode = best(
+            lambda: [codec.dumps(update) for update in updates], args.repeat
+        )
+        if baseline is None:
+            baseline = decode + encode
+        print(
+            "%-8s %10.1fms %10.1fms %11.1fx"
+            % (
+                name,
+                decode * 1000,
+                encode * 1000,
+                baseline / (decode + encode),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
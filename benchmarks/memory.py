@@ -0,0 +1,232 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+"""
+Measure the memory it takes to hold a large zone: peak RSS, and bytes per
+record at the peak and once done, of
+
+* zone_load: Zone.load of a zone answered in one response
+* zone_retrieve_pagination: Zone.load of a zone answered in pages, which
+  zone_retrieve_pagination merges
+* record_construction: a Record for every record of a loaded zone
+
+    python benchmarks/memory.py --records 300000
+    python benchmarks/memory.py --types A,AAAA,MX,TXT --answers 3 \\
+        --answer-size 200 --filters up,geotarget_country,select_first_n
+    python benchmarks/memory.py --save-baseline memory.json
+    python benchmarks/memory.py --baseline memory.json
+
+Zones are generated by ns1.testing.fixtures and answered from memory by the
+"loopback" transport. Each measure runs in a process of its own, and only
+counts what the measured step adds to the process once the fixture is set
+up. With --baseline, the exit status is 1 if bytes per record grew by more
+than --tolerance.
+
+Requires ns1 to be importable, e.g. after `pip install -e .`, and Linux,
+for /proc/self/status.
+"""
+
+import argparse
+import gc
+import json
+import subprocess
+import sys
+import time
+
+MEASURES = ("zone_load", "zone_retrieve_pagination", "record_construction")
+ZONE = "example.com"
+
+
+def rss():
+    """
+    Current and peak resident set size of this process, in bytes.
+    """
+    sizes = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                sizes[line[:5]] = int(line.split()[1]) * 1024
+    return sizes["VmRSS"], sizes["VmHWM"]
+
+
+def reset_peak():
+    # Linux 4.0+; otherwise the peak includes setting up the fixture
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def encode_pages(codec, records, page_size, **kwargs):
+    """
+    The JSON pages of a zone of `records` records, encoded a record at a
+    time so the decoded zone is never in memory.
+    """
+    from ns1.testing.fixtures import iter_records, make_zone
+
+    # "records" is the last key of the zone
+    head = codec.dumps(make_zone(ZONE))
+    assert head.endswith("[]}")
+    head = head[:-2]
+    pages = []
+    for start in range(0, max(records, 1), page_size):
+        chunk = iter_records(
+            ZONE, min(records, start + page_size), start=start, **kwargs
+        )
+        body = head + ",".join(codec.dumps(r) for r in chunk) + "]}"
+        pages.append(body.encode("utf-8"))
+    return pages
+
+
+def work(spec):
+    from ns1 import Config
+    from ns1.records import Record
+    from ns1.zones import Zone
+
+    measure = spec["measure"]
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "loopback"
+    config["json_codec"] = spec["codec"]
+    config["follow_pagination"] = measure == "zone_retrieve_pagination"
+    config["loopback_history"] = 0
+    zone = Zone(config, ZONE)
+    transport = zone._rest._transport
+    page_size = spec["records"]
+    if measure == "zone_retrieve_pagination":
+        page_size = spec["page_size"]
+    pages = encode_pages(
+        transport._codec,
+        spec["records"],
+        page_size,
+        types=spec["types"],
+        answers=spec["answers"],
+        answer_size=spec["answer_size"],
+        filters=spec["filters"],
+    )
+    transport.route("GET", "zones/" + ZONE, pages=pages)
+    del pages
+    if measure == "record_construction":
+        zone.load()
+
+    gc.collect()
+    reset_peak()
+    before, _ = rss()
+    start = time.perf_counter()
+    if measure == "record_construction":
+        held = []
+        for data in zone.data["records"]:
+            record = Record(zone, data["domain"], data["type"])
+            record._parseModel(data)
+            held.append(record)
+    else:
+        zone.load()
+    elapsed = time.perf_counter() - start
+    after, peak = rss()
+    assert len(zone.data["records"]) == spec["records"]
+    return {
+        "seconds": elapsed,
+        "peak": peak,
+        "peak_per_record": (peak - before) / float(spec["records"]),
+        "retained_per_record": (after - before) / float(spec["records"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--measure", action="append", choices=MEASURES)
+    parser.add_argument("--records", type=int, default=300000)
+    parser.add_argument("--types", default="A", help="e.g. A,AAAA,MX")
+    parser.add_argument("--answers", type=int, default=1)
+    parser.add_argument(
+        "--answer-size", type=int, help="pad TXT answers to this length"
+    )
+    parser.add_argument("--filters", default="", help="e.g. up,shuffle")
+    parser.add_argument("--page-size", type=int, default=2500)
+    parser.add_argument("--codec", default="json")
+    parser.add_argument("--baseline", help="JSON file to compare with")
+    parser.add_argument("--save-baseline", help="JSON file to save to")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(work(json.loads(args.worker))))
+        return
+
+    fixture = {
+        "records": args.records,
+        "types": args.types.split(","),
+        "answers": args.answers,
+        "answer_size": args.answer_size,
+        "filters": [f for f in args.filters.split(",") if f],
+        "page_size": args.page_size,
+        "codec": args.codec,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["fixture"] != fixture:
+            raise SystemExit("the baseline was run on a different fixture")
+
+    results = {}
+    regressed = []
+    print(
+        "%-25s %9s %9s %12s %16s %8s"
+        % (
+            "measure",
+            "records",
+            "peak MB",
+            "peak B/rec",
+            "retained B/rec",
+            "seconds",
+        )
+    )
+    for measure in args.measure or MEASURES:
+        spec = dict(fixture, measure=measure)
+        done = subprocess.run(
+            [sys.executable, __file__, "--worker", json.dumps(spec)],
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if done.returncode != 0:
+            print("%-25s failed" % measure)
+            continue
+        result = results[measure] = json.loads(done.stdout.splitlines()[-1])
+        worse = []
+        if baseline and measure in baseline["results"]:
+            base = baseline["results"][measure]
+            for metric in ("peak_per_record", "retained_per_record"):
+                if result[metric] > base[metric] * (1 + args.tolerance):
+                    worse.append(metric)
+        if worse:
+            regressed.append((measure, worse))
+        print(
+            "%-25s %9d %9.1f %12.0f %16.0f %8.2f %s"
+            % (
+                measure,
+                args.records,
+                result["peak"] / 2.0**20,
+                result["peak_per_record"],
+                result["retained_per_record"],
+                result["seconds"],
+                " ".join("!" + w for w in worse),
+            )
+        )
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"fixture": fixture, "results": results}, f, indent=2)
+    if regressed:
+        print("\nregressions beyond %d%%:" % (args.tolerance * 100))
+        for measure, worse in regressed:
+            print("  %s: %s" % (measure, ", ".join(worse)))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
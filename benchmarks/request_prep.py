@@ -0,0 +1,63 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+"""
+Measure the client's own per-request overhead: building the URL, headers and
+body of record updates, and dispatching them to the "loopback" transport,
+which answers from memory, so no time is spent on the network.
+
+    python benchmarks/request_prep.py --requests 100000
+
+"cold" clears the config's cache of endpoint and headers before every
+request, as if nothing were cached; "cached" is the normal path.
+
+Requires ns1 to be importable, e.g. after `pip install -e .`.
+"""
+
+import argparse
+import time
+
+from ns1 import Config
+from ns1.rest.records import Records
+
+
+def run(records, count, cold):
+    config = records._config
+    start = time.perf_counter()
+    for i in range(count):
+        if cold:
+            config._cache.clear()
+        records.update(
+            "example.com",
+            "host%d.example.com" % i,
+            "A",
+            answers=["10.0.%d.%d" % (i >> 8 & 255, i & 255)],
+            ttl=300,
+        )
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "loopback"
+    records = Records(config)
+    records._transport.route("POST", ".*", body={})
+
+    print("%-8s %14s" % ("path", "requests/s"))
+    for name, cold in (("cold", True), ("cached", False)):
+        rate = max(
+            run(records, args.requests, cold) for _ in range(args.repeat)
+        )
+        print("%-8s %14.0f" % (name, rate))
+
+
+if __name__ == "__main__":
+    main()
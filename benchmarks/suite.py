@@ -0,0 +1,413 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+"""
+Benchmark the transports, JSON codecs and concurrency modes against the local
+stand-in API server (ns1.testing.server) on standard workloads:
+
+* list_zones: list 50,000 zones, following pagination
+* retrieve_zone: retrieve a zone of 200,000 records, following pagination
+* create_records: create 10,000 records
+* poll_qps: poll the QPS of 1,000 zones
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --transport basic --workload poll_qps
+    python benchmarks/suite.py --scale 0.1 --save-baseline baseline.json
+    python benchmarks/suite.py --scale 0.1 --baseline baseline.json
+
+The server, and each benchmark, runs in a process of its own, so that peak
+RSS is that of the client alone. Throughput is in zones, records or calls per
+second. Latency is per HTTP request: the time between pages for the
+paginated workloads, which can only run serially, and the time of each call
+for the others.
+
+"serial" makes one call at a time, "threads" spreads calls over a pool of
+threads (synchronous transports) and "async" keeps as many in flight on the
+event loop (asynchronous transports). The server answers as fast as it can,
+which makes it the bottleneck of concurrent runs; give it a --latency like a
+real network's to see what concurrency buys.
+
+With --baseline, results are compared with those saved by --save-baseline,
+and the exit status is 1 if throughput fell, or p99 latency or peak RSS
+grew, by more than --tolerance.
+
+Requires ns1 to be importable, e.g. after `pip install -e .`, and a Unix.
+"""
+
+import argparse
+import functools
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+WORKLOADS = {
+    "list_zones": 50000,
+    "retrieve_zone": 200000,
+    "create_records": 10000,
+    "poll_qps": 1000,
+}
+PAGINATED = ("list_zones", "retrieve_zone")
+TRANSPORTS = {
+    "basic": ("serial", "threads"),
+    "requests": ("serial", "threads"),
+    "twisted": ("serial", "async"),
+    "asyncio": ("serial", "async"),
+}
+CODECS = ("json", "orjson", "ujson")
+MODES = ("serial", "threads", "async")
+LARGE_ZONE = "large.test"
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100.0))]
+
+
+def peak_rss():
+    """
+    Peak resident set size of this process, in bytes.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+# the worker: one benchmark, in its own process
+
+
+def make_api(spec):
+    from ns1 import NS1, Config
+    from ns1.testing.server import API_KEY
+
+    url = urlsplit(spec["url"])
+    config = Config()
+    config.createFromAPIKey(API_KEY)
+    config["endpoint"] = url.hostname
+    config["port"] = str(url.port)
+    config["ignore-ssl-errors"] = True
+    config["transport"] = spec["transport"]
+    config["json_codec"] = spec["codec"]
+    config["follow_pagination"] = True
+    config["pool_size"] = spec["concurrency"]
+    config["asyncio_concurrency"] = spec["concurrency"]
+    return NS1(config=config)
+
+
+def watch_responses(api):
+    """
+    Record the time each response arrives at, by way of the rate limiting
+    strategy, which every transport consults once per response.
+    """
+    stamps = []
+    transport = api.zones()._transport
+    rate_limit_func = transport._rate_limit_func
+
+    def watch(rl):
+        stamps.append(time.perf_counter())
+        return rate_limit_func(rl)
+
+    transport._rate_limit_func = watch
+    return stamps
+
+
+def operations(api, workload, size):
+    """
+    The calls making up `workload`.
+    """
+    if workload == "list_zones":
+        return [api.zones().list]
+    if workload == "retrieve_zone":
+        return [functools.partial(api.zones().retrieve, LARGE_ZONE)]
+    if workload == "create_records":
+        records = api.records()
+        # unique names, as the server keeps records across runs
+        prefix = "b%d-%%d.z0.test" % os.getpid()
+        return [
+            functools.partial(
+                records.create,
+                "z0.test",
+                prefix % i,
+                "A",
+                answers=["10.0.%d.%d" % (i >> 8 & 255, i & 255)],
+            )
+            for i in range(size)
+        ]
+    stats = api.stats()
+    return [functools.partial(stats.qps, "z%d.test" % i) for i in range(size)]
+
+
+def run_sync(calls, lanes):
+    latencies = []
+
+    def lane(calls):
+        for call in calls:
+            start = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - start)
+
+    if lanes == 1:
+        lane(calls)
+    else:
+        with ThreadPoolExecutor(lanes) as pool:
+            lanes = [pool.submit(lane, calls[i::lanes]) for i in range(lanes)]
+            for future in lanes:
+                future.result()
+    return latencies
+
+
+def run_asyncio(calls, lanes):
+    import asyncio
+
+    latencies = []
+
+    async def lane(calls):
+        for call in calls:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    async def main():
+        await asyncio.gather(*[lane(calls[i::lanes]) for i in range(lanes)])
+
+    asyncio.run(main())
+    return latencies
+
+
+def run_twisted(calls, lanes):
+    from twisted.internet import defer, reactor
+
+    latencies = []
+    failures = []
+
+    @defer.inlineCallbacks
+    def lane(calls):
+        for call in calls:
+            start = time.perf_counter()
+            yield call()
+            latencies.append(time.perf_counter() - start)
+
+    def main():
+        d = defer.gatherResults(
+            [lane(calls[i::lanes]) for i in range(lanes)], consumeErrors=True
+        )
+        d.addErrback(failures.append)
+        d.addBoth(lambda _: reactor.stop())
+
+    reactor.callWhenRunning(main)
+    reactor.run(installSignalHandlers=False)
+    if failures:
+        failures[0].raiseException()
+    return latencies
+
+
+RUNNERS = {"asyncio": run_asyncio, "twisted": run_twisted}
+
+
+def work(spec):
+    warnings.filterwarnings("ignore", "Unverified HTTPS request")
+    api = make_api(spec)
+    stamps = watch_responses(api)
+    calls = operations(api, spec["workload"], spec["size"])
+    lanes = 1 if spec["mode"] == "serial" else spec["concurrency"]
+    run = RUNNERS.get(spec["transport"], run_sync)
+
+    start = time.perf_counter()
+    latencies = run(calls, lanes)
+    elapsed = time.perf_counter() - start
+    if spec["workload"] in PAGINATED:
+        latencies = [b - a for a, b in zip([start] + stamps, stamps)]
+    return {
+        "throughput": spec["size"] / elapsed,
+        "requests": len(stamps),
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "rss": peak_rss() / 2.0**20,
+    }
+
+
+# the runner
+
+
+def available(transport, codec):
+    modules = {"requests": "requests", "twisted": "twisted"}
+    modules.update(orjson="orjson", ujson="ujson")
+    return all(
+        name not in modules or importlib.util.find_spec(modules[name])
+        for name in (transport, codec)
+    )
+
+
+def start_server(sizes, latency):
+    command = [
+        sys.executable,
+        "-m",
+        "ns1.testing.server",
+        "--zones",
+        str(max(sizes["list_zones"], sizes["poll_qps"], 1)),
+        "--large-zone",
+        "%s=%d" % (LARGE_ZONE, sizes["retrieve_zone"]),
+        "--latency",
+        str(latency),
+    ]
+    server = subprocess.Popen(
+        command, stdout=subprocess.PIPE, universal_newlines=True
+    )
+    line = server.stdout.readline()
+    if not line.startswith("listening on "):
+        server.kill()
+        raise SystemExit("the stand-in server failed to start")
+    return server, line.split()[-1]
+
+
+def benchmark(spec):
+    done = subprocess.run(
+        [sys.executable, __file__, "--worker", json.dumps(spec)],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    if done.returncode != 0:
+        return None
+    return json.loads(done.stdout.splitlines()[-1])
+
+
+def regressions(result, base, tolerance):
+    worse = []
+    if result["throughput"] < base["throughput"] * (1 - tolerance):
+        worse.append("throughput")
+    for metric in ("p99", "rss"):
+        if result[metric] > base[metric] * (1 + tolerance):
+            worse.append(metric)
+    return worse
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--transport", action="append", choices=TRANSPORTS)
+    parser.add_argument("--codec", action="append", choices=CODECS)
+    parser.add_argument("--mode", action="append", choices=MODES)
+    parser.add_argument("--workload", action="append", choices=WORKLOADS)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiply the size of every workload, e.g. 0.1 for a quick run",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0,
+        help="seconds the server waits before answering each request",
+    )
+    parser.add_argument("--baseline", help="JSON file to compare with")
+    parser.add_argument("--save-baseline", help="JSON file to save to")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(work(json.loads(args.worker))))
+        return
+
+    sizes = {
+        name: max(1, int(size * args.scale))
+        for name, size in WORKLOADS.items()
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["sizes"] != sizes:
+            raise SystemExit("the baseline was run at a different --scale")
+
+    server, url = start_server(sizes, args.latency)
+    results = {}
+    regressed = []
+    print(
+        "%-15s %-9s %-7s %-8s %10s %9s %9s %9s %8s"
+        % (
+            "workload",
+            "transport",
+            "codec",
+            "mode",
+            "items/s",
+            "requests",
+            "p50 ms",
+            "p99 ms",
+            "RSS MB",
+        )
+    )
+    try:
+        for workload in args.workload or WORKLOADS:
+            for transport in args.transport or TRANSPORTS:
+                for codec in args.codec or CODECS:
+                    if not available(transport, codec):
+                        continue
+                    for mode in TRANSPORTS[transport]:
+                        if args.mode and mode not in args.mode:
+                            continue
+                        if workload in PAGINATED and mode != "serial":
+                            continue
+                        key = "/".join((workload, transport, codec, mode))
+                        result = benchmark(
+                            {
+                                "url": url,
+                                "workload": workload,
+                                "size": sizes[workload],
+                                "transport": transport,
+                                "codec": codec,
+                                "mode": mode,
+                                "concurrency": args.concurrency,
+                            }
+                        )
+                        row = "%-15s %-9s %-7s %-8s" % tuple(key.split("/"))
+                        if result is None:
+                            print("%s failed" % row)
+                            continue
+                        results[key] = result
+                        base = (baseline or {"results": {}})["results"]
+                        worse = []
+                        if key in base:
+                            worse = regressions(
+                                result, base[key], args.tolerance
+                            )
+                        if worse:
+                            regressed.append((key, worse))
+                        print(
+                            "%s %10.0f %9d %9.2f %9.2f %8.1f %s"
+                            % (
+                                row,
+                                result["throughput"],
+                                result["requests"],
+                                result["p50"],
+                                result["p99"],
+                                result["rss"],
+                                " ".join("!" + w for w in worse),
+                            )
+                        )
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"sizes": sizes, "results": results}, f, indent=2)
+    if regressed:
+        print("\nregressions beyond %d%%:" % (args.tolerance * 100))
+        for key, worse in regressed:
+            print("  %s: %s" % (key, ", ".join(worse)))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
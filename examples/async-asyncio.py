@@ -0,0 +1,40 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+
+###########
+# ASYNCIO #
+###########
+
+import asyncio
+
+from ns1 import NS1, Config
+
+config = Config()
+# load default config
+config.loadFromFile(Config.DEFAULT_CONFIG_FILE)
+# to load directly from apikey instead, use
+# config.createFromAPIKey('<<CLEARTEXT API KEY>>')
+
+# override default synchronous transport. note, this would normally go
+# in config file.
+config["transport"] = "asyncio"
+# at most this many requests will be in flight at once (default 100)
+config["asyncio_concurrency"] = 50
+api = NS1(config=config)
+
+
+async def getQPS(zones):
+    # when the asyncio transport is in use, the REST methods return
+    # coroutines. await them, or gather many to run them concurrently over
+    # the transport's pool of keep-alive connections
+    stats = api.stats()
+    results = await asyncio.gather(*[stats.qps(zone=z) for z in zones])
+    for zone, qps in zip(zones, results):
+        print("current QPS for %s: %s" % (zone, qps["qps"]))
+    api.close()
+
+
+asyncio.run(getQPS(["test.com", "example.com"]))
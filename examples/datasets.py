@@ -64,10 +64,10 @@ while True:
         print("failed to generate report")
         exit(1)
 
-report = api.datasets().retrieveReport(dt.get("id"), reports[0].get("id"))
 file_path = "%s.%s" % (dt.get("name"), dt.get("export_type"))
 
-with open(file_path, "w") as file:
-    file.write(report)
+# the report is streamed to the file, so it never has to fit in memory
+with open(file_path, "wb") as file:
+    api.datasets().downloadReport(dt.get("id"), reports[0].get("id"), file)
 
 print("dataset report saved to", file_path)
@@ -18,7 +18,7 @@ from ns1 import NS1, Config
 
 def rate_limit_strategy_solo_example():
     """
-    This strategy sleeps a bit after each request, based on analysis of the
+    This strategy waits a bit after each request, based on analysis of the
     rate-limiting headers on the response. This is intended for use when we
     have a single process/worker hitting the API.
     """
@@ -35,7 +35,7 @@ def rate_limit_strategy_solo_example():
 
 def rate_limit_strategy_concurrent_example():
     """
-    This strategy sleeps a bit after each request, based on analysis of the
+    This strategy waits a bit after each request, based on analysis of the
     rate-limiting headers on the response, and the provided "parallelism"
     number. This is intended for use when we have multiple workers hitting the
     API concurrently.
@@ -53,6 +53,46 @@ def rate_limit_strategy_concurrent_example():
         print(zone)
 
 
+def rate_limit_by_bucket_example():
+    """
+    NS1 rate limits each endpoint and method separately. With this setting,
+    the rate-limiting headers are remembered per bucket, and we only wait
+    before a request whose own bucket has run out of tokens. It can be
+    combined with either strategy above; on its own, we wait only when a
+    bucket is empty.
+    """
+    config = _get_config()
+    config["rate_limit_by_bucket"] = True
+
+    api = NS1(config=config)
+    zones_list = api.zones().list()
+    for z in zones_list:
+        print(z["zone"])
+        zone = api.zones().retrieve(z["zone"])
+        print(zone)
+
+
+def rate_limit_strategy_shared_example():
+    """
+    This strategy keeps a client-side model of the API's token buckets in a
+    file shared by every process on the host that uses the same API key, so
+    several workers together converge on the real limit without having to
+    know how many of them there are. Each request waits for a token before
+    it is sent.
+    """
+    config = _get_config()
+    config["rate_limit_strategy"] = "shared"
+    # optional, defaults to a file in the temp dir named after the API key
+    # config["rate_limit_state_file"] = "/run/ns1/ratelimit"
+
+    api = NS1(config=config)
+    zones_list = api.zones().list()
+    for z in zones_list:
+        print(z["zone"])
+        zone = api.zones().retrieve(z["zone"])
+        print(zone)
+
+
 def _get_config():
     config = Config()
 
@@ -67,3 +107,5 @@ def _get_config():
 if __name__ == "main":
     rate_limit_strategy_solo_example()
     rate_limit_strategy_concurrent_example()
+    rate_limit_by_bucket_example()
+    rate_limit_strategy_shared_example()
@@ -19,6 +19,17 @@ api = NS1()
 zone = api.createZone("example2.com", zoneFile="./importzone.db")
 print(zone)
 
+# zone files are streamed to the API, and can also be given as compressed
+# files (.gz, or .zst with the zstandard package installed), bytes, file
+# objects, or an iterable of lines, e.g. rendered on the fly:
+records = [("www", "1.2.3.4"), ("mail", "1.2.3.5")]
+lines = (
+    "%s.example3.com. 3600 IN A %s\n" % (name, ip) for name, ip in records
+)
+zone3 = api.createZone("example3.com", zoneFile=lines)
+print(zone3)
+zone3.delete()
+
 # delete a whole zone, including all records, data feeds, etc. this is
 # immediate and irreversible, so be careful!
 zone.delete()
@@ -41,6 +41,21 @@ class NS1:
             )
             self.config.loadFromFile(configFile)
 
+    def close(self):
+        """
+        Close the connections shared by the REST interfaces created from this
+        object's config. Interfaces created afterwards reconnect on demand.
+        """
+        from ns1.rest.transport.base import close_transports
+
+        close_transports(self.config)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
     # REST INTERFACE
 
     def zones(self):
@@ -317,7 +332,8 @@ class NS1:
         to populate the zone with.
 
         :param str zone: zone FQDN, like 'example.com'
-        :param str zoneFile: absolute path of a zone file
+        :param zoneFile: zone file to import: a path (to a plain, .gz or .zst
+            file), bytes, a file object, or an iterable of lines
         :param str name: zone name override, name will be zone FQDN if omitted
         :keyword int retry: retry time
         :keyword int refresh: refresh ttl
@@ -3,6 +3,7 @@
 #
 # License under The MIT License (MIT). See LICENSE in project root.
 #
+import copy
 import json
 import os
 
@@ -22,9 +23,16 @@ except ImportError:
         return deprecated
 
 
+from ns1.rest.json_codec import get_codec
+from ns1.rest.rate_limiting import BucketRateLimiter
+from ns1.rest.rate_limiting import SharedTokenBucketRateLimiter
+from ns1.rest.rate_limiting import TokenBucketRateLimiter
 from ns1.rest.rate_limiting import default_rate_limit_func
+from ns1.rest.rate_limiting import depleted_rate_limit_func
 from ns1.rest.rate_limiting import rate_limit_strategy_concurrent
 from ns1.rest.rate_limiting import rate_limit_strategy_solo
+from ns1.rest.rate_limiting import shared_state_path
+from ns1.rest.retry import RetryPolicy
 
 
 class ConfigException(Exception):
@@ -58,11 +66,32 @@ class Config:
         self._path = None
         self._keyID = None
         self._data = {}
+        # values derived from the config, cleared whenever it changes
+        self._cache = {}
+        # transports built from the config, by name; see get_transport
+        self._transports = {}
 
         if path:
             self.loadFromFile(path)
 
+    def __deepcopy__(self, memo):
+        # derived values and shared transports hold locks, sockets and SSL
+        # contexts, which can't be copied; the copy makes its own
+        config = self.__class__.__new__(self.__class__)
+        memo[id(self)] = config
+        for name, value in self.__dict__.items():
+            if name in ("_cache", "_transports"):
+                value = {}
+            else:
+                value = copy.deepcopy(value, memo)
+            setattr(config, name, value)
+        return config
+
+    def _changed(self):
+        self._cache.clear()
+
     def _doDefaults(self):
+        self._changed()
         if "default_key" in self._data:
             self.useKeyID(self._data["default_key"])
 
@@ -181,6 +210,7 @@ class Config:
         if keyID not in self._data["keys"]:
             raise ConfigException("keyID does not exist: %s" % keyID)
         self._keyID = keyID
+        self._changed()
 
     def getCurrentKeyID(self):
         """
@@ -253,6 +283,22 @@ class Config:
 
         return f"https://{endpoint}{port}"
 
+    def memoize(self, name, build):
+        """
+        Return the value cached for this config and key as `name`, building
+        it with `build()` on first use. The cache is cleared by `useKeyID`
+        and by setting or loading config items; changes made in place to
+        nested items, such as a key's config, are not noticed.
+
+        :param str name: name to cache the value under
+        :param callable build: builds the value from the config
+        """
+        try:
+            return self._cache[name]
+        except KeyError:
+            value = self._cache[name] = build()
+            return value
+
     def getRateLimitingFunc(self):
         """
         choose how to handle rate limiting
@@ -274,6 +320,49 @@ class Config:
         else:
             return default_rate_limit_func
 
+    def getRateLimiter(self):
+        """
+        choose how to throttle requests before they are sent, if at all
+        """
+        if self.get("rate_limit_strategy", None) == "shared":
+            path = self.get("rate_limit_state_file", None)
+            if path is None:
+                path = shared_state_path(self.getAPIKey())
+            return SharedTokenBucketRateLimiter(path)
+        elif self.get("rate_limit_token_bucket", False):
+            return TokenBucketRateLimiter()
+        elif self.get("rate_limit_by_bucket", False):
+            func = self.getRateLimitingFunc()
+            if func is default_rate_limit_func:
+                func = depleted_rate_limit_func
+            return BucketRateLimiter(func)
+        else:
+            return None
+
+    def getRetryPolicy(self):
+        """
+        choose whether, and how, to retry failed requests
+        """
+        retries = self.get("retries", 0)
+        if not retries:
+            return None
+        return RetryPolicy(
+            retries,
+            backoff=self.get("retry_backoff", 0.5),
+            max_backoff=self.get("retry_max_backoff", 30.0),
+            budget_ratio=self.get("retry_budget", 0.1),
+        )
+
+    def getJSONCodec(self):
+        """
+        choose the library used to encode and decode JSON
+        """
+        name = self.get("json_codec", "json")
+        try:
+            return get_codec(name)
+        except KeyError:
+            raise ConfigException('unknown "json_codec": %s' % name)
+
     def __repr__(self):
         return "config file [%s]: %s" % (
             self._path,
@@ -285,6 +374,7 @@ class Config:
 
     def __setitem__(self, key, value):
         self._data[key] = value
+        self._changed()
 
     def get(self, item, default=None):
         """
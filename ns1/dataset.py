@@ -172,3 +172,19 @@ class Dataset(object):
         return Datasets(self.config).retrieveReport(
             dt_id, rp_id, callback=callback, errback=errback
         )
+
+    def downloadReport(self, rp_id: str, dest, dt_id: str = None):
+        """
+        Downloads a generated report into a binary file object, in chunks
+        :param str rp_id: the id of the generated report to download
+        :param dest: binary file object the report is written to
+        :param str dt_id: the id of the dataset that the above report belongs to
+        :return: number of bytes written
+        """
+
+        if dt_id is None and self.data:
+            dt_id = self.__getitem__("id")
+        if dt_id is None:
+            raise DatasetException("no dataset id: did you mean to create?")
+
+        return Datasets(self.config).downloadReport(dt_id, rp_id, dest)
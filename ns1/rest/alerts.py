@@ -4,7 +4,6 @@
 # License under The MIT License (MIT). See LICENSE in project root.
 #
 from . import resource
-from ns1.alerting import UsageAlertsAPI
 
 
 class Alerts(resource.BaseResource):
@@ -66,6 +65,8 @@ class Alerts(resource.BaseResource):
         :return: :py:class:`ns1.alerting.UsageAlertsAPI`
         """
         if self._usage_api is None:
+            from ns1.alerting import UsageAlertsAPI
+
             # The UsageAlertsAPI expects a client with HTTP methods (_get, _post, etc.)
             # Since the NS1 object is not directly accessible here, we'll use self as the client
             # The UsageAlertsAPI only needs HTTP methods (_get, _post, etc.)
@@ -89,6 +90,12 @@ class Alerts(resource.BaseResource):
         )
         return data["results"]
 
+    def iter_list(self):
+        """
+        Iterate over all alerts, fetching one page at a time.
+        """
+        return self._iter_request("GET", self.ROOT, "results")
+
     def update(self, alid, callback=None, errback=None, **kwargs):
         body = self._buildBody(alid, **kwargs)
 
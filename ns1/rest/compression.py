@@ -0,0 +1,156 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+"""
+Content-Encoding negotiation for the transports.
+
+Zone retrieves and usage stats are highly repetitive JSON, which compresses
+around ten times over, so every transport asks for gzip or deflate encoded
+responses (and brotli, if the brotli package is installed) and decodes them
+as they arrive. Request bodies can be gzipped too, by setting
+"compress_requests_over" in the config to a size in bytes.
+"""
+
+import gzip
+import zlib
+from importlib.util import find_spec
+
+# imported when a brotli encoded response is first decoded
+have_brotli = find_spec("brotli") is not None
+
+ENCODINGS = ("gzip", "deflate", "br") if have_brotli else ("gzip", "deflate")
+ACCEPT_ENCODING = ", ".join(ENCODINGS)
+
+
+class _DeflateDecoder(object):
+    """
+    "deflate" should be zlib wrapped, but some servers send raw deflate
+    streams, so fall back to those if the first chunk has no zlib header.
+    """
+
+    def __init__(self):
+        self._obj = zlib.decompressobj()
+        self._first = True
+
+    def decompress(self, data):
+        if self._first and data:
+            self._first = False
+            try:
+                return self._obj.decompress(data)
+            except zlib.error:
+                self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._obj.decompress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class _BrotliDecoder(object):
+    def __init__(self):
+        import brotli
+
+        self._obj = brotli.Decompressor()
+
+    def decompress(self, data):
+        # Brotli names it process, brotlicffi decompress
+        if hasattr(self._obj, "process"):
+            return self._obj.process(data)
+        return self._obj.decompress(data)
+
+    def flush(self):
+        return b""
+
+
+class _MultiDecoder(object):
+    """
+    Undoes several encodings, given in the order they were applied.
+    """
+
+    def __init__(self, decoders):
+        self._decoders = list(reversed(decoders))
+
+    def decompress(self, data):
+        for decoder in self._decoders:
+            data = decoder.decompress(data)
+        return data
+
+    def flush(self):
+        data = b""
+        for decoder in self._decoders:
+            data = decoder.decompress(data) + decoder.flush()
+        return data
+
+
+def _decoder(encoding):
+    if encoding in ("gzip", "x-gzip"):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _DeflateDecoder()
+    if encoding == "br" and have_brotli:
+        return _BrotliDecoder()
+    raise ValueError("unsupported content encoding: %s" % encoding)
+
+
+def get_decoder(content_encoding):
+    """
+    Return a decoder for a response's Content-Encoding header, with
+    `decompress(data)` and `flush()` methods, or None if the body is not
+    encoded.
+
+    :raises ValueError: for an encoding we didn't ask for
+    """
+    encodings = [
+        e.strip().lower()
+        for e in (content_encoding or "").split(",")
+        if e.strip() and e.strip().lower() != "identity"
+    ]
+    if not encodings:
+        return None
+    if len(encodings) == 1:
+        return _decoder(encodings[0])
+    return _MultiDecoder([_decoder(e) for e in encodings])
+
+
+def decode_chunks(chunks, decoder):
+    """
+    Decode an iterable of body chunks with `decoder`, skipping chunks
+    which decode to nothing.
+    """
+    for chunk in chunks:
+        chunk = decoder.decompress(chunk)
+        if chunk:
+            yield chunk
+    chunk = decoder.flush()
+    if chunk:
+        yield chunk
+
+
+def decode_body(body, content_encoding):
+    """
+    Decode a whole response body according to its Content-Encoding.
+    """
+    decoder = get_decoder(content_encoding)
+    if decoder is None or not body:
+        return body
+    return decoder.decompress(body) + decoder.flush()
+
+
+def compress_body(headers, data, threshold):
+    """
+    Gzip a request body of at least `threshold` bytes, returning new
+    headers and body. Smaller bodies, streamed ones, and those already
+    encoded are returned unchanged.
+    """
+    if threshold is None or not isinstance(data, (str, bytes)):
+        return headers, data
+    if any(k.lower() == "content-encoding" for k in headers or {}):
+        return headers, data
+    body = data.encode("utf-8") if isinstance(data, str) else data
+    if len(body) < threshold:
+        return headers, data
+    headers = dict(headers or {})
+    headers["Content-Encoding"] = "gzip"
+    # a low level is most of the win on JSON, for a fraction of the CPU
+    return headers, gzip.compress(body, compresslevel=5, mtime=0)
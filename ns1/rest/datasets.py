@@ -97,3 +97,14 @@ class Datasets(resource.BaseResource):
             errback=errback,
             skip_json_parsing=True,
         )
+
+    def downloadReport(self, dtId: str, rpId: str, dest):
+        """
+        Write a generated report to the binary file object `dest` as it is
+        downloaded, so that large reports are never held in memory.
+
+        :return: number of bytes written
+        """
+        return self._download(
+            "%s/%s/reports/%s" % (self.ROOT, dtId, rpId), dest
+        )
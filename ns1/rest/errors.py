@@ -3,17 +3,17 @@
 #
 # License under The MIT License (MIT). See LICENSE in project root.
 #
-import json
+from ns1.rest.json_codec import STDLIB
 
 
 class ResourceException(Exception):
-    def __init__(self, message, response=None, body=None):
+    def __init__(self, message, response=None, body=None, codec=STDLIB):
         # if message is json error message, unwrap the actual message
         # otherwise, fall back to the whole body
 
         if body:
             try:
-                jData = json.loads(body)
+                jData = codec.loads(body)
                 self.message = "%s: %s" % (message, jData["message"])
             except:  # noqa
                 self.message = message
@@ -59,8 +59,9 @@ class RateLimitException(ResourceException):
         limit=None,
         remaining=None,
         period=None,
+        codec=STDLIB,
     ):
-        ResourceException.__init__(self, message, response, body)
+        ResourceException.__init__(self, message, response, body, codec)
         self.by = by
         self.limit = limit
         self.period = period
@@ -0,0 +1,118 @@
+"""
+JSON codecs, selected with the "json_codec" config setting.
+
+Encoding request bodies and decoding responses is a noticeable share of the
+CPU time of bulk jobs, so besides the stdlib's json module ("json", the
+default), orjson and ujson can be used if they are installed. "auto" picks
+the fastest one available. If the requested library is not installed, we
+fall back to the stdlib.
+
+Codecs encode to str and decode from str or bytes, so any codec can stand in
+for any other.
+"""
+
+import json
+import logging
+from importlib.util import find_spec
+
+# the optional libraries are only imported once their codec is asked for, as
+# importing them takes longer than importing the SDK
+have_orjson = find_spec("orjson") is not None
+have_ujson = find_spec("ujson") is not None
+
+LOG = logging.getLogger(__name__)
+
+
+class JSONCodec(object):
+    """
+    The stdlib's json module.
+    """
+
+    name = "json"
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, obj):
+        # like the stdlib, turn int (etc.) keys into strings
+        orjson = self._orjson
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode(
+            "utf-8"
+        )
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self._ujson = ujson
+
+    def dumps(self, obj):
+        return self._ujson.dumps(obj, escape_forward_slashes=False)
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+
+STDLIB = JSONCodec()
+
+_codecs = None
+_warned = set()
+
+
+def _available():
+    # in order of preference for "auto"; None if the library is not installed
+    global _codecs
+    if _codecs is None:
+        _codecs = {
+            "orjson": OrjsonCodec() if have_orjson else None,
+            "ujson": UjsonCodec() if have_ujson else None,
+            "json": STDLIB,
+        }
+    return _codecs
+
+
+def __getattr__(name):
+    # CODECS is built on first access, importing the optional libraries
+    if name == "CODECS":
+        return _available()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def get_codec(name="json"):
+    """
+    Return the codec called `name`, or the stdlib's if its library is not
+    installed. Raises KeyError for unknown names.
+
+    :param str name: "json", "orjson", "ujson" or "auto"
+    :rtype: JSONCodec
+    """
+    if name == "json":
+        return STDLIB
+    codecs = _available()
+    if name == "auto":
+        return next(c for c in codecs.values() if c is not None)
+    codec = codecs[name]
+    if codec is None:
+        if name not in _warned:
+            _warned.add(name)
+            LOG.warning("%s is not installed, using the stdlib json" % name)
+        return STDLIB
+    return codec
@@ -0,0 +1,180 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+"""
+Streaming multipart/form-data request bodies, for file uploads.
+
+Every transport takes uploads in the requests style, as a list of
+(field name, (filename, file object, content type)) tuples, and sends them
+as a `MultipartBody`. The body reads each file in chunks while it is sent,
+so a file of any size is uploaded in constant memory. Each file is closed
+as soon as it has been sent, or when the body is closed, whichever comes
+first.
+
+Besides file objects, a part's content may be bytes or an iterable of bytes
+or str (e.g. lines). `open_upload` turns the other things users may want to
+upload, such as paths to compressed files, into one of these.
+"""
+
+import gzip
+import io
+import os
+import random
+from importlib.util import find_spec
+
+# imported when a .zst file is first uploaded
+have_zstandard = find_spec("zstandard") is not None
+
+
+class MultipartBody(object):
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, files, boundary=None):
+        """
+        :param list files: (name, (filename, fileobj, content_type)) tuples
+        :param str boundary: part boundary, random by default
+        """
+        if boundary is None:
+            boundary = "".join(str(random.randrange(10)) for _ in range(28))
+        self.boundary = boundary
+        self._parts = []
+        for name, (filename, f, ctype) in files:
+            head = (
+                "--%s\r\n"
+                'Content-Disposition: form-data; name="%s"; filename="%s"\r\n'
+                "Content-Type: %s\r\n\r\n" % (boundary, name, filename, ctype)
+            ).encode("utf-8")
+            self._parts.append((head, f))
+        self._tail = ("--%s--\r\n" % boundary).encode("utf-8")
+        self.length = self._length()
+
+    @property
+    def content_type(self):
+        return "multipart/form-data; boundary=%s" % self.boundary
+
+    @staticmethod
+    def _size(f):
+        """
+        Bytes left to read from `f`, or None if that can't be known without
+        reading it (e.g. text or compressed files).
+        """
+        if isinstance(f, bytes):
+            return len(f)
+        if isinstance(f, io.BytesIO):
+            return len(f.getbuffer()) - f.tell()
+        if isinstance(f, (io.BufferedReader, io.FileIO)):
+            return os.fstat(f.fileno()).st_size - f.tell()
+        return None
+
+    def _length(self):
+        length = len(self._tail)
+        for head, f in self._parts:
+            size = self._size(f)
+            if size is None:
+                return None
+            length += len(head) + size + 2
+        return length
+
+    def _chunks(self, f):
+        if isinstance(f, bytes):
+            yield f
+            return
+        if not hasattr(f, "read"):
+            for chunk in self._batch(f):
+                yield chunk
+            return
+        while True:
+            chunk = f.read(self.CHUNK_SIZE)
+            if not chunk:
+                return
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            yield chunk
+
+    def _batch(self, pieces):
+        """
+        Join the (typically small) items of an iterable into chunks.
+        """
+        batch = []
+        size = 0
+        for piece in pieces:
+            if isinstance(piece, str):
+                piece = piece.encode("utf-8")
+            batch.append(piece)
+            size += len(piece)
+            if size >= self.CHUNK_SIZE:
+                yield b"".join(batch)
+                batch = []
+                size = 0
+        if batch:
+            yield b"".join(batch)
+
+    def __bool__(self):
+        # a body is never empty, even when its length isn't known
+        return True
+
+    def __len__(self):
+        # requests reads Content-Length through len(); bodies of unknown
+        # length are sent chunked, from iter(body)
+        if self.length is None:
+            raise TypeError(
+                "the length of this multipart body isn't known; "
+                "check .length first"
+            )
+        return self.length
+
+    def __iter__(self):
+        try:
+            for head, f in self._parts:
+                yield head
+                for chunk in self._chunks(f):
+                    yield chunk
+                _close(f)
+                yield b"\r\n"
+            yield self._tail
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Close every file in the body.
+        """
+        for _, f in self._parts:
+            _close(f)
+
+
+def open_upload(source, filename):
+    """
+    Prepare `source` to be sent as part of a `MultipartBody`, returning the
+    filename to send it as and its content.
+
+    :param source: path to a file, which is decompressed on the fly if it \
+        ends in ".gz" or ".zst"; bytes; a binary or text file object; or an \
+        iterable of bytes or str, such as lines including their line endings
+    :param str filename: filename to send if `source` is not a path
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith(".gz"):
+            return path[: -len(".gz")], gzip.open(path, "rb")
+        if path.endswith(".zst"):
+            if not have_zstandard:
+                raise ImportError("zstandard required to upload .zst files")
+            import zstandard
+
+            reader = zstandard.ZstdDecompressor().stream_reader(
+                open(path, "rb"), closefd=True
+            )
+            return path[: -len(".zst")], reader
+        return path, open(path, "rb")
+    if isinstance(source, (bytearray, memoryview)):
+        source = bytes(source)
+    return filename, source
+
+
+def _close(f):
+    close = getattr(f, "close", None)
+    if close is not None:
+        close()
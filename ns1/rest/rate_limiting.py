@@ -10,21 +10,57 @@ from the API.
 
 Unfortunately, rate limiting is seperately "bucketed" per endpoint and method,
 and are not necessarily the same for all users. So the only way to know the
-status of a "bucket" is to make a request, and, for now, the strategies involve
-sleeping for some interval *after* we make requests. They are also not
-currently "bucket-aware".
+status of a "bucket" is to make a request. By default, the strategies involve
+waiting for some interval *after* we make requests, whatever the bucket.
+
+With the "rate_limit_by_bucket" config setting, the headers from each response
+are instead remembered per bucket (see `BucketRateLimiter`), and the wait
+happens *before* the next request drawing from that same bucket, so throttling
+one endpoint does not hold up requests to another.
+
+With the "rate_limit_token_bucket" config setting, we go further and mirror
+the API's token bucket on the client (see `TokenBucketRateLimiter`): every
+request takes a token before it is sent, waiting for one to be replenished if
+need be, and the bucket is re-seeded from the headers on each response. As
+the transport is shared by all threads using a config, a burst of parallel
+requests queues for tokens rather than overshooting into 429s. This may be
+combined with "rate_limit_by_bucket" to keep a token bucket per API bucket.
+
+Finally, the "shared" rate_limit_strategy keeps those token buckets in a
+memory-mapped file (see `SharedTokenBucketRateLimiter`), so every process on a
+host using the same API key draws from the same buckets, and there is no need
+to guess the number of workers for the "concurrent" strategy.
+
+A strategy does not wait itself: it returns the number of seconds to wait
+(or None), and the transport waits in whatever way suits it. Synchronous
+transports sleep, while the Twisted and asyncio transports schedule the rest
+of the request on their event loop, so throttling one request never stalls
+the others in flight.
 """
 
 import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+
+from urllib.parse import urlsplit
 
-from time import sleep
+try:
+    import fcntl
+
+    have_fcntl = True
+except ImportError:
+    have_fcntl = False
 
 LOG = logging.getLogger(__name__)
 
 
 def rate_limit_strategy_solo():
     """
-    Sleep longer the closer we are to running out of tokens, but be blissfully
+    Wait longer the closer we are to running out of tokens, but be blissfully
     unaware of anything else using up tokens.
     """
 
@@ -33,20 +69,20 @@ def rate_limit_strategy_solo():
             wait = rl["period"]
         else:
             wait = rl["period"] / rl["remaining"]
-        LOG.debug("rate_limit_strategy_solo: sleeping for: {}s".format(wait))
-        sleep(wait)
+        LOG.debug("rate_limit_strategy_solo: waiting for: {}s".format(wait))
+        return wait
 
     return solo_rate_limit_func
 
 
 def rate_limit_strategy_concurrent(parallelism):
     """
-    When we have equal or fewer tokens than workers, sleep for
+    When we have equal or fewer tokens than workers, wait for
     the token replenishment interval multiplied by the number of workers.
 
     For example, if we can make 10 requests in 60 seconds, a token is
     replenished every 6 seconds. If parallelism is 3, we will burst 7 requests,
-    and subsequently each process will sleep for 18 seconds before making
+    and subsequently each process will wait for 18 seconds before making
     another request.
     """
 
@@ -54,11 +90,11 @@ def rate_limit_strategy_concurrent(parallelism):
         if rl["remaining"] <= parallelism:
             wait = (rl["period"] / rl["limit"]) * parallelism
             LOG.debug(
-                "rate_limit_strategy_concurrent={}: sleeping for: {}s".format(
+                "rate_limit_strategy_concurrent={}: waiting for: {}s".format(
                     parallelism, wait
                 )
             )
-            sleep(wait)
+            return wait
 
     return concurrent_rate_limit_func
 
@@ -68,3 +104,262 @@ def default_rate_limit_func(rl):
     noop
     """
     pass
+
+
+def depleted_rate_limit_func(rl):
+    """
+    Wait for the next token only once the bucket is empty.
+    """
+    if rl["remaining"] < 1:
+        wait = rl["period"] / rl["limit"]
+        LOG.debug("rate limit bucket depleted: waiting for: {}s".format(wait))
+        return wait
+
+
+# path segments that name a route rather than an object, e.g. the "versions"
+# in zones/example.com/versions. zone names, domains, record types and ids
+# contain dots, digits or capitals, and are templated out of the bucket.
+_ROUTE_SEGMENT = re.compile(r"^[a-z_]+$")
+
+
+def rate_limit_bucket(method, url, api_version):
+    """
+    Derive the rate limit bucket a request draws from: its method and the
+    route template of its path, e.g. ("PUT", "zones/{}/{}/{}") for a record
+    create, with the API version dropped wherever _make_url placed it.
+    """
+    segments = [
+        s for s in urlsplit(url).path.split("/") if s and s != api_version
+    ]
+    route = segments[:1] + [
+        s if _ROUTE_SEGMENT.match(s) else "{}" for s in segments[1:]
+    ]
+    return method, "/".join(route)
+
+
+class BucketRateLimiter(object):
+    """
+    Remembers the most recent rate limit headers seen for each bucket, and
+    computes how long a request must wait before drawing from its bucket,
+    less any time that has passed since those headers arrived.
+    """
+
+    def __init__(self, rate_limit_func):
+        self._rate_limit_func = rate_limit_func
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def update(self, bucket, rl):
+        with self._lock:
+            self._buckets[bucket] = (rl, time.monotonic())
+
+    def delay(self, bucket):
+        with self._lock:
+            state = self._buckets.get(bucket)
+        if state is None:
+            return 0
+        rl, seen = state
+        wait = self._rate_limit_func(rl) or 0
+        return max(0, wait - (time.monotonic() - seen))
+
+
+class TokenBucket(object):
+    """
+    Client-side model of one API token bucket. `reserve` takes a token,
+    returning how long the caller must wait for it to become available.
+    Tokens may go negative, which queues callers behind each other.
+    """
+
+    def __init__(self, limit, period, remaining):
+        self._stamp = time.monotonic()
+        self._capacity = self._tokens = remaining
+        self._rate = 0
+        self.observe(limit, period, remaining)
+
+    @classmethod
+    def fromState(cls, state):
+        tb = cls.__new__(cls)
+        tb._tokens, tb._stamp, tb._capacity, tb._rate = state
+        return tb
+
+    def state(self):
+        return self._tokens, self._stamp, self._capacity, self._rate
+
+    def _refill(self, now):
+        # a stamp ahead of the clock (one shared across a reboot) refills
+        # nothing, rather than draining the bucket
+        elapsed = max(0, now - self._stamp)
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+        self._stamp = now
+
+    def observe(self, limit, period, remaining):
+        self._refill(time.monotonic())
+        self._capacity = max(limit, 1)
+        self._rate = self._capacity / float(max(period, 1))
+        self._tokens = min(self._tokens, remaining)
+
+    def reserve(self):
+        self._refill(time.monotonic())
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0
+        return -self._tokens / self._rate
+
+
+class TokenBucketRateLimiter(object):
+    """
+    Keeps a `TokenBucket` per bucket, seeded from the rate limit headers of
+    the responses drawing from it. Requests to a bucket we have not yet
+    heard from are not held up.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def update(self, bucket, rl):
+        with self._lock:
+            tb = self._buckets.get(bucket)
+            if tb is None:
+                self._buckets[bucket] = TokenBucket(
+                    rl["limit"], rl["period"], rl["remaining"]
+                )
+            else:
+                tb.observe(rl["limit"], rl["period"], rl["remaining"])
+
+    def delay(self, bucket):
+        with self._lock:
+            tb = self._buckets.get(bucket)
+            if tb is None:
+                return 0
+            wait = tb.reserve()
+        if wait:
+            LOG.debug("token bucket {}: waiting for: {}s".format(bucket, wait))
+        return wait
+
+
+def shared_state_path(apikey):
+    """
+    Default location of the shared rate limit state for an API key, the
+    same for every process on the host using that key.
+    """
+    import hashlib
+    import tempfile
+
+    digest = hashlib.sha256(apikey.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), "ns1-ratelimit-%s" % digest)
+
+
+class SharedTokenBucketRateLimiter(object):
+    """
+    A `TokenBucketRateLimiter` whose buckets live in a memory-mapped file,
+    locked with flock, so that they are shared by all processes on a host.
+
+    The file is a fixed table of slots, each holding the hash of a bucket
+    and that bucket's state. Buckets are placed by open addressing; if the
+    table fills up, the least recently seen bucket in the probe sequence is
+    evicted. Times are taken from the monotonic clock, which all processes
+    on a host share until it reboots; state left from before a reboot may
+    be stamped ahead of the clock, and is refilled from the current time.
+    """
+
+    SLOT = struct.Struct("<Qdddd")
+    SLOTS = 256
+
+    def __init__(self, path):
+        if not have_fcntl:
+            raise ImportError(
+                "fcntl required for the shared rate limit strategy"
+            )
+        # hashlib takes a while to import, and only this strategy needs it
+        import hashlib
+
+        self._blake2b = hashlib.blake2b
+        self._path = path
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        # locks and mappings must not be shared with a parent we forked from
+        if self._pid == os.getpid():
+            return
+        if self._map is not None:
+            self._map.close()
+            os.close(self._fd)
+        size = self.SLOT.size * self.SLOTS
+        self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size < size:
+                    os.ftruncate(self._fd, size)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        self._pid = os.getpid()
+
+    def _key(self, bucket):
+        digest = self._blake2b(repr(bucket).encode("utf-8"), digest_size=8)
+        return int.from_bytes(digest.digest(), "little") or 1
+
+    def _find(self, key):
+        """
+        Return the offset of the slot for `key`, and its state if present.
+        """
+        start = key % self.SLOTS
+        victim, victim_stamp = None, None
+        for i in range(self.SLOTS):
+            offset = ((start + i) % self.SLOTS) * self.SLOT.size
+            slot_key, tokens, stamp, capacity, rate = self.SLOT.unpack_from(
+                self._map, offset
+            )
+            if slot_key == key:
+                return offset, (tokens, stamp, capacity, rate)
+            if slot_key == 0:
+                return offset, None
+            if victim is None or stamp < victim_stamp:
+                victim, victim_stamp = offset, stamp
+        return victim, None
+
+    def _withBucket(self, bucket, func):
+        key = self._key(bucket)
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset, state = self._find(key)
+                tb = func(state)
+                if tb is not None:
+                    self.SLOT.pack_into(self._map, offset, key, *tb.state())
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def update(self, bucket, rl):
+        def observe(state):
+            if state is None:
+                return TokenBucket(rl["limit"], rl["period"], rl["remaining"])
+            tb = TokenBucket.fromState(state)
+            tb.observe(rl["limit"], rl["period"], rl["remaining"])
+            return tb
+
+        self._withBucket(bucket, observe)
+
+    def delay(self, bucket):
+        waits = []
+
+        def reserve(state):
+            if state is None:
+                return None
+            tb = TokenBucket.fromState(state)
+            waits.append(tb.reserve())
+            return tb
+
+        self._withBucket(bucket, reserve)
+        wait = waits[0] if waits else 0
+        if wait:
+            LOG.debug(
+                "shared bucket {}: waiting for: {}s".format(bucket, wait)
+            )
+        return wait
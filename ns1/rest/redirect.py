@@ -1,4 +1,5 @@
 from . import resource
+from .multipart import open_upload
 
 
 class Redirects(resource.BaseResource):
@@ -28,7 +29,8 @@ class Redirects(resource.BaseResource):
         return body
 
     def import_file(self, cfg, cfgFile, callback=None, errback=None, **kwargs):
-        files = [("cfgfile", (cfgFile, open(cfgFile, "rb"), "text/plain"))]
+        filename, content = open_upload(cfgFile, "redirects.csv")
+        files = [("cfgfile", (filename, content, "text/plain"))]
         return self._make_request(
             "PUT",
             "%s/importexport" % self.ROOT,
@@ -76,6 +78,12 @@ class Redirects(resource.BaseResource):
             pagination_handler=redirect_list_pagination,
         )
 
+    def iter_list(self):
+        """
+        Iterate over all redirects, fetching one page at a time.
+        """
+        return self._iter_request("GET", self.ROOT, "results")
+
     def retrieve(self, cfgId, callback=None, errback=None):
         return self._make_request(
             "GET",
@@ -198,6 +206,12 @@ class RedirectCertificates(resource.BaseResource):
             pagination_handler=redirect_list_pagination,
         )
 
+    def iter_list(self):
+        """
+        Iterate over all redirect certificates, fetching one page at a time.
+        """
+        return self._iter_request("GET", self.ROOT, "results")
+
     def retrieve(self, certId, callback=None, errback=None):
         return self._make_request(
             "GET",
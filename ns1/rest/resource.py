@@ -6,14 +6,20 @@
 
 import sys
 import logging
-import json
 from ns1 import version
-from ns1.rest.transport.base import TransportBase
+from ns1.rest.transport.base import TransportBase, get_transport
 from ns1.rest.errors import ResourceException
 
+USER_AGENT = "ns1-python %s python 0x%s %s" % (
+    version,
+    sys.hexversion,
+    sys.platform,
+)
+
 
 class BaseResource:
     DEFAULT_TRANSPORT = "requests"
+    VERBS = frozenset(["GET", "POST", "DELETE", "PUT"])
 
     INT_FIELDS = []
     BOOL_FIELDS = []
@@ -26,8 +32,9 @@ class BaseResource:
         """
         self._config = config
         self._log = logging.getLogger(__name__)
+        self._codec = self._config.getJSONCodec()
         # TODO verify we have a default key
-        # get a transport. TODO make this static property?
+        # transports are shared by all resources built from this config
         transport = self._config.get("transport", None)
         if transport is None:
             # for default transport:
@@ -42,7 +49,7 @@ class BaseResource:
             raise ResourceException(
                 "requested transport was not found: %s" % transport
             )
-        self._transport = TransportBase.REGISTRY[transport](self._config)
+        self._transport = get_transport(transport, self._config)
 
     def _buildStdBody(self, body, fields):
         for f in self.BOOL_FIELDS:
@@ -55,25 +62,74 @@ class BaseResource:
             if f in fields:
                 body[f] = fields[f]
 
+    def _url_parts(self):
+        return (
+            self._config.getEndpoint(),
+            self._config["api_version"],
+            self._config["api_version_before_resource"],
+        )
+
     def _make_url(self, path):
-        if self._config["api_version_before_resource"]:
-            return f"{self._config.getEndpoint()}/{self._config['api_version']}/{path}"
+        # the endpoint is looked up once per config and key
+        endpoint, api_version, before_resource = self._config.memoize(
+            "url_parts", self._url_parts
+        )
+        if before_resource:
+            return f"{endpoint}/{api_version}/{path}"
 
         resource, sub_resource = path.split("/", 1)
 
-        return f"{self._config.getEndpoint()}/{resource}/{self._config['api_version']}/{sub_resource}"
+        return f"{endpoint}/{resource}/{api_version}/{sub_resource}"
 
     def _make_request(self, type, path, **kwargs):
-        VERBS = ["GET", "POST", "DELETE", "PUT"]
-        if type not in VERBS:
+        if type not in self.VERBS:
             raise Exception("invalid request method")
         # TODO don't assume this doesn't exist in kwargs
-        kwargs["headers"] = {
-            "User-Agent": "ns1-python %s python 0x%s %s"
-            % (version, sys.hexversion, sys.platform),
-            "X-NSONE-Key": self._config.getAPIKey(),
-        }
+        kwargs["headers"] = self._make_headers()
         if "body" in kwargs:
-            kwargs["data"] = json.dumps(kwargs["body"])
-            del kwargs["body"]
+            kwargs["data"] = self._codec.dumps(kwargs.pop("body"))
         return self._transport.send(type, self._make_url(path), **kwargs)
+
+    def _base_headers(self):
+        return {
+            "User-Agent": USER_AGENT,
+            "X-NSONE-Key": self._config.getAPIKey(),
+        }
+
+    def _make_headers(self):
+        # a copy, as transports and callers may add to it
+        return dict(self._config.memoize("headers", self._base_headers))
+
+    def _download(self, path, dest, params=None):
+        """
+        GET a resource and write its raw body to the file object `dest` in
+        chunks as it arrives, without decoding it. Returns the number of
+        bytes written (or a Deferred or coroutine resolving to it).
+        """
+        return self._transport.download(
+            "GET",
+            self._make_url(path),
+            dest,
+            headers=self._make_headers(),
+            params=params,
+        )
+
+    def _iter_request(self, type, path, key=None, params=None):
+        """
+        Request a paginated resource, returning an iterator over its items.
+        Pages are fetched as the items are consumed and, where the transport
+        supports it, decoded incrementally, so memory use is bounded by an
+        item rather than the whole result. With the asyncio and Twisted
+        transports this is an asynchronous iterator, for use with `async
+        for` (with Twisted, in a coroutine run by `ensureDeferred`).
+
+        :param str key: member of each page holding its items, or None if \
+            each page is a list of items
+        """
+        return self._transport.iter_items(
+            type,
+            self._make_url(path),
+            key,
+            headers=self._make_headers(),
+            params=params,
+        )
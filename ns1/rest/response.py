@@ -0,0 +1,101 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+from ns1.rest.errors import ResourceException
+
+
+class LazyResponse(object):
+    """
+    A response whose body is decoded only when its content is first used.
+    Indexing, iterating over, or calling the methods of a LazyResponse act
+    on the decoded JSON, so it mostly stands in for the dict or list that
+    send() would otherwise return, while writes whose responses are never
+    looked at pay nothing to decode them.
+
+    Transports return these when the "lazy_responses" config setting is on.
+    """
+
+    def __init__(
+        self, status, headers, body, rate_limit, codec, response=None
+    ):
+        """
+        :param int status: HTTP status of the response
+        :param headers: response headers, as the transport represents them
+        :param bytes body: raw response body
+        :param dict rate_limit: rate limiting headers of the response
+        :param codec: JSON codec to decode the body with
+        :param response: the transport's own response object
+        """
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.rate_limit = rate_limit
+        self._codec = codec
+        self._response = response
+        self._decoded = False
+        self._data = None
+
+    @property
+    def decoded(self):
+        return self._decoded
+
+    @property
+    def data(self):
+        """
+        The decoded body, or None if it was empty.
+        """
+        if not self._decoded:
+            if self.body:
+                try:
+                    self._data = self._codec.loads(self.body)
+                except ValueError:
+                    raise ResourceException(
+                        "invalid json in response",
+                        self._response,
+                        self.body,
+                        self._codec,
+                    )
+            self._decoded = True
+        return self._data
+
+    def __getattr__(self, name):
+        # only reached for names we don't define, e.g. dict or list methods
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.data, name)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __contains__(self, item):
+        return item in self.data
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __bool__(self):
+        return bool(self.data)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyResponse):
+            other = other.data
+        return self.data == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "<LazyResponse status=%s data=%r>" % (self.status, self.data)
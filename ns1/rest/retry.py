@@ -0,0 +1,96 @@
+"""
+Opt-in retries for requests that fail in ways worth trying again: 429s, which
+the API rejected without acting on, and, for idempotent methods, transient 5xx
+responses and connection errors.
+
+Retries back off exponentially with jitter. After a 429, the backoff starts
+from the time the API takes to replenish a token, as advertised in the rate
+limiting headers, rather than from the fixed "retry_backoff".
+
+To stop a degraded API from multiplying our request volume, retries draw from
+a budget: each request adds a fraction ("retry_budget") of a retry to it, each
+retry takes a whole one, and it is capped so that only a short burst of
+retries can be saved up. Once the budget is spent, failures are raised (or
+passed to the errback) as if retries were disabled.
+"""
+
+import logging
+import random
+import threading
+
+LOG = logging.getLogger(__name__)
+
+
+class RetryPolicy(object):
+    IDEMPOTENT_METHODS = frozenset(["GET", "PUT", "DELETE"])
+    TRANSIENT_STATUSES = frozenset([500, 502, 503, 504])
+
+    def __init__(
+        self,
+        retries,
+        backoff=0.5,
+        max_backoff=30.0,
+        budget_ratio=0.1,
+        max_budget=10,
+    ):
+        """
+        :param int retries: maximum number of retries per request
+        :param float backoff: initial backoff in seconds, doubled per retry
+        :param float max_backoff: longest backoff, in seconds
+        :param float budget_ratio: retries earned by each request
+        :param int max_budget: most retries that can be saved up
+        """
+        self._retries = retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._budget_ratio = budget_ratio
+        self._max_budget = max_budget
+        self._budget = float(max_budget)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """
+        Record a new request, earning a fraction of a retry.
+        """
+        with self._lock:
+            self._budget = min(
+                self._max_budget, self._budget + self._budget_ratio
+            )
+
+    def delay(self, method, attempt, status=None, rl=None):
+        """
+        Decide whether to retry a failed request.
+
+        :param str method: HTTP method of the request
+        :param int attempt: number of retries already made
+        :param int status: response status, or None for a connection error
+        :param dict rl: rate limiting headers of the response, if any
+        :return: seconds to wait before retrying, or None to give up
+        """
+        if status == 429:
+            base = self._backoff
+            if rl is not None:
+                base = rl["period"] / float(max(rl["limit"], 1))
+        elif status is not None and status not in self.TRANSIENT_STATUSES:
+            return None
+        elif method not in self.IDEMPOTENT_METHODS:
+            return None
+        else:
+            base = self._backoff
+
+        if attempt >= self._retries:
+            return None
+        with self._lock:
+            if self._budget < 1:
+                LOG.debug("retry budget exhausted, not retrying")
+                return None
+            self._budget -= 1
+
+        wait = min(self._max_backoff, base * 2**attempt)
+        wait = wait / 2 + random.uniform(0, wait / 2)
+        LOG.debug(
+            "retry {} of {} for {} after {}: waiting for: {}s".format(
+                attempt + 1, self._retries, method, status, wait
+            )
+        )
+        return wait
@@ -39,6 +39,23 @@ class Stats(resource.BaseResource):
         errback=None,
         **kwargs
     ):
+        return self._make_request(
+            "GET",
+            self._usage_url(zone, domain, type, kwargs),
+            callback=callback,
+            errback=errback,
+            pagination_handler=stats_usage_pagination,
+        )
+
+    def iter_usage(self, zone=None, domain=None, type=None, **kwargs):
+        """
+        Iterate over usage statistics, fetching one page at a time.
+        """
+        return self._iter_request(
+            "GET", self._usage_url(zone, domain, type, kwargs)
+        )
+
+    def _usage_url(self, zone, domain, type, kwargs):
         url = ""
 
         if zone is None:
@@ -56,13 +73,7 @@ class Stats(resource.BaseResource):
             if f in kwargs:
                 args[f] = bool(kwargs[f])
 
-        return self._make_request(
-            "GET",
-            url + ("?" + urlencode(args) if args else ""),
-            callback=callback,
-            errback=errback,
-            pagination_handler=stats_usage_pagination,
-        )
+        return url + ("?" + urlencode(args) if args else "")
 
 
 # successive pages just extend the usage list
@@ -0,0 +1,147 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+"""
+Incremental decoding of large JSON responses.
+
+A zone retrieve returns one object whose "records" list may hold hundreds of
+thousands of records, and list endpoints return one big array. Rather than
+buffer the whole body and decode it in one go, `iter_json_array` reads the
+body chunk by chunk and decodes one array element at a time, so memory use is
+bounded by a chunk plus one element rather than the whole document.
+
+Each element is still decoded by the stdlib's C decoder; we only walk the
+structure around the array ourselves.
+"""
+
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# characters which may continue a number, or "" for the end of the buffer
+_NUMBER_TAIL = frozenset(["", ".", "e", "E", "+", "-"] + list("0123456789"))
+_DECODER = json.JSONDecoder()
+
+
+class _JSONStream(object):
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        """
+        Append the next chunk to the buffer, dropping what has been
+        consumed. Returns False once the body is exhausted.
+        """
+        if self._eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            text = self._decoder.decode(b"", True)
+        elif isinstance(chunk, str):
+            text = chunk
+        else:
+            text = self._decoder.decode(chunk)
+        pos = self._pos
+        self._buf = self._buf[pos:] + text
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """
+        Skip whitespace and return the next character, or "" at the end.
+        """
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(
+                "expected one of %r, found %r" % (chars, c or "end of body")
+            )
+        self._pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except ValueError:
+                # most likely the value is cut short by the end of the buffer
+                if not self._fill():
+                    raise
+                continue
+            # a number at the end of the buffer may be cut short too, e.g.
+            # "12" of "12.5e3", which decodes but leaves "." behind
+            following = end + 1
+            if self._eof or self._buf[end:following] not in _NUMBER_TAIL:
+                self._pos = end
+                return value
+            self._fill()
+
+    def array(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+
+def iter_json_array(chunks, key=None, rest=None):
+    """
+    Yield the elements of a JSON array as they are decoded from `chunks`.
+
+    :param chunks: iterable of bytes (or str) making up a JSON document
+    :param str key: if given, the document is an object, and the array is \
+        its `key` member; otherwise, the document is the array itself
+    :param dict rest: if given, filled with the object's other members, as \
+        they are decoded
+    """
+    stream = _JSONStream(chunks)
+    if not stream.peek():
+        # no body at all
+        return
+    if key is None:
+        for item in stream.array():
+            yield item
+    else:
+        for item in _members(stream, key, rest):
+            yield item
+    # read to the end, so that the connection can be reused
+    if stream.peek():
+        raise ValueError("extra data after JSON document")
+
+
+def _members(stream, key, rest):
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.expect("}")
+        return
+    while True:
+        name = stream.value()
+        stream.expect(":")
+        if name == key and stream.peek() == "[":
+            for item in stream.array():
+                yield item
+        else:
+            value = stream.value()
+            if rest is not None:
+                rest[name] = value
+        if stream.expect(",}") == "}":
+            return
@@ -3,12 +3,36 @@
 #
 # License under The MIT License (MIT). See LICENSE in project root.
 #
+"""
+Transports are imported the first time they are asked for by name (see
+`TransportBase.REGISTRY`), so that importing the SDK doesn't import every
+HTTP library it supports.
+"""
 
-# flake8: noqa
-from ns1.rest.transport.basic import *
+import importlib
 
-# flake8: noqa
-from ns1.rest.transport.requests import *
+from ns1.rest.transport.base import BUILTIN_TRANSPORTS
 
-# flake8: noqa
-from ns1.rest.transport.twisted import *
+# names once star-imported here from the transport modules, and the newer
+# built-in transports, by the transport defining them
+_EXPORTS = {
+    "BasicTransport": "basic",
+    "RequestsTransport": "requests",
+    "have_requests": "requests",
+    "TwistedTransport": "twisted",
+    "have_twisted": "twisted",
+    "StringProducer": "twisted",
+    "AsyncioTransport": "asyncio",
+    "LoopbackTransport": "loopback",
+}
+
+
+def __getattr__(name):
+    # import only the module defining a name, on first access
+    transport = _EXPORTS.get(name)
+    if transport is None:
+        raise AttributeError(
+            "module %r has no attribute %r" % (__name__, name)
+        )
+    module = importlib.import_module(BUILTIN_TRANSPORTS[transport])
+    return getattr(module, name)
@@ -0,0 +1,477 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+from __future__ import absolute_import
+
+import asyncio
+import ssl
+
+from urllib.parse import urlsplit
+
+from ns1.helpers import get_next_page
+from ns1.rest.compression import ACCEPT_ENCODING, get_decoder
+from ns1.rest.multipart import MultipartBody
+from ns1.rest.transport.base import ErrbackCalled, Sink, TransportBase
+from ns1.rest.errors import (
+    ResourceException,
+    RateLimitException,
+    AuthException,
+)
+
+
+class AsyncioResponse(object):
+    """
+    The parts of an HTTP response we hand to errbacks and exceptions.
+    """
+
+    def __init__(self, method, url, status, reason, headers, body):
+        self.method = method
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    @property
+    def text(self):
+        return self.body.decode("utf-8", "replace")
+
+    def __repr__(self):
+        return "<AsyncioResponse %s %s %s>" % (
+            self.method,
+            self.url,
+            self.status,
+        )
+
+
+class AsyncioTransport(TransportBase):
+    """
+    Transport for asyncio applications. `send` returns a coroutine, which
+    resolves to the (optionally callback-processed) response body.
+
+    Requests are made over a pool of persistent HTTP/1.1 connections per
+    host, and the number of requests in flight at once is bounded by the
+    "asyncio_concurrency" config setting.
+    """
+
+    DEFAULT_CONCURRENCY = 100
+    DEFAULT_POOL_SIZE = 10
+
+    def __init__(self, config):
+        TransportBase.__init__(self, config, self.__module__)
+        self._timeout = self._config.get("timeout", None)
+        if isinstance(self._timeout, (list, tuple)):
+            self._timeout = sum(self._timeout)
+        self._concurrency = self._config.get(
+            "asyncio_concurrency", self.DEFAULT_CONCURRENCY
+        )
+        self._pool_size = self._config.get("pool_size", self.DEFAULT_POOL_SIZE)
+        self._ssl_context = ssl.create_default_context()
+        if not self._verify:
+            self._ssl_context.check_hostname = False
+            self._ssl_context.verify_mode = ssl.CERT_NONE
+        # connections and the semaphore belong to the loop they were made on
+        self._loop = None
+        self._semaphore = None
+        self._pool = {}
+
+    def _bindLoop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # streams on the old loop can't be closed from this one, and
+            # that loop is usually closed already; drop them with it
+            self._pool = {}
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+
+    def close(self):
+        if self._loop is None or self._loop.is_closed():
+            self._pool = {}
+            return
+        for connections in self._pool.values():
+            for _, writer in connections:
+                writer.close()
+        self._pool = {}
+
+    async def _connect(self, scheme, host, port):
+        connections = self._pool.get((scheme, host, port))
+        while connections:
+            reader, writer = connections.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(
+            host,
+            port,
+            ssl=self._ssl_context if scheme == "https" else None,
+        )
+        return reader, writer, False
+
+    def _release(self, key, reader, writer):
+        connections = self._pool.setdefault(key, [])
+        if len(connections) < self._pool_size:
+            connections.append((reader, writer))
+        else:
+            writer.close()
+
+    async def _copy(self, reader, size, write):
+        while size:
+            chunk = await reader.read(min(size, self.CHUNK_SIZE))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", size)
+            write(chunk)
+            size -= len(chunk)
+
+    async def _readBody(self, reader, headers, dest=None):
+        """
+        Read a response body, returning it and whether the connection can
+        be reused. With `dest`, the body is written to it as it arrives
+        instead, and an empty body is returned. Compressed bodies are
+        decoded as they arrive.
+        """
+        chunks = []
+        write = chunks.append if dest is None else dest.write
+        decoder = get_decoder(headers.get("content-encoding"))
+        if decoder is not None:
+            emit = write
+
+            def write(chunk):
+                chunk = decoder.decompress(chunk)
+                if chunk:
+                    emit(chunk)
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    # skip trailers
+                    while (await reader.readline()) not in (b"\r\n", b""):
+                        pass
+                    break
+                await self._copy(reader, size, write)
+                await reader.readexactly(2)
+            reusable = True
+        elif "content-length" in headers:
+            await self._copy(reader, int(headers["content-length"]), write)
+            reusable = True
+        else:
+            while True:
+                chunk = await reader.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                write(chunk)
+            reusable = False
+        if decoder is not None:
+            rest = decoder.flush()
+            if rest:
+                emit(rest)
+        return b"".join(chunks), reusable
+
+    async def _exchange(
+        self, reader, writer, request, body, method, dest=None
+    ):
+        writer.write(request)
+        if isinstance(body, MultipartBody):
+            chunked = body.length is None
+            for chunk in body:
+                if chunked:
+                    chunk = b"%x\r\n%s\r\n" % (len(chunk), chunk)
+                writer.write(chunk)
+                await writer.drain()
+            if chunked:
+                writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        _, status, reason = (
+            status_line.decode("latin-1").rstrip("\r\n").split(" ", 2) + [""]
+        )[:3]
+        status = int(status)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            k, v = line.decode("latin-1").split(":", 1)
+            headers[k.strip().lower()] = v.strip()
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body, reusable = b"", True
+        else:
+            if not 200 <= status < 300:
+                # error bodies are read for the exception
+                dest = None
+            body, reusable = await self._readBody(reader, headers, dest)
+        if headers.get("connection", "").lower() == "close":
+            reusable = False
+        return status, reason, headers, body, reusable
+
+    async def _request(self, method, url, headers, body, dest=None):
+        parts = urlsplit(url)
+        scheme = parts.scheme or "https"
+        host = parts.hostname
+        port = parts.port or (443 if scheme == "https" else 80)
+        target = parts.path or "/"
+        if parts.query:
+            target = "%s?%s" % (target, parts.query)
+
+        lines = [
+            "%s %s HTTP/1.1" % (method, target),
+            "Host: %s" % parts.netloc,
+            "Connection: keep-alive",
+        ]
+        if not any(k.lower() == "accept-encoding" for k in headers or {}):
+            lines.append("Accept-Encoding: %s" % ACCEPT_ENCODING)
+        if not isinstance(body, MultipartBody):
+            lines.append("Content-Length: %d" % len(body or b""))
+        elif body.length is None:
+            lines.append("Transfer-Encoding: chunked")
+        else:
+            lines.append("Content-Length: %d" % body.length)
+        lines.extend("%s: %s" % (k, v) for k, v in (headers or {}).items())
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        if not isinstance(body, MultipartBody) and body:
+            request += body
+
+        key = (scheme, host, port)
+        reader, writer, reused = await self._connect(scheme, host, port)
+        try:
+            result = await self._exchange(
+                reader, writer, request, body, method, dest
+            )
+        except (ConnectionError, asyncio.IncompleteReadError):
+            writer.close()
+            if not reused or (dest is not None and dest.written):
+                raise
+            if isinstance(body, MultipartBody):
+                # the files have been consumed and can't be sent again
+                raise
+            # the server dropped an idle pooled connection; try a fresh one
+            reader, writer, _ = await self._connect(scheme, host, port)
+            try:
+                result = await self._exchange(
+                    reader, writer, request, body, method, dest
+                )
+            except BaseException:
+                writer.close()
+                raise
+        except BaseException:
+            writer.close()
+            raise
+        status, reason, resp_headers, resp_body, reusable = result
+        if reusable:
+            self._release(key, reader, writer)
+        else:
+            writer.close()
+        return AsyncioResponse(
+            method, url, status, reason, resp_headers, resp_body
+        )
+
+    async def _send(
+        self,
+        method,
+        url,
+        headers,
+        body,
+        errback,
+        skip_json_parsing,
+        dest=None,
+    ):
+        bucket = self._rateLimitBucket(method, url)
+        delay = self._rateLimitDelayBefore(bucket)
+        if delay:
+            await asyncio.sleep(delay)
+        # uploads stream their files, so they can only be sent once
+        retryable = not isinstance(body, MultipartBody)
+        if self._retry is not None and retryable:
+            self._retry.deposit()
+        attempt = 0
+        while True:
+            resp = None
+            async with self._semaphore:
+                try:
+                    resp = await asyncio.wait_for(
+                        self._request(method, url, headers, body, dest),
+                        self._timeout,
+                    )
+                except (
+                    OSError,
+                    asyncio.IncompleteReadError,
+                    asyncio.TimeoutError,
+                ) as e:
+                    delay = None
+                    if retryable and (dest is None or not dest.written):
+                        delay = self._retryDelay(method, attempt)
+                    if delay is None:
+                        if errback:
+                            raise ErrbackCalled(errback(e))
+                        raise ResourceException("connection error: %s" % e)
+            if resp is not None:
+                if not retryable:
+                    break
+                delay = self._retryDelay(
+                    method,
+                    attempt,
+                    resp.status,
+                    self._rateLimitHeaders(resp.headers),
+                )
+                if delay is None:
+                    break
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        rate_limit_headers = self._rateLimitHeaders(resp.headers)
+        delay = self._rateLimitDelayAfter(bucket, rate_limit_headers)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if resp.status < 200 or resp.status >= 300:
+            if errback:
+                raise ErrbackCalled(errback(resp))
+            if resp.status == 429:
+                raise RateLimitException(
+                    "rate limit exceeded",
+                    resp,
+                    resp.text,
+                    by=rate_limit_headers["by"],
+                    limit=rate_limit_headers["limit"],
+                    period=rate_limit_headers["period"],
+                    remaining=rate_limit_headers["remaining"],
+                    codec=self._codec,
+                )
+            elif resp.status == 401:
+                raise AuthException(
+                    "unauthorized", resp, resp.text, self._codec
+                )
+            else:
+                raise ResourceException(
+                    "server error", resp, resp.text, self._codec
+                )
+
+        if dest is not None:
+            return resp.headers, dest.written
+        if skip_json_parsing and resp.body:
+            return resp.headers, resp.text
+        if self._lazy:
+            return resp.headers, self._lazyResponse(
+                resp.status, resp.headers, resp.body, rate_limit_headers, resp
+            )
+        if not resp.body:
+            return resp.headers, None
+        try:
+            return resp.headers, self._codec.loads(resp.body)
+        except ValueError:
+            if errback:
+                raise ErrbackCalled(errback(resp))
+            raise ResourceException(
+                "invalid json in response", resp, resp.text
+            )
+
+    async def send(
+        self,
+        method,
+        url,
+        headers=None,
+        data=None,
+        files=None,
+        params=None,
+        callback=None,
+        errback=None,
+        pagination_handler=None,
+        skip_json_parsing=False,
+    ):
+        self._bindLoop()
+        headers = dict(headers or {})
+        self._logHeaders(headers)
+        self._log.debug("%s %s %s" % (method, url, data))
+
+        url = self._withParams(url, params)
+
+        # later pages are fetched with a plain GET of their link
+        page_headers = headers
+        body = data
+        if files:
+            headers, body = self._multipart(headers, files)
+        else:
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            headers, body = self._compressBody(headers, body)
+
+        try:
+            resp_headers, jsonOut = await self._send(
+                method, url, headers, body, errback, skip_json_parsing
+            )
+            if self._follow_pagination and pagination_handler is not None:
+                next_page = get_next_page(resp_headers or {})
+                while next_page is not None:
+                    self._log.debug("following pagination to: %s" % next_page)
+                    next_headers, next_json = await self._send(
+                        "GET",
+                        next_page,
+                        page_headers,
+                        None,
+                        errback,
+                        skip_json_parsing,
+                    )
+                    jsonOut = pagination_handler(jsonOut, next_json)
+                    next_page = get_next_page(next_headers or {})
+        except ErrbackCalled as e:
+            return e.result
+        finally:
+            if isinstance(body, MultipartBody):
+                body.close()
+
+        if callback:
+            return callback(jsonOut)
+        return jsonOut
+
+    async def download(self, method, url, dest, headers=None, params=None):
+        """
+        Write the raw body of a response to the file object `dest` as it
+        arrives, returning the number of bytes written. Writes to `dest`
+        are not awaited, so a slow file blocks the loop while it writes.
+        """
+        self._bindLoop()
+        headers = dict(headers or {})
+        self._logHeaders(headers)
+        url = self._withParams(url, params)
+        resp_headers, written = await self._send(
+            method, url, headers, None, None, False, Sink(dest)
+        )
+        url = get_next_page(resp_headers)
+        while url is not None:
+            self._log.debug("following pagination to: %s" % url)
+            dest.write(self.PAGE_SEPARATOR)
+            resp_headers, page = await self._send(
+                method, url, headers, None, None, False, Sink(dest)
+            )
+            written += len(self.PAGE_SEPARATOR) + page
+            url = get_next_page(resp_headers)
+        return written
+
+    async def iter_pages(
+        self, method, url, headers=None, data=None, params=None
+    ):
+        """
+        Asynchronously iterate over the pages of a paginated response, for
+        use with `async for`.
+        """
+        self._bindLoop()
+        headers = dict(headers or {})
+        self._logHeaders(headers)
+        url = self._withParams(url, params)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        while url is not None:
+            resp_headers, jsonOut = await self._send(
+                method, url, headers, data, None, False
+            )
+            yield jsonOut
+            url = get_next_page(resp_headers)
+            if url is not None:
+                self._log.debug("following pagination to: %s" % url)
+
+
+TransportBase.REGISTRY["asyncio"] = AsyncioTransport
@@ -4,20 +4,164 @@
 # License under The MIT License (MIT). See LICENSE in project root.
 #
 import copy
+import importlib
+import json
 import logging
+import queue
+import threading
+import time
+
+from urllib.parse import urlencode
+
+from ns1.helpers import get_next_page
+from ns1.rest.compression import compress_body
+from ns1.rest.errors import ResourceException
+from ns1.rest.multipart import MultipartBody
+from ns1.rest.rate_limiting import rate_limit_bucket
+from ns1.rest.response import LazyResponse
+from ns1.rest.streaming import iter_json_array
+
+# modules defining the transports which ship with the SDK, by name. each
+# registers its transport when imported.
+BUILTIN_TRANSPORTS = {
+    "basic": "ns1.rest.transport.basic",
+    "requests": "ns1.rest.transport.requests",
+    "twisted": "ns1.rest.transport.twisted",
+    "asyncio": "ns1.rest.transport.asyncio",
+    "loopback": "ns1.rest.transport.loopback",
+}
+
+
+class TransportRegistry(dict):
+    """
+    Transport classes by name. Built-in transports are imported the first
+    time they are looked up, so that only the HTTP libraries actually used
+    are imported. Other transports are registered by assignment, as usual.
+    """
+
+    def _load(self, name):
+        module = BUILTIN_TRANSPORTS.get(name)
+        if module is not None and not dict.__contains__(self, name):
+            importlib.import_module(module)
+
+    def __missing__(self, name):
+        self._load(name)
+        if dict.__contains__(self, name):
+            return dict.__getitem__(self, name)
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        self._load(name)
+        return dict.__contains__(self, name)
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+
+# transports are kept on the config they are built from, one per name, with
+# a fingerprint of the settings they consumed, so that changing the config
+# (or switching keys) yields a new transport rather than a stale one, and
+# they are collected along with the config.
+_TRANSPORTS_LOCK = threading.Lock()
+
+
+def _fingerprint(name, config):
+    return (
+        name,
+        config.getCurrentKeyID(),
+        json.dumps(config._data, sort_keys=True, default=repr),
+    )
+
+
+def get_transport(name, config):
+    """
+    Return the transport registered as `name` for the given config, creating
+    it on first use. Resources built from the same config share a single
+    transport (and with it, its pool of keep-alive connections). A transport
+    built from settings which have since changed is closed and replaced.
+
+    :param str name: name of a transport in TransportBase.REGISTRY
+    :param ns1.config.Config config: config the transport is built from
+    :rtype: TransportBase
+    """
+    key = _fingerprint(name, config)
+    stale = None
+    with _TRANSPORTS_LOCK:
+        fingerprint, transport = config._transports.get(name, (None, None))
+        if fingerprint != key:
+            stale = transport
+            transport = TransportBase.REGISTRY[name](config)
+            config._transports[name] = (key, transport)
+    if stale is not None:
+        stale.close()
+    return transport
+
+
+def close_transports(config):
+    """
+    Close and forget every transport shared by resources built from the
+    given config. Resources created afterwards get fresh transports.
+
+    :param ns1.config.Config config: config whose transports to close
+    """
+    with _TRANSPORTS_LOCK:
+        transports = list(config._transports.values())
+        config._transports.clear()
+    for _, transport in transports:
+        transport.close()
+
+
+class Sink(object):
+    """
+    Writes a response body to a file object as it arrives, counting the
+    bytes written, so that a download interrupted partway is not retried.
+    """
+
+    def __init__(self, dest):
+        self._dest = dest
+        self.written = 0
+
+    def write(self, chunk):
+        self._dest.write(chunk)
+        self.written += len(chunk)
+
+
+class ErrbackCalled(Exception):
+    """
+    Raised inside a transport once a failed request has been handed to the
+    caller's errback, so that `send` can skip its callback and pagination
+    and return `result`, the errback's return value.
+    """
+
+    def __init__(self, result):
+        Exception.__init__(self, result)
+        self.result = result
 
 
 class TransportBase(object):
-    REGISTRY = {}
+    REGISTRY = TransportRegistry()
+    # bytes read at a time from streamed response bodies
+    CHUNK_SIZE = 64 * 1024
+    # written between the pages of a paginated download
+    PAGE_SEPARATOR = b"\n"
 
     def __init__(self, config, module):
         self._config = config
         self._log = logging.getLogger(module)
+        self._codec = self._config.getJSONCodec()
         self._verify = not self._config.getKeyConfig().get(
             "ignore-ssl-errors", self._config.get("ignore-ssl-errors", False)
         )
         self._rate_limit_func = self._config.getRateLimitingFunc()
+        self._rate_limit_by_bucket = self._config.get(
+            "rate_limit_by_bucket", False
+        )
+        self._rate_limiter = self._config.getRateLimiter()
+        self._retry = self._config.getRetryPolicy()
         self._follow_pagination = self._config.get("follow_pagination", False)
+        self._prefetch = self._config.get("pagination_prefetch", 0)
+        self._lazy = self._config.get("lazy_responses", False)
+        self._compress_over = self._config.get("compress_requests_over", None)
 
     def _logHeaders(self, headers):
         if self._config["verbosity"] > 0:
@@ -25,6 +169,243 @@ class TransportBase(object):
             argcopy["X-NSONE-Key"] = "<redacted>"
             self._log.debug(argcopy)
 
+    def _withParams(self, url, params):
+        """
+        `url` with the query parameters `params` added to it.
+        """
+        if not params:
+            return url
+        sep = "&" if "?" in url else "?"
+        return "%s%s%s" % (url, sep, urlencode(params))
+
+    def _header(self, headers, name, default=None):
+        """
+        The value of the response header `name`, given lowercase, from
+        `headers` as the transport's HTTP library returns them.
+        """
+        return headers.get(name, default)
+
+    def _rateLimitHeaders(self, headers):
+        return {
+            "by": self._header(headers, "x-ratelimit-by", "customer"),
+            "limit": int(self._header(headers, "x-ratelimit-limit", 10)),
+            "period": int(self._header(headers, "x-ratelimit-period", 1)),
+            "remaining": int(
+                self._header(headers, "x-ratelimit-remaining", 100)
+            ),
+        }
+
+    def _rateLimitBucket(self, method, url):
+        if not self._rate_limit_by_bucket:
+            return None
+        return rate_limit_bucket(method, url, self._config["api_version"])
+
+    def _rateLimitDelayBefore(self, bucket):
+        """
+        Seconds to wait before sending a request drawing from `bucket`.
+        """
+        if self._rate_limiter is None:
+            return 0
+        return self._rate_limiter.delay(bucket)
+
+    def _rateLimitDelayAfter(self, bucket, rate_limit_headers):
+        """
+        Seconds to wait after a response from `bucket`. When rate limiting
+        by bucket, the headers are recorded and the wait is deferred to the
+        next request drawing from the same bucket.
+        """
+        if self._rate_limiter is None:
+            return self._rate_limit_func(rate_limit_headers)
+        self._rate_limiter.update(bucket, rate_limit_headers)
+        return 0
+
+    def _waitBefore(self, bucket):
+        delay = self._rateLimitDelayBefore(bucket)
+        if delay:
+            time.sleep(delay)
+
+    def _rateLimit(self, rate_limit_headers, bucket=None):
+        """
+        Ask the rate limit strategy how long to wait after a response, and
+        block for that long. Asynchronous transports wait on their event
+        loop instead.
+        """
+        delay = self._rateLimitDelayAfter(bucket, rate_limit_headers)
+        if delay:
+            time.sleep(delay)
+
+    def _retryDelay(self, method, attempt, status=None, rl=None):
+        """
+        Seconds to wait before retrying a failed request, or None if it
+        should not be retried.
+        """
+        if self._retry is None:
+            return None
+        return self._retry.delay(method, attempt, status, rl)
+
+    def _withRetries(
+        self,
+        method,
+        request,
+        rateLimitHeaders,
+        errors=(),
+        retryable=True,
+        discard=None,
+    ):
+        """
+        Call `request` until it returns a response worth keeping, sleeping
+        between attempts as the retry policy dictates. `rateLimitHeaders`
+        maps a response to its status and rate limiting headers, and
+        `errors` are the connection errors worth retrying. Requests whose
+        body cannot be replayed (e.g. file uploads) are not `retryable`.
+        Responses given up on are passed to `discard`, if given, so that
+        streamed responses release their connection.
+        """
+        if self._retry is None or not retryable:
+            return request()
+        self._retry.deposit()
+        attempt = 0
+        while True:
+            try:
+                resp = request()
+            except errors:
+                delay = self._retryDelay(method, attempt)
+                if delay is None:
+                    raise
+            else:
+                status, rl = rateLimitHeaders(resp)
+                delay = self._retryDelay(method, attempt, status, rl)
+                if delay is None:
+                    return resp
+                if discard is not None:
+                    discard(resp)
+            time.sleep(delay)
+            attempt += 1
+
+    def _downloadPages(self, download, url, dest):
+        """
+        Write the pages of a paginated response to `dest` one after the
+        other, starting from `url` and following Link headers. `download`
+        writes the page at a url to `dest`, returning a (headers, bytes
+        written) pair.
+        """
+        headers, written = download(url)
+        url = get_next_page(headers)
+        while url is not None:
+            self._log.debug("following pagination to: %s" % url)
+            dest.write(self.PAGE_SEPARATOR)
+            headers, page = download(url)
+            written += len(self.PAGE_SEPARATOR) + page
+            url = get_next_page(headers)
+        return written
+
+    def _followPages(self, fetch, url):
+        """
+        Yield the pages of a paginated response, starting from `url` and
+        following Link headers. `fetch` maps a url to a (headers, json)
+        pair.
+
+        With the "pagination_prefetch" config setting, pages are fetched by
+        a background thread which reads up to that many pages ahead of the
+        consumer, overlapping transfer of the next page with processing of
+        the current one.
+        """
+        if not self._prefetch:
+            while url is not None:
+                self._log.debug("following pagination to: %s" % url)
+                headers, page = fetch(url)
+                yield page
+                url = get_next_page(headers)
+            return
+
+        pages = queue.Queue(maxsize=self._prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def fetchAhead(url):
+            try:
+                while url is not None and not stop.is_set():
+                    self._log.debug("prefetching page: %s" % url)
+                    headers, page = fetch(url)
+                    url = get_next_page(headers)
+                    pages.put((page, None))
+            except Exception as e:
+                pages.put((None, e))
+            else:
+                pages.put((done, None))
+
+        worker = threading.Thread(target=fetchAhead, args=(url,))
+        worker.daemon = True
+        worker.start()
+        try:
+            while True:
+                page, error = pages.get()
+                if error is not None:
+                    raise error
+                if page is done:
+                    return
+                yield page
+        finally:
+            # unblock the worker if we stopped consuming early
+            stop.set()
+            while worker.is_alive():
+                try:
+                    pages.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+    def _multipart(self, headers, files):
+        """
+        Build a streaming body for a file upload, returning a copy of
+        `headers` with its Content-Type, and the body.
+        """
+        body = MultipartBody(files)
+        headers = dict(headers or {})
+        headers["Content-Type"] = body.content_type
+        return headers, body
+
+    def _compressBody(self, headers, data):
+        """
+        Gzip an encoded request body if it is at least as big as the
+        "compress_requests_over" config setting, returning new headers and
+        body.
+        """
+        return compress_body(headers, data, self._compress_over)
+
+    def _lazyResponse(self, status, headers, body, rate_limit, response):
+        """
+        Wrap a successful response whose body is to be decoded on demand,
+        with the "lazy_responses" config setting.
+        """
+        return LazyResponse(
+            status, headers, body, rate_limit, self._codec, response
+        )
+
+    def _streamItems(self, stream, url, key):
+        """
+        Yield the items of a paginated response as they are decoded from
+        each page's body, starting from `url` and following Link headers.
+        `stream` maps a url to a (headers, chunks) pair, where chunks is an
+        iterable over the body with a close() method.
+        """
+        while url is not None:
+            self._log.debug("streaming items from: %s" % url)
+            headers, chunks = stream(url)
+            try:
+                for item in iter_json_array(chunks, key):
+                    yield item
+            except ValueError as e:
+                raise ResourceException("invalid json in response: %s" % e)
+            finally:
+                chunks.close()
+            url = get_next_page(headers)
+
+    def close(self):
+        """
+        Release any connections held by this transport.
+        """
+        pass
+
     def send(
         self,
         method,
@@ -37,3 +418,53 @@ class TransportBase(object):
         errback=None,
     ):
         raise NotImplementedError()
+
+    def iter_pages(self, method, url, headers=None, data=None, params=None):
+        """
+        Iterate over the pages of a paginated response, fetching each page
+        only when the previous one has been consumed, whatever the
+        follow_pagination setting.
+        """
+        raise NotImplementedError()
+
+    def download(self, method, url, dest, headers=None, params=None):
+        """
+        Write the raw body of a response to the file object `dest` in
+        chunks, as it arrives, without decoding it or holding all of it in
+        memory. Returns the number of bytes written, or for asynchronous
+        transports a Deferred or coroutine resolving to it.
+
+        Paginated responses are followed, whatever the follow_pagination
+        setting: their pages are written one after the other, separated by
+        `PAGE_SEPARATOR`.
+        """
+        raise NotImplementedError()
+
+    def iter_items(self, method, url, key=None, headers=None, params=None):
+        """
+        Iterate over the items of a paginated response, whatever the
+        follow_pagination setting. The items are the `key` member of each
+        page, or each page itself if `key` is None.
+
+        Transports which can decode a body as it arrives override this to
+        do so, so that memory use is bounded by an item rather than a page.
+        Asynchronous transports return an asynchronous iterator.
+        """
+        pages = self.iter_pages(method, url, headers=headers, params=params)
+        if hasattr(pages, "__aiter__"):
+            return _aiter_items(pages, key)
+        return (item for page in pages for item in _items(page, key))
+
+
+def _items(page, key):
+    if not page:
+        return ()
+    if key is None:
+        return page
+    return page.get(key, ())
+
+
+async def _aiter_items(pages, key):
+    async for page in pages:
+        for item in _items(page, key):
+            yield item
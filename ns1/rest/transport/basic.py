@@ -6,6 +6,7 @@
 from __future__ import absolute_import
 
 from ns1.helpers import get_next_page
+from ns1.rest.compression import ACCEPT_ENCODING, decode_chunks, get_decoder
 from ns1.rest.transport.base import TransportBase
 from ns1.rest.errors import (
     ResourceException,
@@ -13,15 +14,340 @@ from ns1.rest.errors import (
     AuthException,
 )
 
-try:
-    from urllib.request import build_opener, Request, HTTPSHandler
-    from urllib.error import HTTPError
-except ImportError:
-    from urllib2 import build_opener, Request, HTTPSHandler
-    from urllib2 import HTTPError
-import json
+import base64
+import collections
+import http.client
 import socket
-import sys
+import ssl
+import threading
+import time
+
+from urllib.parse import unquote, urljoin, urlsplit
+from urllib.request import (
+    getproxies,
+    proxy_bypass,
+    proxy_bypass_environment,
+)
+
+
+class PersistentHTTPSConnection(http.client.HTTPSConnection):
+    """
+    HTTPSConnection that offers the pool's last TLS session for the host
+    when connecting, so reconnects can skip a full handshake.
+    """
+
+    def __init__(self, host, port, sessions, **kwargs):
+        http.client.HTTPSConnection.__init__(self, host, port, **kwargs)
+        self._sessions = sessions
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        server_hostname = self._tunnel_host or self.host
+        session = self._sessions.get(server_hostname)
+        try:
+            self.sock = self._context.wrap_socket(
+                self.sock, server_hostname=server_hostname, session=session
+            )
+        except ValueError:
+            # session no longer usable with this context; full handshake
+            self.sock = self._context.wrap_socket(
+                self.sock, server_hostname=server_hostname
+            )
+        if self.sock.session is not None:
+            self._sessions[server_hostname] = self.sock.session
+
+
+class StreamedBody(object):
+    """
+    The body of a response from a `ConnectionPool`, to be read in full,
+    iterated over in chunks, or copied to a file. Its connection goes back
+    to the pool once the body has been read to the end, and is closed if the
+    body is abandoned. Compressed bodies are decoded as they are read.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, pool, key, conn, resp):
+        self._pool = pool
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        try:
+            self._decoder = get_decoder(resp.getheader("Content-Encoding"))
+        except ValueError:
+            self.close()
+            raise
+
+    def _chunks(self):
+        while True:
+            chunk = self._resp.read(self.CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def __iter__(self):
+        chunks = self._chunks()
+        if self._decoder is not None:
+            chunks = decode_chunks(chunks, self._decoder)
+        try:
+            for chunk in chunks:
+                yield chunk
+        except BaseException:
+            self.close()
+            raise
+        self._release()
+
+    def read(self):
+        try:
+            data = self._resp.read()
+            if self._decoder is not None:
+                data = self._decoder.decompress(data)
+                data += self._decoder.flush()
+        except BaseException:
+            self.close()
+            raise
+        self._release()
+        return data
+
+    def copyTo(self, dest):
+        """
+        Write the body to the file object `dest` through a single reusable
+        buffer, returning the number of bytes written.
+        """
+        if self._decoder is not None:
+            written = 0
+            for chunk in self:
+                dest.write(chunk)
+                written += len(chunk)
+            return written
+        buf = bytearray(self.CHUNK_SIZE)
+        view = memoryview(buf)
+        written = 0
+        try:
+            while True:
+                n = self._resp.readinto(buf)
+                if not n:
+                    break
+                dest.write(view[:n])
+                written += n
+        except BaseException:
+            self.close()
+            raise
+        self._release()
+        return written
+
+    def _release(self):
+        if self._conn is None:
+            return
+        if self._resp.will_close:
+            self._conn.close()
+        else:
+            self._pool._put(self._key, self._conn)
+        self._conn = None
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class ConnectionPool(object):
+    """
+    A thread-safe pool of persistent HTTP(S) connections per host, sharing
+    one SSLContext, which asks for compressed responses. At most `maxsize`
+    idle connections are kept per host, and idle connections older than
+    `idle_timeout` seconds are closed instead of reused.
+
+    Like urllib, it goes through the proxies of the environment's
+    HTTP(S)_PROXY and NO_PROXY variables, tunnelling HTTPS with CONNECT,
+    and follows redirects.
+    """
+
+    # errors which mean a pooled connection was closed by the server while
+    # it sat idle, so the request can safely be retried on a new one
+    STALE_ERRORS = (
+        http.client.RemoteDisconnected,
+        http.client.BadStatusLine,
+        BrokenPipeError,
+        ConnectionResetError,
+    )
+
+    # redirects followed, and how many in a row, as urllib does
+    REDIRECTS = (301, 302, 303, 307, 308)
+    MAX_REDIRECTS = 10
+
+    def __init__(self, context, timeout, maxsize=10, idle_timeout=60):
+        self._context = context
+        self._timeout = timeout
+        self._maxsize = maxsize
+        self._idle_timeout = idle_timeout
+        self._idle = collections.defaultdict(collections.deque)
+        self._sessions = {}
+        self._proxies = getproxies()
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def _proxy(self, key):
+        """
+        The proxy to reach the host of `key` through, as a (host, port,
+        headers) tuple, or None to connect to it directly.
+        """
+        with self._lock:
+            if key in self._routes:
+                return self._routes[key]
+        scheme, host, _ = key
+        proxy = self._proxies.get(scheme)
+        if "no" in self._proxies:
+            # NO_PROXY, as read along with the proxies
+            bypass = proxy_bypass_environment(host, self._proxies)
+        else:
+            bypass = proxy_bypass(host)
+        if proxy and not bypass:
+            if "://" not in proxy:
+                proxy = "http://" + proxy
+            parts = urlsplit(proxy)
+            headers = {}
+            if parts.username:
+                credentials = "%s:%s" % (
+                    unquote(parts.username),
+                    unquote(parts.password or ""),
+                )
+                headers["Proxy-Authorization"] = "Basic %s" % (
+                    base64.b64encode(credentials.encode("utf-8")).decode()
+                )
+            proxy = (parts.hostname, parts.port, headers)
+        else:
+            proxy = None
+        with self._lock:
+            self._routes[key] = proxy
+        return proxy
+
+    def _new(self, scheme, host, port):
+        proxy = self._proxy((scheme, host, port))
+        if scheme == "http":
+            if proxy is not None:
+                host, port, _ = proxy
+            return http.client.HTTPConnection(
+                host, port, timeout=self._timeout
+            )
+        if proxy is None:
+            return PersistentHTTPSConnection(
+                host,
+                port,
+                self._sessions,
+                timeout=self._timeout,
+                context=self._context,
+            )
+        conn = PersistentHTTPSConnection(
+            proxy[0],
+            proxy[1],
+            self._sessions,
+            timeout=self._timeout,
+            context=self._context,
+        )
+        conn.set_tunnel(host, port, headers=proxy[2])
+        return conn
+
+    def _get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            idle = self._idle[key]
+            while idle:
+                conn, last_used = idle.pop()
+                if now - last_used < self._idle_timeout:
+                    return conn, True
+                conn.close()
+        return self._new(*key), False
+
+    def _put(self, key, conn):
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self._maxsize:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def urlopen(self, method, url, body=None, headers=None):
+        """
+        Make a request, returning the response and its fully read body.
+        """
+        resp, body = self.stream(method, url, body, headers)
+        return resp, body.read()
+
+    def stream(self, method, url, body=None, headers=None):
+        """
+        Make a request, following redirects, returning the response and a
+        `StreamedBody` from which to read its body.
+        """
+        headers = dict(headers or {})
+        headers.setdefault("Accept-Encoding", ACCEPT_ENCODING)
+        for _ in range(self.MAX_REDIRECTS):
+            resp, streamed = self._send(method, url, body, headers)
+            location = resp.getheader("Location")
+            if resp.status not in self.REDIRECTS or not location:
+                return resp, streamed
+            target = urljoin(url, location)
+            if urlsplit(target).scheme not in ("http", "https"):
+                return resp, streamed
+            if resp.status == 303 or (
+                resp.status in (301, 302) and method == "POST"
+            ):
+                method = "GET" if method != "HEAD" else method
+                body = None
+                headers = {
+                    k: v
+                    for k, v in headers.items()
+                    if not k.lower().startswith("content-")
+                }
+            elif not (body is None or isinstance(body, bytes)):
+                # a streamed body has been consumed, and can't be resent
+                return resp, streamed
+            streamed.read()
+            url = target
+        return self._send(method, url, body, headers)
+
+    def _send(self, method, url, body, headers):
+        parts = urlsplit(url)
+        key = (parts.scheme or "https", parts.hostname, parts.port)
+        path = parts.path or "/"
+        if parts.query:
+            path = "%s?%s" % (path, parts.query)
+        proxy = self._proxy(key)
+        if key[0] == "http" and proxy is not None:
+            # plain HTTP goes to the proxy, naming the whole URL
+            path = url
+            headers = dict(headers, **proxy[2])
+
+        conn, reused = self._get(key)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+        except self.STALE_ERRORS:
+            conn.close()
+            # streamed bodies have been consumed, and can't be sent again
+            if not reused or not (body is None or isinstance(body, bytes)):
+                raise
+            conn = self._new(*key)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+
+        return resp, StreamedBody(self, key, conn, resp)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, collections.defaultdict(
+                collections.deque
+            )
+        for connections in idle.values():
+            for conn, _ in connections:
+                conn.close()
 
 
 class BasicTransport(TransportBase):
@@ -30,85 +356,104 @@ class BasicTransport(TransportBase):
         self._timeout = self._config.get(
             "timeout", socket._GLOBAL_DEFAULT_TIMEOUT
         )
-        self._opener = self._set_opener()
-
-    def _rateLimitHeaders(self, headers):
-        return {
-            "by": headers.get("x-ratelimit-by", "customer"),
-            "limit": int(headers.get("x-ratelimit-limit", 10)),
-            "period": int(headers.get("x-ratelimit-period", 1)),
-            "remaining": int(headers.get("x-ratelimit-remaining", 100)),
-        }
-
-    def _set_opener(self):
-        # Some changes to the ssl and urllib modules were introduced in Python
-        # 2.7.9, so we work around those differences here.
-        if (
-            sys.version_info.major == 2 and sys.version_info >= (2, 7, 9)
-        ) or sys.version_info >= (3, 4, 0):
-            import ssl
-
-            context = ssl.create_default_context()
-            if not self._verify:
-                context.check_hostname = False
-                context.verify_mode = ssl.CERT_NONE
-            return build_opener(HTTPSHandler(context=context))
-        return build_opener(HTTPSHandler)
-
-    def _send(self, url, headers, data, method, errback):
-        def handleProblem(code, resp, msg):
-            if errback:
-                errback((resp, msg))
-                return
+        context = ssl.create_default_context()
+        if not self._verify:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        self._pool = ConnectionPool(
+            context,
+            self._timeout,
+            maxsize=self._config.get("pool_size", 10),
+            idle_timeout=self._config.get("pool_idle_timeout", 60),
+        )
 
-            if code == 429:
-                hdrs = self._get_headers(resp)
-                raise RateLimitException(
-                    "rate limit exceeded",
-                    resp,
-                    msg,
-                    by=hdrs.get("x-ratelimit-by", "customer"),
-                    limit=hdrs.get("x-ratelimit-limit", 10),
-                    period=hdrs.get("x-ratelimit-period", 1),
-                    remaining=hdrs.get("x-ratelimit-remaining", 100),
-                )
-            elif code == 401:
-                raise AuthException("unauthorized", resp, msg)
-            else:
-                raise ResourceException(
-                    "server error, status code: %s" % code,
-                    response=resp,
-                    body=msg,
-                )
+    def close(self):
+        self._pool.close()
 
-        request = Request(url, headers=headers, data=data)
-        request.get_method = lambda: method
+    def _handleProblem(self, code, resp, msg, errback):
+        if errback:
+            errback((resp, msg))
+            return
 
-        # Handle error and responses the same so we can
-        # always pass the body to the handleProblem function
-        try:
-            resp = self._opener.open(request, timeout=self._timeout)
-            body = resp.read()
-            headers = self._get_headers(resp)
-        except HTTPError as e:
-            resp = e
-            body = resp.read()
-            headers = self._get_headers(resp)
-            if not 200 <= resp.code < 300:
-                handleProblem(resp.code, resp, body)
-        finally:
-            rate_limit_headers = self._rateLimitHeaders(headers)
-            self._rate_limit_func(rate_limit_headers)
+        if code == 429:
+            hdrs = self._get_headers(resp)
+            raise RateLimitException(
+                "rate limit exceeded",
+                resp,
+                msg,
+                by=hdrs.get("x-ratelimit-by", "customer"),
+                limit=hdrs.get("x-ratelimit-limit", 10),
+                period=hdrs.get("x-ratelimit-period", 1),
+                remaining=hdrs.get("x-ratelimit-remaining", 100),
+                codec=self._codec,
+            )
+        elif code == 401:
+            raise AuthException("unauthorized", resp, msg, self._codec)
+        else:
+            raise ResourceException(
+                "server error, status code: %s" % code,
+                response=resp,
+                body=msg,
+                codec=self._codec,
+            )
+
+    def _stream(self, method, url, headers):
+        """
+        Make a request without reading its body, returning the response
+        headers and a `StreamedBody` to iterate over.
+        """
+        bucket = self._rateLimitBucket(method, url)
+        self._waitBefore(bucket)
+        resp, body = self._withRetries(
+            method,
+            lambda: self._pool.stream(method, url, None, headers),
+            lambda r: (
+                r[0].status,
+                self._rateLimitHeaders(self._get_headers(r[0])),
+            ),
+            errors=(OSError, http.client.HTTPException),
+            discard=lambda r: r[1].close(),
+        )
+        headers = self._get_headers(resp)
+        self._rateLimit(self._rateLimitHeaders(headers), bucket)
+        if not 200 <= resp.status < 300:
+            self._handleProblem(resp.status, resp, body.read(), None)
+        return headers, body
+
+    def _send(
+        self, url, headers, data, method, errback, skip_json_parsing=False
+    ):
+        bucket = self._rateLimitBucket(method, url)
+        self._waitBefore(bucket)
+        resp, body = self._withRetries(
+            method,
+            lambda: self._pool.urlopen(method, url, data, headers),
+            lambda r: (
+                r[0].status,
+                self._rateLimitHeaders(self._get_headers(r[0])),
+            ),
+            errors=(OSError, http.client.HTTPException),
+            # streamed bodies can't be sent again
+            retryable=data is None or isinstance(data, bytes),
+        )
+        headers = self._get_headers(resp)
+        rate_limit_headers = self._rateLimitHeaders(headers)
+        self._rateLimit(rate_limit_headers, bucket)
+        if not 200 <= resp.status < 300:
+            self._handleProblem(resp.status, resp, body, errback)
+
+        if body and skip_json_parsing:
+            return headers, body.decode("utf-8")
+
+        if self._lazy:
+            return headers, self._lazyResponse(
+                resp.status, headers, body, rate_limit_headers, resp
+            )
 
         # TODO make sure json is valid if there is a body
         if body:
-            # decode since body is bytes in 3.3
-            try:
-                body = body.decode("utf-8")
-            except AttributeError:
-                pass
             try:
-                return headers, json.loads(body)
+                return headers, self._codec.loads(body)
             except ValueError:
                 if errback:
                     errback(resp)
@@ -130,33 +475,88 @@ class BasicTransport(TransportBase):
         callback=None,
         errback=None,
         pagination_handler=None,
+        skip_json_parsing=False,
     ):
         if headers is None:
             headers = {}
+        upload = None
         if files is not None:
-            # XXX
-            raise Exception("file uploads not supported in BasicTransport yet")
+            headers, upload = self._multipart(headers, files)
+            if upload.length is not None:
+                headers["Content-Length"] = str(upload.length)
+            # http.client sends iterables, chunked if they have no length
+            data = iter(upload)
+        url = self._withParams(url, params)
         self._logHeaders(headers)
         self._log.debug("%s %s %s" % (method, url, data))
 
-        if sys.version_info.major >= 3 and isinstance(data, str):
+        if isinstance(data, str):
             data = data.encode("utf-8")
+        headers, data = self._compressBody(headers, data)
 
-        resp_headers, jsonOut = self._send(url, headers, data, method, errback)
+        try:
+            resp_headers, jsonOut = self._send(
+                url, headers, data, method, errback, skip_json_parsing
+            )
+        finally:
+            if upload is not None:
+                upload.close()
         if self._follow_pagination and pagination_handler is not None:
-            next_page = get_next_page(resp_headers)
-            while next_page is not None:
-                self._log.debug("following pagination to: %s" % (next_page))
-                next_headers, next_json = self._send(
-                    next_page, headers, data, method, errback
+
+            def fetch(url):
+                return self._send(
+                    url, headers, data, method, errback, skip_json_parsing
                 )
+
+            next_pages = self._followPages(fetch, get_next_page(resp_headers))
+            for next_json in next_pages:
                 jsonOut = pagination_handler(jsonOut, next_json)
-                next_page = get_next_page(next_headers)
 
         if callback:
             return callback(jsonOut)
         return jsonOut
 
+    def iter_pages(self, method, url, headers=None, data=None, params=None):
+        if headers is None:
+            headers = {}
+        self._logHeaders(headers)
+        url = self._withParams(url, params)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        def fetch(url):
+            return self._send(url, headers, data, method, None)
+
+        return self._followPages(fetch, url)
+
+    def download(self, method, url, dest, headers=None, params=None):
+        if headers is None:
+            headers = {}
+        self._logHeaders(headers)
+        url = self._withParams(url, params)
+
+        def download(url):
+            resp_headers, body = self._stream(method, url, headers)
+            return resp_headers, body.copyTo(dest)
+
+        return self._downloadPages(download, url, dest)
+
+    def iter_items(self, method, url, key=None, headers=None, params=None):
+        if self._prefetch:
+            # prefetching reads whole pages ahead of the consumer
+            return TransportBase.iter_items(
+                self, method, url, key, headers=headers, params=params
+            )
+        if headers is None:
+            headers = {}
+        self._logHeaders(headers)
+        url = self._withParams(url, params)
+
+        def stream(url):
+            return self._stream(method, url, headers)
+
+        return self._streamItems(stream, url, key)
+
     def _get_headers(self, response):
         # works for 2 and 3
         return {k.lower(): v for k, v in response.headers.items()}
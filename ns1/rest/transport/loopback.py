@@ -0,0 +1,386 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+from __future__ import absolute_import
+
+import collections
+import re
+import threading
+import time
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from ns1.helpers import get_next_page
+from ns1.rest.rate_limiting import rate_limit_bucket
+from ns1.rest.transport.base import ErrbackCalled, Sink, TransportBase
+from ns1.rest.errors import (
+    ResourceException,
+    RateLimitException,
+    AuthException,
+)
+
+
+class LoopbackRequest(object):
+    """
+    A request made to a `LoopbackTransport`, as handed to route handlers.
+    `path` is the request's path without the API version, e.g.
+    "zones/example.com", and `params` its query parameters.
+    """
+
+    def __init__(self, method, url, headers, body, api_version, codec):
+        # urlsplit is most of the cost of a request here, and our urls are
+        # simple enough to take apart by hand
+        path, _, query = (
+            url.partition("://")[2].partition("/")[2].partition("?")
+        )
+        self.method = method
+        self.url = url
+        self.path = "/".join(
+            s for s in path.split("/") if s and s != api_version
+        )
+        self.params = dict(parse_qsl(query)) if query else {}
+        self.headers = headers
+        self.body = body
+        self._codec = codec
+
+    def json(self):
+        """
+        The decoded body, or None if there was none.
+        """
+        if not self.body:
+            return None
+        return self._codec.loads(self.body)
+
+    def __repr__(self):
+        return "<LoopbackRequest %s %s>" % (self.method, self.url)
+
+
+class LoopbackResponse(object):
+    """
+    The parts of a response we hand to errbacks and exceptions.
+    """
+
+    def __init__(self, method, url, status, headers, body):
+        self.method = method
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def text(self):
+        return self.body.decode("utf-8", "replace")
+
+    def __repr__(self):
+        return "<LoopbackResponse %s %s %s>" % (
+            self.method,
+            self.url,
+            self.status,
+        )
+
+
+class LoopbackTransport(TransportBase):
+    """
+    Transport which answers requests from memory, without any I/O, for
+    measuring the client's own overhead and for running tests at full CPU
+    speed.
+
+    Responses are set up with `route`, either canned or computed by a
+    handler. Requests no route matches get a 404. Every response carries
+    X-RateLimit-* headers. With the "loopback_rate_limit" config setting,
+    a [limit, period] pair, each rate limit bucket is a token bucket that
+    refuses requests with a 429 once empty; otherwise requests are never
+    limited. The last "loopback_history" (default 100) requests are kept
+    in `history`.
+    """
+
+    # reported as the limit when not rate limiting
+    UNLIMITED = 10000
+
+    def __init__(self, config):
+        TransportBase.__init__(self, config, self.__module__)
+        self._routes = []
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._limit, self._period = self._config.get(
+            "loopback_rate_limit", None
+        ) or (None, 1)
+        self.history = collections.deque(
+            maxlen=self._config.get("loopback_history", 100)
+        )
+
+    def route(
+        self,
+        method,
+        path,
+        body=None,
+        status=200,
+        headers=None,
+        pages=None,
+        handler=None,
+    ):
+        """
+        Answer requests whose method is `method` (or any, for "*") and
+        whose path without the API version matches the regular expression
+        `path`, e.g. "zones/[^/]+". The most recently added matching route
+        answers.
+
+        :param body: JSON-able body (or bytes) to answer with
+        :param int status: HTTP status to answer with
+        :param dict headers: extra response headers
+        :param list pages: bodies of the pages of a paginated response, \
+            served in turn by following Link headers instead of `body`
+        :param callable handler: computes the answer instead; it is passed \
+            a `LoopbackRequest`, and returns a (status, headers, body) tuple
+        """
+        if handler is None:
+            if pages is None:
+                encoded = self._encode(body)
+
+                def handler(request):
+                    return status, headers, encoded
+
+            else:
+                encoded_pages = [self._encode(page) for page in pages]
+
+                def handler(request):
+                    return self._page(request, encoded_pages, status, headers)
+
+        self._routes.append((method, re.compile(path), handler))
+
+    def reset(self):
+        """
+        Forget all routes, rate limit buckets and history.
+        """
+        self._routes = []
+        with self._lock:
+            self._buckets = {}
+        self.history.clear()
+
+    def _encode(self, body):
+        if body is None or isinstance(body, bytes):
+            return body
+        return self._codec.dumps(body).encode("utf-8")
+
+    def _page(self, request, pages, status, headers):
+        index = int(request.params.get("page", 0))
+        if index >= len(pages):
+            return 404, None, {"message": "Not Found"}
+        headers = dict(headers or {})
+        if index + 1 < len(pages):
+            parts = urlsplit(request.url)
+            params = dict(request.params, page=str(index + 1))
+            url = urlunsplit(parts._replace(query=urlencode(params)))
+            headers["Link"] = '<%s>; rel="next"' % url
+        return status, headers, pages[index]
+
+    def _takeToken(self, method, url):
+        """
+        Draw a token from the request's rate limit bucket, returning the
+        X-RateLimit-* headers to answer with, and whether it was refused.
+        """
+        if self._limit is None:
+            return self._rateLimitReply(self.UNLIMITED, self.UNLIMITED), False
+        bucket = rate_limit_bucket(method, url, self._config["api_version"])
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(bucket, (self._limit, now))
+            tokens = min(
+                self._limit,
+                tokens + (now - last) * self._limit / self._period,
+            )
+            refused = tokens < 1
+            if not refused:
+                tokens -= 1
+            self._buckets[bucket] = (tokens, now)
+        return self._rateLimitReply(self._limit, int(tokens)), refused
+
+    def _rateLimitReply(self, limit, remaining):
+        return {
+            "x-ratelimit-by": "customer",
+            "x-ratelimit-limit": str(limit),
+            "x-ratelimit-period": str(self._period),
+            "x-ratelimit-remaining": str(remaining),
+        }
+
+    def _respond(self, method, url, headers, data):
+        request = LoopbackRequest(
+            method,
+            url,
+            headers,
+            data,
+            self._config["api_version"],
+            self._codec,
+        )
+        self.history.append(request)
+        rate_limit, refused = self._takeToken(method, url)
+        if refused:
+            status, resp_headers, body = (
+                429,
+                None,
+                {"message": "rate limit exceeded"},
+            )
+        else:
+            status, resp_headers, body = 404, None, {"message": "Not Found"}
+            for route_method, path, handler in reversed(self._routes):
+                if route_method in ("*", method) and path.fullmatch(
+                    request.path
+                ):
+                    status, resp_headers, body = handler(request)
+                    break
+        headers = {k.lower(): str(v) for k, v in (resp_headers or {}).items()}
+        headers.update(rate_limit)
+        body = self._encode(body) or b""
+        return LoopbackResponse(method, url, status, headers, body)
+
+    def _handleProblem(self, resp, errback):
+        if errback:
+            raise ErrbackCalled(errback(resp))
+
+        if resp.status == 429:
+            rl = self._rateLimitHeaders(resp.headers)
+            raise RateLimitException(
+                "rate limit exceeded",
+                resp,
+                resp.body,
+                by=rl["by"],
+                limit=rl["limit"],
+                period=rl["period"],
+                remaining=rl["remaining"],
+                codec=self._codec,
+            )
+        elif resp.status == 401:
+            raise AuthException("unauthorized", resp, resp.body, self._codec)
+        else:
+            raise ResourceException(
+                "server error, status code: %s" % resp.status,
+                response=resp,
+                body=resp.body,
+                codec=self._codec,
+            )
+
+    def _request(self, method, url, headers, data):
+        bucket = self._rateLimitBucket(method, url)
+        self._waitBefore(bucket)
+        resp = self._withRetries(
+            method,
+            lambda: self._respond(method, url, headers, data),
+            lambda r: (r.status, self._rateLimitHeaders(r.headers)),
+        )
+        rate_limit_headers = self._rateLimitHeaders(resp.headers)
+        self._rateLimit(rate_limit_headers, bucket)
+        return resp, rate_limit_headers
+
+    def _send(
+        self, url, headers, data, method, errback, skip_json_parsing=False
+    ):
+        resp, rate_limit_headers = self._request(method, url, headers, data)
+        if not 200 <= resp.status < 300:
+            self._handleProblem(resp, errback)
+
+        if resp.body and skip_json_parsing:
+            return resp.headers, resp.text
+
+        if self._lazy:
+            return resp.headers, self._lazyResponse(
+                resp.status, resp.headers, resp.body, rate_limit_headers, resp
+            )
+
+        if not resp.body:
+            return resp.headers, None
+        try:
+            return resp.headers, self._codec.loads(resp.body)
+        except ValueError:
+            if errback:
+                raise ErrbackCalled(errback(resp))
+            raise ResourceException(
+                "invalid json in response", resp, resp.text
+            )
+
+    def send(
+        self,
+        method,
+        url,
+        headers=None,
+        data=None,
+        files=None,
+        params=None,
+        callback=None,
+        errback=None,
+        pagination_handler=None,
+        skip_json_parsing=False,
+    ):
+        if headers is None:
+            headers = {}
+        if files is not None:
+            headers, upload = self._multipart(headers, files)
+            try:
+                data = b"".join(upload)
+            finally:
+                upload.close()
+        url = self._withParams(url, params)
+        self._logHeaders(headers)
+        self._log.debug("%s %s %s" % (method, url, data))
+
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        try:
+            resp_headers, jsonOut = self._send(
+                url, headers, data, method, errback, skip_json_parsing
+            )
+            if self._follow_pagination and pagination_handler is not None:
+
+                def fetch(url):
+                    return self._send(
+                        url, headers, data, method, errback, skip_json_parsing
+                    )
+
+                next_pages = self._followPages(
+                    fetch, get_next_page(resp_headers)
+                )
+                for next_json in next_pages:
+                    jsonOut = pagination_handler(jsonOut, next_json)
+        except ErrbackCalled as e:
+            return e.result
+
+        if callback:
+            return callback(jsonOut)
+        return jsonOut
+
+    def iter_pages(self, method, url, headers=None, data=None, params=None):
+        if headers is None:
+            headers = {}
+        self._logHeaders(headers)
+        url = self._withParams(url, params)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        def fetch(url):
+            return self._send(url, headers, data, method, None)
+
+        return self._followPages(fetch, url)
+
+    def download(self, method, url, dest, headers=None, params=None):
+        if headers is None:
+            headers = {}
+        self._logHeaders(headers)
+        url = self._withParams(url, params)
+
+        def download(url):
+            resp, _ = self._request(method, url, headers, None)
+            if not 200 <= resp.status < 300:
+                self._handleProblem(resp, None)
+            sink = Sink(dest)
+            view = memoryview(resp.body)
+            for start in range(0, len(view), self.CHUNK_SIZE):
+                end = start + self.CHUNK_SIZE
+                sink.write(view[start:end])
+            return resp.headers, sink.written
+
+        return self._downloadPages(download, url, dest)
+
+
+TransportBase.REGISTRY["loopback"] = LoopbackTransport
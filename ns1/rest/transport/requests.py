@@ -6,6 +6,7 @@
 from __future__ import absolute_import
 
 from ns1.helpers import get_next_page
+from ns1.rest.compression import ACCEPT_ENCODING
 from ns1.rest.transport.base import TransportBase
 from ns1.rest.errors import (
     ResourceException,
@@ -27,6 +28,15 @@ class RequestsTransport(TransportBase):
             raise ImportError("requests module required for RequestsTransport")
         TransportBase.__init__(self, config, self.__module__)
         self.session = requests.Session()
+        # requests decodes these itself, brotli included if installed
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        pool_size = self._config.get("pool_size", None)
+        if pool_size is not None:
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size
+            )
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
         self.REQ_MAP = {
             "GET": self.session.get,
             "POST": self.session.post,
@@ -37,13 +47,66 @@ class RequestsTransport(TransportBase):
         if isinstance(self._timeout, list) and len(self._timeout) == 2:
             self._timeout = tuple(self._timeout)
 
-    def _rateLimitHeaders(self, headers):
-        return {
-            "by": headers.get("X-RateLimit-By", "customer"),
-            "limit": int(headers.get("X-RateLimit-Limit", 10)),
-            "period": int(headers.get("X-RateLimit-Period", 1)),
-            "remaining": int(headers.get("X-RateLimit-Remaining", 100)),
-        }
+    def close(self):
+        self.session.close()
+
+    def _raiseForStatus(self, resp, rate_limit_headers):
+        if resp.status_code == 429:
+            raise RateLimitException(
+                "rate limit exceeded",
+                resp,
+                resp.text,
+                by=rate_limit_headers["by"],
+                limit=rate_limit_headers["limit"],
+                period=rate_limit_headers["period"],
+                remaining=rate_limit_headers["remaining"],
+                codec=self._codec,
+            )
+        elif resp.status_code == 401:
+            raise AuthException("unauthorized", resp, resp.text, self._codec)
+        else:
+            raise ResourceException(
+                "server error", resp, resp.text, self._codec
+            )
+
+    def _stream(self, method, url, headers, params):
+        """
+        Make a request without reading its body, returning the response
+        headers and an iterator over the body's chunks.
+        """
+        bucket = self._rateLimitBucket(method, url)
+        self._waitBefore(bucket)
+        resp = self._withRetries(
+            method,
+            lambda: self.REQ_MAP[method](
+                url,
+                headers=headers,
+                verify=self._verify,
+                params=params,
+                timeout=self._timeout,
+                stream=True,
+            ),
+            lambda r: (r.status_code, self._rateLimitHeaders(r.headers)),
+            errors=(requests.ConnectionError, requests.Timeout),
+            discard=lambda r: r.close(),
+        )
+
+        rate_limit_headers = self._rateLimitHeaders(resp.headers)
+        self._rateLimit(rate_limit_headers, bucket)
+        if resp.status_code < 200 or resp.status_code >= 300:
+            try:
+                self._raiseForStatus(resp, rate_limit_headers)
+            finally:
+                resp.close()
+
+        def chunks():
+            try:
+                for chunk in resp.iter_content(self.CHUNK_SIZE):
+                    yield chunk
+            finally:
+                resp.close()
+
+        return resp.headers, chunks()
 
     def _send(
         self,
@@ -56,47 +119,61 @@ class RequestsTransport(TransportBase):
         errback,
         skip_json_parsing,
     ):
-        resp = self.REQ_MAP[method](
-            url,
-            headers=headers,
-            verify=self._verify,
-            data=data,
-            files=files,
-            params=params,
-            timeout=self._timeout,
-        )
+        bucket = self._rateLimitBucket(method, url)
+        upload = None
+        if files is not None:
+            headers, upload = self._multipart(headers, files)
+            # without a length, requests sends the body chunked
+            data = upload if upload.length is not None else iter(upload)
+        else:
+            headers, data = self._compressBody(headers, data)
+        self._waitBefore(bucket)
+        try:
+            resp = self._withRetries(
+                method,
+                lambda: self.REQ_MAP[method](
+                    url,
+                    headers=headers,
+                    verify=self._verify,
+                    data=data,
+                    params=params,
+                    timeout=self._timeout,
+                ),
+                lambda r: (r.status_code, self._rateLimitHeaders(r.headers)),
+                errors=(requests.ConnectionError, requests.Timeout),
+                retryable=upload is None,
+            )
+        finally:
+            if upload is not None:
+                upload.close()
 
         response_headers = resp.headers
         rate_limit_headers = self._rateLimitHeaders(response_headers)
-        self._rate_limit_func(rate_limit_headers)
+        self._rateLimit(rate_limit_headers, bucket)
 
         if resp.status_code < 200 or resp.status_code >= 300:
             if errback:
                 errback(resp)
                 return
             else:
-                if resp.status_code == 429:
-                    raise RateLimitException(
-                        "rate limit exceeded",
-                        resp,
-                        resp.text,
-                        by=rate_limit_headers["by"],
-                        limit=rate_limit_headers["limit"],
-                        period=rate_limit_headers["period"],
-                        remaining=rate_limit_headers["remaining"],
-                    )
-                elif resp.status_code == 401:
-                    raise AuthException("unauthorized", resp, resp.text)
-                else:
-                    raise ResourceException("server error", resp, resp.text)
+                self._raiseForStatus(resp, rate_limit_headers)
 
         if resp.text and skip_json_parsing:
             return response_headers, resp.text
 
+        if self._lazy:
+            return response_headers, self._lazyResponse(
+                resp.status_code,
+                response_headers,
+                resp.content,
+                rate_limit_headers,
+                resp,
+            )
+
         # TODO make sure json is valid if a body is returned
-        if resp.text:
+        if resp.content:
             try:
-                return response_headers, resp.json()
+                return response_headers, self._codec.loads(resp.content)
             except ValueError:
                 if errback:
                     errback(resp)
@@ -134,12 +211,11 @@ class RequestsTransport(TransportBase):
             skip_json_parsing,
         )
         if self._follow_pagination and pagination_handler is not None:
-            next_page = get_next_page(resp_headers)
-            while next_page is not None:
-                self._log.debug("following pagination to: %s" % next_page)
-                next_headers, next_json = self._send(
+
+            def fetch(url):
+                return self._send(
                     method,
-                    next_page,
+                    url,
                     headers,
                     data,
                     files,
@@ -147,12 +223,53 @@ class RequestsTransport(TransportBase):
                     errback,
                     skip_json_parsing,
                 )
+
+            next_pages = self._followPages(fetch, get_next_page(resp_headers))
+            for next_json in next_pages:
                 jsonOut = pagination_handler(jsonOut, next_json)
-                next_page = get_next_page(next_headers)
 
         if callback:
             return callback(jsonOut)
         return jsonOut
 
+    def iter_pages(self, method, url, headers=None, data=None, params=None):
+        self._logHeaders(headers)
+
+        def fetch(url):
+            return self._send(
+                method, url, headers, data, None, params, None, False
+            )
+
+        return self._followPages(fetch, url)
+
+    def download(self, method, url, dest, headers=None, params=None):
+        self._logHeaders(headers)
+
+        def download(url):
+            resp_headers, chunks = self._stream(method, url, headers, params)
+            written = 0
+            try:
+                for chunk in chunks:
+                    dest.write(chunk)
+                    written += len(chunk)
+            finally:
+                chunks.close()
+            return resp_headers, written
+
+        return self._downloadPages(download, url, dest)
+
+    def iter_items(self, method, url, key=None, headers=None, params=None):
+        if self._prefetch:
+            # prefetching reads whole pages ahead of the consumer
+            return TransportBase.iter_items(
+                self, method, url, key, headers=headers, params=params
+            )
+        self._logHeaders(headers)
+
+        def stream(url):
+            return self._stream(method, url, headers, params)
+
+        return self._streamItems(stream, url, key)
+
 
 TransportBase.REGISTRY["requests"] = RequestsTransport
@@ -4,38 +4,53 @@
 # License under The MIT License (MIT). See LICENSE in project root.
 from __future__ import absolute_import
 
-import json
-import random
 import sys
 
 from ns1.helpers import get_next_page
+from ns1.rest.compression import ENCODINGS, get_decoder
 from ns1.rest.errors import AuthException
 from ns1.rest.errors import RateLimitException
 from ns1.rest.errors import ResourceException
-from ns1.rest.transport.base import TransportBase
+from ns1.rest.transport.base import Sink, TransportBase
 
 IS_PY3 = False
 if sys.version_info[0] == 3:
     IS_PY3 = True
-    from io import StringIO
-    from urllib.parse import urlencode
-else:
-    import StringIO
-    from urllib import urlencode
 
 try:
     from twisted.internet import reactor
+    from twisted.internet.interfaces import (
+        IOpenSSLClientConnectionCreator,
+        IProtocol,
+    )
+    from twisted.internet.protocol import Protocol
+    from twisted.internet.error import ConnectError
+    from twisted.internet.error import TimeoutError as TwistedTimeoutError
+    from twisted.internet.task import TaskFinished, cooperate, deferLater
+    from twisted.python.components import proxyForInterface
+    from twisted.python.failure import Failure
     from twisted.web.client import (
         Agent,
+        ContentDecoderAgent,
+        GzipDecoder,
+        HTTPConnectionPool,
+        PotentialDataLoss,
+        ResponseDone,
+        ResponseFailed,
         readBody,
-        FileBodyProducer,
         BrowserLikePolicyForHTTPS,
     )
     from twisted.web.http_headers import Headers
-    from twisted.internet.defer import succeed
+    from twisted.internet.defer import (
+        Deferred,
+        DeferredSemaphore,
+        inlineCallbacks,
+        succeed,
+    )
     from twisted.internet.ssl import CertificateOptions
-    from twisted.internet._sslverify import ClientTLSOptions
-    from twisted.web.iweb import IPolicyForHTTPS
+    from twisted.internet.abstract import isIPAddress
+    from OpenSSL import SSL
+    from twisted.web.iweb import IPolicyForHTTPS, IResponse, UNKNOWN_LENGTH
     from zope.interface import implementer
 
     have_twisted = True
@@ -44,60 +59,176 @@ except Exception:
     have_twisted = False
 
 
-def encodeForm(varname, f, ctype):
-    randomChars = [str(random.randrange(10)) for _ in range(28)]
-    boundary = "".join(randomChars)
+class StringProducer(object):
+    def __init__(self, body):
+        self.body = body
+        self.length = len(body)
 
-    lines = ["--" + boundary]
+    def startProducing(self, consumer):
+        consumer.write(self.body)
 
-    def add(name, content):
-        header = 'Content-Disposition: form-data; name="%s"; filename="%s"' % (
-            name,
-            f.name,
-        )
-        header += ";\r\nContent-Type: %s" % ctype
-        lines.extend([header, "", content])
+        return succeed(None)
 
-    add(varname, f.read())
+    def pauseProducing(self):
+        pass
 
-    lines.extend(["--" + boundary + "--", ""])
+    def stopProducing(self):
+        pass
 
-    return boundary, "\r\n".join(lines)
 
+class MultipartProducer(object):
+    """
+    Produces a `MultipartBody` a chunk at a time, as the consumer is ready
+    for it, closing its files once it is done or stopped.
+    """
 
-class StringProducer(object):
     def __init__(self, body):
         self.body = body
-        self.length = len(body)
+        self.length = UNKNOWN_LENGTH if body.length is None else body.length
+        self._task = None
 
     def startProducing(self, consumer):
-        consumer.write(self.body)
+        def produce():
+            for chunk in self.body:
+                consumer.write(chunk)
+                yield None
 
-        return succeed(None)
+        self._task = cooperate(produce())
+        d = self._task.whenDone()
+        d.addCallback(lambda _: None)
+
+        return d
 
     def pauseProducing(self):
-        pass
+        self._task.pause()
+
+    def resumeProducing(self):
+        self._task.resume()
 
     def stopProducing(self):
-        pass
+        if self._task is not None:
+            try:
+                self._task.stop()
+            except TaskFinished:
+                pass
+        self.body.close()
 
 
 if have_twisted:
 
-    class IgnoreHostnameClientTLSOptions(ClientTLSOptions):
-        def _identityVerifyingInfoCallback(self, connection, where, ret):
-            # override hostname validation
+    @implementer(IOpenSSLClientConnectionCreator)
+    class NoValidationConnectionCreator(object):
+        """
+        Makes TLS connections which verify neither the certificate nor the
+        hostname of the server. Twisted's ClientTLSOptions can't be told
+        not to, and how it verifies has changed between versions.
+        """
+
+        def __init__(self, hostname, options):
+            self._hostname = hostname
+            self._options = options
 
-            return
+        def clientConnectionForTLS(self, tlsProtocol):
+            connection = SSL.Connection(self._options.getContext(), None)
+            connection.set_app_data(tlsProtocol)
+            if not isIPAddress(self._hostname):
+                connection.set_tlsext_host_name(self._hostname.encode("ascii"))
+            return connection
 
     @implementer(IPolicyForHTTPS)
     class NoValidationPolicy(object):
         def creatorForNetloc(self, hostname, port):
             options = CertificateOptions(trustRoot=None)
             ascii_hostname = hostname.decode("ascii")
-            context = options.getContext()
 
-            return IgnoreHostnameClientTLSOptions(ascii_hostname, context)
+            return NoValidationConnectionCreator(ascii_hostname, options)
+
+    class SinkProtocol(Protocol):
+        """
+        Writes a response body to a `Sink` as it is delivered, firing
+        `finished` with the number of bytes written.
+        """
+
+        def __init__(self, sink, finished):
+            self.sink = sink
+            self.finished = finished
+            self.error = None
+
+        def dataReceived(self, data):
+            if self.error is not None:
+                return
+            try:
+                self.sink.write(data)
+            except Exception as e:
+                self.error = e
+                self.transport.stopProducing()
+
+        def connectionLost(self, reason):
+            if self.error is not None:
+                self.finished.errback(self.error)
+            elif reason.check(ResponseDone, PotentialDataLoss):
+                self.finished.callback(self.sink.written)
+            else:
+                self.finished.errback(reason)
+
+    class DecodingProtocol(proxyForInterface(IProtocol)):
+        """
+        Wraps a protocol, decoding the body delivered to it with one of our
+        decoders, like twisted's own for gzip.
+        """
+
+        def __init__(self, protocol, response, decoder):
+            self.original = protocol
+            self._response = response
+            self._decoder = decoder
+
+        def dataReceived(self, data):
+            try:
+                data = self._decoder.decompress(data)
+            except Exception:
+                raise ResponseFailed([Failure()], self._response)
+            if data:
+                self.original.dataReceived(data)
+
+        def connectionLost(self, reason):
+            try:
+                data = self._decoder.flush()
+            except Exception:
+                raise ResponseFailed([reason, Failure()], self._response)
+            if data:
+                self.original.dataReceived(data)
+            self.original.connectionLost(reason)
+
+    class DecodingResponse(proxyForInterface(IResponse)):
+        """
+        A response whose body is encoded with `encoding`, for use with
+        `ContentDecoderAgent`.
+        """
+
+        encoding = None
+
+        def __init__(self, response):
+            self.original = response
+            self.length = UNKNOWN_LENGTH
+
+        def deliverBody(self, protocol):
+            self.original.deliverBody(
+                DecodingProtocol(
+                    protocol, self.original, get_decoder(self.encoding)
+                )
+            )
+
+    class DeflateDecoder(DecodingResponse):
+        encoding = "deflate"
+
+    class BrotliDecoder(DecodingResponse):
+        encoding = "br"
+
+    DECODERS = {
+        "gzip": GzipDecoder,
+        "deflate": DeflateDecoder,
+        "br": BrotliDecoder,
+    }
 
 
 class TwistedTransport(TransportBase):
@@ -117,12 +248,96 @@ class TwistedTransport(TransportBase):
         else:
             policy = BrowserLikePolicyForHTTPS()
 
-        self.agent = Agent(reactor, policy, connectTimeout=self._timeout)
+        # keep-alive connections shared by every request on this transport
+        self.pool = HTTPConnectionPool(reactor, persistent=True)
+        self.pool.maxPersistentPerHost = self._config.get(
+            "pool_size", self.pool.maxPersistentPerHost
+        )
+        self.pool.cachedConnectionTimeout = self._config.get(
+            "pool_idle_timeout", self.pool.cachedConnectionTimeout
+        )
+        # asks for compressed responses, and decodes them as they arrive
+        self.agent = ContentDecoderAgent(
+            Agent(
+                reactor, policy, connectTimeout=self._timeout, pool=self.pool
+            ),
+            [(e.encode("ascii"), DECODERS[e]) for e in ENCODINGS],
+        )
+        # bounds the number of requests in flight, including body reads
+        self._semaphore = DeferredSemaphore(
+            self._config.get("twisted_concurrency", 100)
+        )
+
+    def close(self):
+        return self.pool.closeCachedConnections()
+
+    def _readResponse(self, response, sink=None):
+        if sink is None or not 200 <= response.code < 300:
+            d = readBody(response)
+        else:
+            d = Deferred()
+            response.deliverBody(SinkProtocol(sink, d))
+        d.addCallback(lambda body: (response, body))
+
+        return d
 
-    def _callback(self, response, request_data):
-        d = readBody(response)
+    def _request(self, url, request_data):
+        if self._retry is None or not request_data["retryable"]:
+            return self._attempt(url, request_data)
+        self._retry.deposit()
+        return self._retrying(url, request_data)
+
+    @inlineCallbacks
+    def _retrying(self, url, request_data):
+        method = request_data["method"]
+        attempt = 0
+        while True:
+            try:
+                result = yield self._attempt(url, request_data)
+            except (ConnectError, ResponseFailed, TwistedTimeoutError):
+                delay = None
+                sink = request_data["sink"]
+                if sink is None or not sink.written:
+                    delay = self._retryDelay(method, attempt)
+                if delay is None:
+                    raise
+            else:
+                response = result[0]
+                delay = self._retryDelay(
+                    method,
+                    attempt,
+                    response.code,
+                    self._rateLimitHeaders(response.headers),
+                )
+                if delay is None:
+                    return result
+            yield deferLater(reactor, delay, lambda: None)
+            attempt += 1
+
+    def _attempt(self, url, request_data):
+        def req():
+            d = request_data["request_func"](url)
+            d.addCallback(self._readResponse, request_data["sink"])
+
+            return d
+
+        delay = self._rateLimitDelayBefore(request_data["bucket"])
+        if delay:
+            d = deferLater(reactor, delay, lambda: None)
+            d.addCallback(lambda _: self._semaphore.run(req))
+            return d
+        return self._semaphore.run(req)
+
+    def _handlePage(self, result, request_data):
+        response, body = result
+        d = succeed(body)
         d.addCallback(self._onBody, response, request_data)
-        d.addCallback(self._handleRateLimiting)
+        d.addCallback(self._handleRateLimiting, request_data["bucket"])
+
+        return d
+
+    def _callback(self, result, request_data):
+        d = self._handlePage(result, request_data)
         d.addCallback(self._handlePagination, request_data)
 
         return d
@@ -135,43 +350,84 @@ class TwistedTransport(TransportBase):
                 raise failure.value
             raise ResourceException(failure.getErrorMessage())
 
-    def _handleRateLimiting(self, data):
+    def _handleRateLimiting(self, data, bucket=None):
         headers, jsonOut = data
-        self._rate_limit_func(self._rateLimitHeaders(headers))
-        return headers, jsonOut
+        delay = self._rateLimitDelayAfter(
+            bucket, self._rateLimitHeaders(headers)
+        )
+        if delay:
+            # wait on the reactor rather than blocking it
+            return deferLater(reactor, delay, lambda: data)
+        return data
 
     def _handlePagination(self, data, request_data):
         headers, jsonOut = data
+        if request_data["page_callback"] is not None:
+            return self._paginate(headers, jsonOut, request_data)
         if not self._follow_pagination:
             return jsonOut
+        if request_data["pagination_handler"] is None:
+            return jsonOut
+        return self._paginate(headers, jsonOut, request_data)
+
+    def _header(self, headers, name, default=None):
+        # Twisted's Headers hold a list of values for each name
+        return headers.getRawHeaders(name, [default])[0]
+
+    def _nextPage(self, headers):
         link = {"link": headers.getRawHeaders("Link", [""])[0]}
-        next_page = get_next_page(link)
-        if next_page:
+        return get_next_page(link)
+
+    @inlineCallbacks
+    def _paginate(self, headers, jsonOut, request_data):
+        """
+        Follow Link headers one page at a time. Each page is either handed
+        to the request's page_callback and dropped, or merged into the
+        result with its pagination_handler, so only the running result and
+        the current page are alive at once, and the call stack stays flat
+        however many pages there are.
+        """
+        page_callback = request_data["page_callback"]
+        if page_callback is not None:
+            page_callback(jsonOut)
+            jsonOut = None
+
+        next_page = self._nextPage(headers)
+        while next_page:
             self._log.debug("following pagination to: {}".format(next_page))
-            # kickoff new deferred, with the original callbacks ...
-            d = request_data["request_func"](next_page)
-            d.addCallback(self._callback, request_data)
-            d.addErrback(self._errback, request_data["user_errback"])
-            # ... and a callback to our pagination_handler
-            d.addCallback(
-                lambda next_json: request_data["pagination_handler"](
+            result = yield self._request(next_page, request_data)
+            headers, next_json = yield self._handlePage(result, request_data)
+            if page_callback is not None:
+                page_callback(next_json)
+            else:
+                jsonOut = request_data["pagination_handler"](
                     jsonOut, next_json
                 )
-            )
-            return d
+            next_page = self._nextPage(headers)
 
-        # our (non-deferred) response goes back up the chain
         return jsonOut
 
-    def _rateLimitHeaders(self, headers):
-        return {
-            "by": headers.getRawHeaders("x-ratelimit-by", ["customer"])[0],
-            "limit": int(headers.getRawHeaders("x-ratelimit-limit", [10])[0]),
-            "period": int(headers.getRawHeaders("x-ratelimit-period", [1])[0]),
-            "remaining": int(
-                headers.getRawHeaders("x-ratelimit-remaining", [100])[0]
-            ),
-        }
+    def _raiseForStatus(self, response, body):
+        if 200 <= response.code < 300:
+            return
+        if response.code == 429:
+            rateLimitHeaders = self._rateLimitHeaders(response.headers)
+            raise RateLimitException(
+                "rate limit exceeded",
+                response,
+                body,
+                by=rateLimitHeaders["by"],
+                limit=rateLimitHeaders["limit"],
+                period=rateLimitHeaders["period"],
+                remaining=rateLimitHeaders["remaining"],
+                codec=self._codec,
+            )
+        elif response.code == 401:
+            raise AuthException("unauthorized", response, body, self._codec)
+        else:
+            raise ResourceException(
+                "server error", response, body, self._codec
+            )
 
     def _onBody(self, body, response, request_data):
         self._logHeaders(request_data["headers"])
@@ -186,27 +442,21 @@ class TwistedTransport(TransportBase):
         )
 
         responseHeaders = response.headers
+        self._raiseForStatus(response, body)
 
-        if response.code < 200 or response.code >= 300:
-            if response.code == 429:
-                rateLimitHeaders = self._rateLimitHeaders(responseHeaders)
-                raise RateLimitException(
-                    "rate limit exceeded",
-                    response,
-                    body,
-                    by=rateLimitHeaders["by"],
-                    limit=rateLimitHeaders["limit"],
-                    period=rateLimitHeaders["period"],
-                    remaining=rateLimitHeaders["remaining"],
-                )
-            elif response.code == 401:
-                raise AuthException("unauthorized", response, body)
-            else:
-                raise ResourceException("server error", response, body)
-
-        if body:
+        if body and request_data["skip_json_parsing"]:
+            jsonOut = body.decode("utf-8")
+        elif self._lazy:
+            jsonOut = self._lazyResponse(
+                response.code,
+                responseHeaders,
+                body,
+                self._rateLimitHeaders(responseHeaders),
+                response,
+            )
+        elif body:
             try:
-                jsonOut = json.loads(body)
+                jsonOut = self._codec.loads(body)
             except:  # noqa
                 raise ResourceException(
                     "invalid json in response", response, body
@@ -216,41 +466,28 @@ class TwistedTransport(TransportBase):
 
         user_callback = request_data["user_callback"]
         if user_callback:
-            # set these in case callback throws, so we have them for errback
-            self.response = response
-            self.body = body
+            # set these in case callback throws, so we have them for errback.
+            # they live on the request, not the transport, which is shared
+            # by every request in flight
+            request_data["response"] = response
+            request_data["body"] = body
 
             return responseHeaders, user_callback(jsonOut, body, response)
         else:
             return responseHeaders, jsonOut
 
-    def _request_func(self, method, headers, data, files):
+    def _request_func(self, method, headers, data, upload):
         """
         Apply the basic request parameters that won't change over subrequests,
         return a function that takes a url and returns a (new) deferred.
         """
         bProducer = None
         if data:
-            if IS_PY3:
-                bProducer = StringProducer(data.encode("utf-8"))
-            else:
-                bProducer = StringProducer(data)
-        elif files:
-            if len(files) > 1:
-                raise Exception(
-                    "twisted transport currently only accepts one"
-                    " multipart file"
-                )
-            boundary, body = encodeForm(
-                files[0][0], files[0][1][1], files[0][1][2]
-            )
-
-            if headers is None:
-                headers = {}
-            headers["Content-Type"] = (
-                "multipart/form-data; boundary={}".format(boundary)
-            )
-            bProducer = FileBodyProducer(StringIO.StringIO(body))
+            if not isinstance(data, bytes):
+                data = data.encode("utf-8")
+            bProducer = StringProducer(data)
+        elif upload is not None:
+            bProducer = MultipartProducer(upload)
 
         theaders = (
             Headers({str(k): [str(v)] for (k, v) in headers.items()})
@@ -280,26 +517,148 @@ class TwistedTransport(TransportBase):
         callback=None,
         errback=None,
         pagination_handler=None,
+        page_callback=None,
+        skip_json_parsing=False,
     ):
-        if params is not None:
-            url = "?".join((url, urlencode(params)))
+        """
+        Make a request, returning a Deferred which fires with the
+        (callback-processed) response.
+
+        If `page_callback` is given, every page of a paginated response is
+        passed to it as it arrives, regardless of the follow_pagination
+        setting, and the Deferred fires with None once the last page has
+        been handled.
+        """
+        url = self._withParams(url, params)
+
+        upload = None
+        body = None
+        if files:
+            headers, upload = self._multipart(headers, files)
+        else:
+            headers, body = self._compressBody(headers, data)
 
         # gather everything we need to make more requests...
         request_data = {
+            "method": method,
             "data": data,
             "headers": headers,
             "pagination_handler": pagination_handler,
-            "request_func": self._request_func(method, headers, data, files),
+            "page_callback": page_callback,
+            "bucket": self._rateLimitBucket(method, url),
+            # file bodies are consumed by the first attempt
+            "retryable": upload is None,
+            "request_func": self._request_func(method, headers, body, upload),
             "user_callback": callback,
             "user_errback": errback,
+            "skip_json_parsing": skip_json_parsing,
+            "sink": None,
+            "response": None,
+            "body": None,
         }
 
-        d = request_data["request_func"](url)
+        d = self._request(url, request_data)
+        if upload is not None:
+            # in case the request failed before the body was produced
+            d.addBoth(self._closeUpload, upload)
         # ... and pass it along
         d.addCallback(self._callback, request_data)
         d.addErrback(self._errback, errback)
 
         return d
 
+    def _closeUpload(self, result, upload):
+        upload.close()
+        return result
+
+    def download(self, method, url, dest, headers=None, params=None):
+        """
+        Write the raw body of a response to the file object `dest` as it is
+        delivered, returning a Deferred which fires with the number of
+        bytes written.
+        """
+        url = self._withParams(url, params)
+        self._logHeaders(headers)
+        request_func = self._request_func(method, headers, None, None)
+
+        def download(url):
+            request_data = {
+                "method": method,
+                "bucket": self._rateLimitBucket(method, url),
+                "retryable": True,
+                "request_func": request_func,
+                "sink": Sink(dest),
+            }
+            d = self._request(url, request_data)
+            d.addCallback(self._onDownload, request_data)
+            d.addErrback(self._errback, None)
+            return d
+
+        return self._downloadPages(download, url, dest)
+
+    @inlineCallbacks
+    def _downloadPages(self, download, url, dest):
+        headers, written = yield download(url)
+        next_page = self._nextPage(headers)
+        while next_page:
+            self._log.debug("following pagination to: {}".format(next_page))
+            dest.write(self.PAGE_SEPARATOR)
+            headers, page = yield download(next_page)
+            written += len(self.PAGE_SEPARATOR) + page
+            next_page = self._nextPage(headers)
+        return written
+
+    def _onDownload(self, result, request_data):
+        # `written` is the error body instead, if the request failed
+        response, written = result
+        self._log.debug(
+            "%s %s %s" % (request_data["method"], response.code, written)
+        )
+        self._raiseForStatus(response, written)
+        d = succeed((response.headers, written))
+        d.addCallback(self._handleRateLimiting, request_data["bucket"])
+
+        return d
+
+    async def iter_pages(
+        self, method, url, headers=None, data=None, params=None
+    ):
+        """
+        Asynchronously iterate over the pages of a paginated response, for
+        use with `async for` in a coroutine run by
+        `twisted.internet.defer.ensureDeferred`. Each page is requested
+        once the previous one has been consumed.
+        """
+        url = self._withParams(url, params)
+        self._logHeaders(headers)
+        headers, body = self._compressBody(headers, data)
+
+        request_data = {
+            "method": method,
+            "data": data,
+            "headers": headers,
+            "pagination_handler": None,
+            "page_callback": None,
+            "bucket": self._rateLimitBucket(method, url),
+            "retryable": True,
+            "request_func": self._request_func(method, headers, body, None),
+            "user_callback": None,
+            "user_errback": None,
+            "skip_json_parsing": False,
+            "sink": None,
+            "response": None,
+            "body": None,
+        }
+
+        while url:
+            d = self._request(url, request_data)
+            d.addCallback(self._handlePage, request_data)
+            d.addErrback(self._errback, None)
+            headers, page = await d
+            yield page
+            url = self._nextPage(headers)
+            if url:
+                self._log.debug("following pagination to: {}".format(url))
+
 
 TransportBase.REGISTRY["twisted"] = TwistedTransport
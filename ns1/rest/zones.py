@@ -5,6 +5,7 @@
 #
 
 from . import resource
+from .multipart import open_upload
 
 
 class Zones(resource.BaseResource):
@@ -39,7 +40,14 @@ class Zones(resource.BaseResource):
     def import_file(
         self, zone, zoneFile, callback=None, errback=None, **kwargs
     ):
-        files = [("zonefile", (zoneFile, open(zoneFile, "rb"), "text/plain"))]
+        """
+        Create a zone from a zone file, streamed to the API. `zoneFile` is
+        anything `ns1.rest.multipart.open_upload` accepts: a path (to a
+        plain, .gz or .zst file), bytes, a file object or an iterable of
+        lines.
+        """
+        filename, content = open_upload(zoneFile, "%s.zone" % zone)
+        files = [("zonefile", (filename, content, "text/plain"))]
         params = self._buildImportParams(kwargs)
         return self._make_request(
             "PUT",
@@ -115,6 +123,34 @@ class Zones(resource.BaseResource):
             pagination_handler=zone_retrieve_pagination,
         )
 
+    def download(self, zone, dest):
+        """
+        Write the raw JSON of a zone to the binary file object `dest` as it
+        is downloaded, e.g. to archive it. A paginated zone is written a
+        page at a time, the JSON documents of its pages separated by
+        newlines.
+
+        :return: number of bytes written
+        """
+        return self._download("%s/%s" % (self.ROOT, zone), dest)
+
+    def iter_list(self):
+        """
+        Iterate over all zones, fetching one page at a time.
+        """
+        return self._iter_request("GET", self.ROOT)
+
+    def iter_records(self, zone):
+        """
+        Iterate over the records of a zone, fetching one page at a time.
+        With the basic and requests transports, records are decoded as the
+        response arrives, so even huge zones need memory for only a record
+        at a time.
+        """
+        return self._iter_request(
+            "GET", "%s/%s" % (self.ROOT, zone), "records"
+        )
+
     def search(
         self,
         query,
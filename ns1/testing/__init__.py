@@ -0,0 +1,9 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+"""
+Tools for testing and load testing code built on the SDK without touching
+the real NS1 API.
+"""
@@ -0,0 +1,141 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+"""
+Synthetic zones shaped like the API's zone retrieve response, for tests and
+benchmarks of large zones:
+
+    zone = make_zone(
+        "example.com",
+        records=200000,
+        types=("A", "AAAA", "MX"),
+        answers=3,
+        filters=("up", "geotarget_country", "select_first_n"),
+    )
+
+Records are generated one at a time, so `iter_records` and `iter_pages` can
+feed an encoder without the whole zone ever being in memory.
+"""
+
+import itertools
+
+# answer metadata read by each filter, added to every answer of records
+# which use it
+FILTER_META = {
+    "up": {"up": True},
+    "geotarget_country": {"country": ["US"]},
+    "geotarget_regional": {"georegion": ["US-EAST"]},
+    "weighted_shuffle": {"weight": 10},
+    "priority": {"priority": 1},
+    "shuffle": {},
+    "select_first_n": {},
+}
+FILTER_CONFIG = {"select_first_n": {"N": 1}}
+
+
+def _rdata(type, zone, i, j, size):
+    n = i * 8 + j
+    if type == "A":
+        return ["10.%d.%d.%d" % (n >> 16 & 255, n >> 8 & 255, n & 255)]
+    if type == "AAAA":
+        return ["2001:db8::%x:%x" % (i, j)]
+    if type in ("CNAME", "ALIAS"):
+        return ["target%d.%s" % (j, zone)]
+    if type == "NS":
+        return ["ns%d.%s" % (j, zone)]
+    if type == "MX":
+        return [10 * (j + 1), "mx%d.%s" % (j, zone)]
+    if type == "SRV":
+        return [10, 10, 443, "srv%d.%s" % (j, zone)]
+    if type == "TXT":
+        text = "v=spf1 include:_spf%d.%s ~all" % (j, zone)
+        return [text.ljust(size or 0, "x")]
+    raise ValueError("no synthetic answers for %s records" % type)
+
+
+def make_record(
+    zone, i, type="A", answers=1, answer_size=None, filters=(), meta=None
+):
+    """
+    The `i`-th synthetic record of `zone`, whose domain is "r<i>.<zone>".
+
+    :param int answers: number of answers
+    :param int answer_size: pad TXT answers to this many characters
+    :param filters: names of filters in the record's filter chain; answers \
+        get the metadata the filters read, see `FILTER_META`
+    :param dict meta: record metadata
+    """
+    answer_meta = {}
+    for name in filters:
+        answer_meta.update(FILTER_META[name])
+    domain = "r%d.%s" % (i, zone)
+    record = {
+        "id": "%024x" % i,
+        "zone": zone,
+        "domain": domain,
+        "type": type,
+        "ttl": 300,
+        "tier": 1,
+        "answers": [],
+        "filters": [
+            {"filter": name, "config": dict(FILTER_CONFIG.get(name, {}))}
+            for name in filters
+        ],
+        "meta": dict(meta or {}),
+    }
+    for j in range(answers):
+        answer = {"answer": _rdata(type, zone, i, j, answer_size)}
+        if answer_meta:
+            answer["meta"] = dict(answer_meta)
+        record["answers"].append(answer)
+    return record
+
+
+def iter_records(zone, records, types=("A",), start=0, **kwargs):
+    """
+    Generate records `start` to `records` of `zone`, cycling through
+    `types`. Other keyword arguments are passed to `make_record`.
+    """
+    types = itertools.islice(itertools.cycle(types), start, None)
+    for i, type in zip(range(start, records), types):
+        yield make_record(zone, i, type, **kwargs)
+
+
+def make_zone(zone, records=0, **kwargs):
+    """
+    A zone retrieve response for `zone`, holding `records` records made by
+    `iter_records`.
+    """
+    body = {
+        "id": "%024x" % 0,
+        "zone": zone,
+        "ttl": 3600,
+        "nx_ttl": 3600,
+        "retry": 7200,
+        "refresh": 43200,
+        "expiry": 1209600,
+        "dns_servers": ["dns1.p01.nsone.net", "dns2.p01.nsone.net"],
+        "networks": [0],
+        "primary": {"enabled": False, "secondaries": []},
+        "meta": {},
+        "records": [],
+    }
+    body["records"].extend(iter_records(zone, records, **kwargs))
+    return body
+
+
+def iter_pages(zone, records, page_size, **kwargs):
+    """
+    Generate the pages of a paginated zone retrieve response: copies of
+    the zone, each holding the next `page_size` records.
+    """
+    for start in range(0, max(records, 1), page_size):
+        page = make_zone(zone)
+        page["records"].extend(
+            iter_records(
+                zone, min(records, start + page_size), start=start, **kwargs
+            )
+        )
+        yield page
@@ -0,0 +1,1001 @@
+#
+# Copyright (c) 2026 NSONE, Inc.
+#
+# License under The MIT License (MIT). See LICENSE in project root.
+#
+"""
+A local stand-in for the NS1 API, for load and pagination testing offline.
+
+It serves the zones, records, stats, monitoring and data endpoints the REST
+classes call, over HTTPS with a throwaway self-signed certificate made at
+start, from an in-memory model of an account. Synthetic zones and
+records are generated on demand rather than stored, so a server holding
+millions of records costs next to no memory. It supports:
+
+* Link pagination of zone lists, zone records and usage stats
+* a token bucket per rate limit bucket, answering with real X-RateLimit-*
+  headers, and a 429 once a bucket is empty
+* injectable latency, and random or scripted error responses
+* gzip compressed responses, if asked for
+
+Use it from a test or benchmark:
+
+    with StandInServer(zones=1000, records_per_zone=100) as server:
+        api = NS1(config=server.config())
+        api.zones().list()
+
+or run it on its own, e.g. to load test from another process:
+
+    python -m ns1.testing.server --port 8443 --zones 50000
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import os
+import random
+import re
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import zlib
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode
+
+from ns1.config import Config
+from ns1.rest.compression import decode_body
+from ns1.rest.rate_limiting import rate_limit_bucket
+
+API_KEY = "stand-in-api-key"
+
+_SYNTHETIC_ZONE = re.compile(r"^z(\d+)\.test$")
+_SYNTHETIC_RECORD = re.compile(r"^r(\d+)\.")
+
+
+class APIError(Exception):
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+        self.message = message
+
+
+def _self_signed_cert(directory):
+    """
+    Write a self-signed certificate for localhost and 127.0.0.1, valid for
+    a day, and its key to a PEM file in `directory`, returning its path.
+    It is made with the cryptography package if installed, or the openssl
+    command otherwise.
+    """
+    path = os.path.join(directory, "localhost.pem")
+    try:
+        import datetime
+        import ipaddress
+
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.x509.oid import NameOID
+    except ImportError:
+        subprocess.run(
+            [
+                "openssl",
+                "req",
+                "-x509",
+                "-newkey",
+                "ec",
+                "-pkeyopt",
+                "ec_paramgen_curve:prime256v1",
+                "-nodes",
+                "-days",
+                "1",
+                "-subj",
+                "/CN=localhost",
+                "-addext",
+                "subjectAltName=DNS:localhost,IP:127.0.0.1",
+                "-keyout",
+                path,
+                "-out",
+                path + ".crt",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        with open(path, "ab") as pem, open(path + ".crt", "rb") as crt:
+            pem.write(crt.read())
+        return path
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    names = [
+        x509.DNSName("localhost"),
+        x509.IPAddress(ipaddress.ip_address("127.0.0.1")),
+    ]
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName(names), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    with open(path, "wb") as f:
+        f.write(
+            key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption(),
+            )
+        )
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    return path
+
+
+def _id(*parts):
+    return "%024x" % zlib.crc32("/".join(parts).encode("utf-8"))
+
+
+def _short_answers(record):
+    return [
+        " ".join(str(a) for a in answer.get("answer", []))
+        for answer in record.get("answers", [])
+    ]
+
+
+def _summary(record):
+    return {
+        "id": record["id"],
+        "domain": record["domain"],
+        "type": record["type"],
+        "ttl": record.get("ttl", 3600),
+        "tier": record.get("tier", 1),
+        "short_answers": _short_answers(record),
+    }
+
+
+class _Zone(object):
+    """
+    A zone whose first `synthetic` records are generated on demand. Records
+    which have been written are stored; synthetic ones which have been
+    deleted are remembered.
+    """
+
+    def __init__(self, name, synthetic=0, fields=None):
+        self.name = name
+        self.synthetic = synthetic
+        self.fields = dict(fields or {})
+        self.records = {}
+        self.deleted = set()
+
+    def body(self):
+        body = {
+            "id": _id(self.name),
+            "zone": self.name,
+            "ttl": 3600,
+            "nx_ttl": 3600,
+            "retry": 7200,
+            "refresh": 43200,
+            "expiry": 1209600,
+            "dns_servers": ["dns1.p01.nsone.net", "dns2.p01.nsone.net"],
+            "networks": [0],
+            "primary": {"enabled": False, "secondaries": []},
+            "meta": {},
+        }
+        body.update(self.fields)
+        return body
+
+    def _syntheticRecord(self, i):
+        domain = "r%d.%s" % (i, self.name)
+        return {
+            "id": _id(self.name, domain, "A"),
+            "zone": self.name,
+            "domain": domain,
+            "type": "A",
+            "ttl": 300,
+            "tier": 1,
+            "answers": [
+                {
+                    "answer": [
+                        "10.%d.%d.%d" % (i >> 16 & 255, i >> 8 & 255, i & 255)
+                    ]
+                }
+            ],
+            "filters": [],
+            "meta": {},
+        }
+
+    def _syntheticIndex(self, domain, type):
+        match = _SYNTHETIC_RECORD.match(domain)
+        if (
+            match is None
+            or type != "A"
+            or domain != "r%s.%s" % (match.group(1), self.name)
+        ):
+            return None
+        i = int(match.group(1))
+        return i if i < self.synthetic else None
+
+    def get(self, domain, type):
+        key = (domain, type)
+        if key in self.records:
+            return self.records[key]
+        i = self._syntheticIndex(domain, type)
+        if i is None or key in self.deleted:
+            return None
+        return self._syntheticRecord(i)
+
+    def put(self, record):
+        self.records[(record["domain"], record["type"])] = record
+        self.deleted.discard((record["domain"], record["type"]))
+
+    def delete(self, domain, type):
+        key = (domain, type)
+        if self.get(domain, type) is None:
+            return False
+        self.records.pop(key, None)
+        if self._syntheticIndex(domain, type) is not None:
+            self.deleted.add(key)
+        return True
+
+    def page(self, start, size):
+        """
+        Records at positions `start` to `start + size` of the zone,
+        synthetic ones first, and whether there are more after them. Pages
+        cover a fixed range of positions, so deleted records make for short
+        pages rather than shifting later ones.
+        """
+        end = start + size
+        out = []
+        for i in range(start, min(end, self.synthetic)):
+            key = ("r%d.%s" % (i, self.name), "A")
+            if key not in self.deleted and key not in self.records:
+                out.append(self._syntheticRecord(i))
+        out.extend(
+            itertools.islice(
+                self.records.values(),
+                max(0, start - self.synthetic),
+                max(0, end - self.synthetic),
+            )
+        )
+        return out, end < self.synthetic + len(self.records)
+
+
+class _Collection(object):
+    """
+    Objects with generated ids, e.g. monitoring jobs or data sources.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._items = {}
+        self._ids = itertools.count(1)
+
+    def list(self):
+        return list(self._items.values())
+
+    def create(self, body, **fields):
+        item = dict(body or {}, **fields)
+        item["id"] = "%024x" % next(self._ids)
+        self._items[item["id"]] = item
+        return item
+
+    def get(self, id):
+        try:
+            return self._items[id]
+        except KeyError:
+            raise APIError(404, "%s not found" % self._name)
+
+    def update(self, id, body):
+        item = self.get(id)
+        item.update(body or {})
+        item["id"] = id
+        return item
+
+    def delete(self, id):
+        self.get(id)
+        del self._items[id]
+        return {}
+
+
+class StandInAPI(object):
+    """
+    The in-memory account behind a `StandInServer`: `zones` synthetic zones
+    named z0.test, z1.test, ... of `records_per_zone` records each, plus
+    any `large_zones`, a dict of zone name to record count. Every handler
+    returns a status, a JSON-able body and whether there is a next page.
+    """
+
+    JOB_TYPES = {
+        "ping": {"shortdesc": "Ping", "config": {"host": "string"}},
+        "tcp": {"shortdesc": "TCP", "config": {"host": "string"}},
+        "http": {"shortdesc": "HTTP/HTTPS", "config": {"url": "string"}},
+    }
+    REGIONS = {
+        "lga": {"code": "lga", "name": "New York"},
+        "sjc": {"code": "sjc", "name": "San Jose"},
+        "ams": {"code": "ams", "name": "Amsterdam"},
+    }
+
+    def __init__(
+        self, zones=0, records_per_zone=0, large_zones=None, page_size=1000
+    ):
+        self.page_size = page_size
+        self._synthetic_zones = zones
+        self._records_per_zone = records_per_zone
+        self._zones = {}
+        self._deleted_zones = set()
+        # zones which are not synthetic, in the order they were created
+        self._extra_zones = []
+        self.jobs = _Collection("monitoring job")
+        self.lists = _Collection("notify list")
+        self.sources = _Collection("data source")
+        self.feeds = {}
+        self.published = 0
+        # the raw (multipart) bodies of zone file imports, by zone
+        self.zone_files = {}
+        self._lock = threading.RLock()
+        for name, count in (large_zones or {}).items():
+            self._zones[name] = _Zone(name, count)
+            self._extra_zones.append(name)
+        self._routes = [
+            ("GET", r"zones", self.listZones),
+            ("GET", r"zones/([^/]+)", self.getZone),
+            ("PUT", r"zones/([^/]+)", self.createZone),
+            ("POST", r"zones/([^/]+)", self.updateZone),
+            ("DELETE", r"zones/([^/]+)", self.deleteZone),
+            ("PUT", r"import/zonefile/([^/]+)", self.importZone),
+            ("GET", r"zones/([^/]+)/([^/]+)/([^/]+)", self.getRecord),
+            ("PUT", r"zones/([^/]+)/([^/]+)/([^/]+)", self.createRecord),
+            ("POST", r"zones/([^/]+)/([^/]+)/([^/]+)", self.updateRecord),
+            ("DELETE", r"zones/([^/]+)/([^/]+)/([^/]+)", self.deleteRecord),
+            ("GET", r"stats/qps(?:/([^/]+))?(?:/([^/]+)/([^/]+))?", self.qps),
+            (
+                "GET",
+                r"stats/usage(?:/([^/]+))?(?:/([^/]+)/([^/]+))?",
+                self.usage,
+            ),
+            ("GET", r"monitoring/jobtypes", self.jobTypes),
+            ("GET", r"monitoring/regions", self.regions),
+            ("GET", r"data/feeds/([^/]+)", self.listFeeds),
+            ("PUT", r"data/feeds/([^/]+)", self.createFeed),
+            ("GET", r"data/feeds/([^/]+)/([^/]+)", self.getFeed),
+            ("POST", r"data/feeds/([^/]+)/([^/]+)", self.updateFeed),
+            ("DELETE", r"data/feeds/([^/]+)/([^/]+)", self.deleteFeed),
+            ("POST", r"feed/([^/]+)", self.publish),
+        ]
+        for root, collection in (
+            ("monitoring/jobs", self.jobs),
+            ("lists", self.lists),
+            ("data/sources", self.sources),
+        ):
+            self._routes.extend(self._crudRoutes(root, collection))
+        self._routes = [
+            (method, re.compile(path), handler)
+            for method, path, handler in self._routes
+        ]
+
+    def _crudRoutes(self, root, collection):
+        one = root + "/([^/]+)"
+        return [
+            ("GET", root, lambda p, b: (200, collection.list(), False)),
+            ("PUT", root, lambda p, b: (200, collection.create(b), False)),
+            ("GET", one, lambda p, b, id: (200, collection.get(id), False)),
+            (
+                "POST",
+                one,
+                lambda p, b, id: (200, collection.update(id, b), False),
+            ),
+            (
+                "DELETE",
+                one,
+                lambda p, b, id: (200, collection.delete(id), False),
+            ),
+        ]
+
+    def handle(self, method, path, params, body):
+        """
+        Answer a request for `path`, which excludes the API version, e.g.
+        "zones/example.com".
+        """
+        for route_method, pattern, handler in self._routes:
+            if route_method != method:
+                continue
+            match = pattern.fullmatch(path)
+            if match is not None:
+                with self._lock:
+                    return handler(params, body, *match.groups())
+        raise APIError(404, "Not Found")
+
+    def _page(self, params):
+        page = int(params.get("page", 0))
+        return page, page * self.page_size
+
+    # zones
+
+    def _zone(self, name):
+        zone = self._zones.get(name)
+        if zone is not None:
+            return zone
+        match = _SYNTHETIC_ZONE.match(name)
+        if (
+            match is None
+            or int(match.group(1)) >= self._synthetic_zones
+            or name in self._deleted_zones
+        ):
+            raise APIError(404, "zone not found")
+        zone = _Zone(name, self._records_per_zone)
+        return zone
+
+    def _isSynthetic(self, name):
+        match = _SYNTHETIC_ZONE.match(name)
+        return match is not None and int(match.group(1)) < (
+            self._synthetic_zones
+        )
+
+    def _stored(self, name):
+        """
+        The zone, stored so that changes to it stick.
+        """
+        zone = self._zone(name)
+        self._zones[name] = zone
+        return zone
+
+    def listZones(self, params, body):
+        _, start = self._page(params)
+        end = start + self.page_size
+        out = [
+            self._zone("z%d.test" % i).body()
+            for i in range(start, min(end, self._synthetic_zones))
+            if "z%d.test" % i not in self._deleted_zones
+        ]
+        first = max(0, start - self._synthetic_zones)
+        last = max(0, end - self._synthetic_zones)
+        names = self._extra_zones[first:last]
+        out.extend(self._zones[name].body() for name in names)
+        total = self._synthetic_zones + len(self._extra_zones)
+        return 200, out, end < total
+
+    def getZone(self, params, body, name):
+        zone = self._zone(name)
+        _, start = self._page(params)
+        records, more = zone.page(start, self.page_size)
+        out = zone.body()
+        out["records"] = [_summary(r) for r in records]
+        return 200, out, more
+
+    def createZone(self, params, body, name):
+        try:
+            self._zone(name)
+        except APIError:
+            pass
+        else:
+            raise APIError(400, "zone already exists")
+        fields = dict(body or {})
+        fields.pop("zone", None)
+        self._deleted_zones.discard(name)
+        self._zones[name] = _Zone(name, fields=fields)
+        if not self._isSynthetic(name):
+            self._extra_zones.append(name)
+        return self.getZone({}, None, name)
+
+    def updateZone(self, params, body, name):
+        zone = self._stored(name)
+        fields = dict(body or {})
+        fields.pop("zone", None)
+        zone.fields.update(fields)
+        return self.getZone({}, None, name)
+
+    def deleteZone(self, params, body, name):
+        self._zone(name)
+        self._zones.pop(name, None)
+        if self._isSynthetic(name):
+            self._deleted_zones.add(name)
+        else:
+            self._extra_zones.remove(name)
+        return 200, {}, False
+
+    def importZone(self, params, body, name):
+        # the zone file itself is kept, but not parsed
+        result = self.createZone(params, {}, name)
+        self.zone_files[name] = body
+        return result
+
+    # records
+
+    def getRecord(self, params, body, zone, domain, type):
+        record = self._zone(zone).get(domain, type)
+        if record is None:
+            raise APIError(404, "record not found")
+        return 200, record, False
+
+    def createRecord(self, params, body, zone, domain, type):
+        stored = self._stored(zone)
+        if stored.get(domain, type) is not None:
+            raise APIError(400, "record already exists")
+        record = dict(body or {})
+        record.update(
+            {
+                "id": _id(zone, domain, type),
+                "zone": zone,
+                "domain": domain,
+                "type": type,
+            }
+        )
+        stored.put(record)
+        return 200, record, False
+
+    def updateRecord(self, params, body, zone, domain, type):
+        stored = self._stored(zone)
+        record = stored.get(domain, type)
+        if record is None:
+            raise APIError(404, "record not found")
+        record = dict(record, **(body or {}))
+        stored.put(record)
+        return 200, record, False
+
+    def deleteRecord(self, params, body, zone, domain, type):
+        if not self._stored(zone).delete(domain, type):
+            raise APIError(404, "record not found")
+        return 200, {}, False
+
+    # stats
+
+    def _queries(self, *parts):
+        return zlib.crc32("/".join(p for p in parts if p).encode("utf-8"))
+
+    def qps(self, params, body, zone=None, domain=None, type=None):
+        if zone is not None:
+            self._zone(zone)
+        qps = self._queries(zone, domain, type) % 1000 / 10.0
+        return 200, {"qps": qps}, False
+
+    def usage(self, params, body, zone=None, domain=None, type=None):
+        period = params.get("period", "24h")
+        if zone is not None:
+            self._zone(zone)
+            entry = {
+                "zone": zone,
+                "period": period,
+                "queries": self._queries(zone, domain, type) % 100000,
+            }
+            if domain is not None:
+                entry.update({"domain": domain, "type": type})
+            return 200, [entry], False
+        status, zones, more = self.listZones(params, None)
+        return (
+            200,
+            [
+                {
+                    "zone": z["zone"],
+                    "period": period,
+                    "queries": self._queries(z["zone"]) % 100000,
+                }
+                for z in zones
+            ],
+            more,
+        )
+
+    # monitoring
+
+    def jobTypes(self, params, body):
+        return 200, self.JOB_TYPES, False
+
+    def regions(self, params, body):
+        return 200, self.REGIONS, False
+
+    # data
+
+    def _feeds(self, sourceid):
+        self.sources.get(sourceid)
+        return self.feeds.setdefault(sourceid, _Collection("data feed"))
+
+    def listFeeds(self, params, body, sourceid):
+        return 200, self._feeds(sourceid).list(), False
+
+    def createFeed(self, params, body, sourceid):
+        return 200, self._feeds(sourceid).create(body), False
+
+    def getFeed(self, params, body, sourceid, feedid):
+        return 200, self._feeds(sourceid).get(feedid), False
+
+    def updateFeed(self, params, body, sourceid, feedid):
+        return 200, self._feeds(sourceid).update(feedid, body), False
+
+    def deleteFeed(self, params, body, sourceid, feedid):
+        return 200, self._feeds(sourceid).delete(feedid), False
+
+    def publish(self, params, body, sourceid):
+        self.sources.get(sourceid)
+        self.published += 1
+        return 200, {}, False
+
+
+class _Bucket(object):
+    """
+    A server-side token bucket: requests are refused, rather than queued,
+    once it is empty.
+    """
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self._tokens = float(limit)
+        self._stamp = time.monotonic()
+
+    def take(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.limit,
+            self._tokens + (now - self._stamp) * self.limit / self.period,
+        )
+        self._stamp = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    @property
+    def remaining(self):
+        return int(self._tokens)
+
+
+class _Unlimited(_Bucket):
+    def take(self):
+        return True
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # clients may open many connections at once
+    request_queue_size = 128
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ns1-stand-in"
+    # headers and body are written separately; don't hold back the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.stand_in.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def _readBody(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b"\r\n", b""):
+                        pass
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.read(2)
+            body = b"".join(chunks)
+        else:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        return decode_body(body, self.headers.get("Content-Encoding"))
+
+    def _handle(self):
+        stand_in = self.server.stand_in
+        body = self._readBody()
+        target, _, query = self.path.partition("?")
+        params = dict(parse_qsl(query))
+        path = "/".join(
+            s for s in target.split("/") if s and s != stand_in.api_version
+        )
+        stand_in._delay()
+
+        bucket = stand_in._bucket(self.command, target)
+        with stand_in._lock:
+            stand_in.requests += 1
+            allowed = bucket.take()
+            remaining = bucket.remaining
+        headers = {
+            "X-RateLimit-By": "customer",
+            "X-RateLimit-Limit": bucket.limit,
+            "X-RateLimit-Period": bucket.period,
+            "X-RateLimit-Remaining": remaining,
+        }
+        more = False
+        try:
+            if not allowed:
+                raise APIError(429, "rate limit exceeded")
+            stand_in._injectError(self.command, path)
+            # JSON bodies come without a Content-Type; uploads are multipart
+            if body[:1] in (b"{", b"["):
+                body = json.loads(body)
+            status, out, more = stand_in.api.handle(
+                self.command, path, params, body
+            )
+        except APIError as e:
+            status, out = e.status, {"message": e.message}
+        except ValueError as e:
+            status, out = 400, {"message": "invalid request: %s" % e}
+        except Exception as e:
+            status, out = 500, {"message": "server error: %r" % e}
+
+        if more:
+            next_params = dict(params, page=int(params.get("page", 0)) + 1)
+            headers["Link"] = '<https://%s%s?%s>; rel="next"' % (
+                self.headers.get("Host", stand_in.netloc),
+                target,
+                urlencode(next_params),
+            )
+        data = json.dumps(out).encode("utf-8")
+        if (
+            stand_in.compress
+            and len(data) > 1024
+            and "gzip" in self.headers.get("Accept-Encoding", "")
+        ):
+            data = gzip.compress(data, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in headers.items():
+            self.send_header(k, str(v))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    do_GET = do_PUT = do_POST = do_DELETE = _handle
+
+
+class StandInServer(object):
+    """
+    Serves a `StandInAPI` over HTTPS on `host`:`port` (a free port by
+    default), from a background thread once started.
+
+    :param int zones: number of synthetic zones, z0.test, z1.test, ...
+    :param int records_per_zone: number of synthetic records in each
+    :param dict large_zones: more zones, mapping name to record count
+    :param int page_size: items per page of paginated responses
+    :param tuple rate_limit: (limit, period) of every rate limit bucket, \
+        or None not to limit requests
+    :param dict bucket_limits: (limit, period) of particular buckets, by \
+        (method, route), e.g. ("GET", "zones/{}")
+    :param latency: seconds to wait before answering, or a (min, max) \
+        range to pick from at random
+    :param float error_rate: fraction of requests to answer with \
+        `error_status` at random
+    :param bool compress: gzip responses when the client asks for it
+    :param int seed: seed for random latency and errors
+    :param str certfile: PEM file holding the certificate to serve and its \
+        key; by default, a throwaway self-signed one is made
+    """
+
+    # reported as the limit when not rate limiting
+    UNLIMITED = 10000
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        zones=0,
+        records_per_zone=0,
+        large_zones=None,
+        page_size=1000,
+        rate_limit=None,
+        bucket_limits=None,
+        latency=0,
+        error_rate=0,
+        error_status=503,
+        compress=False,
+        seed=None,
+        api_version="v1",
+        certfile=None,
+        verbose=False,
+    ):
+        self.api = StandInAPI(zones, records_per_zone, large_zones, page_size)
+        self.api_version = api_version
+        self.rate_limit = rate_limit
+        self.bucket_limits = dict(bucket_limits or {})
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.compress = compress
+        self.verbose = verbose
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._buckets = {}
+        self._failures = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self._httpd = _HTTPServer((host, port), _Handler)
+        self._httpd.stand_in = self
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        if certfile is None:
+            # a fresh certificate, rather than shipping a private key
+            directory = tempfile.mkdtemp(prefix="ns1-stand-in-")
+            try:
+                context.load_cert_chain(_self_signed_cert(directory))
+            finally:
+                shutil.rmtree(directory)
+        else:
+            context.load_cert_chain(certfile)
+        # handshake in the handler's thread, not the one accepting
+        self._httpd.socket = context.wrap_socket(
+            self._httpd.socket,
+            server_side=True,
+            do_handshake_on_connect=False,
+        )
+        self.host, self.port = self._httpd.server_address[:2]
+
+    @property
+    def netloc(self):
+        return "%s:%d" % (self.host, self.port)
+
+    @property
+    def url(self):
+        return "https://%s" % self.netloc
+
+    def config(self, **settings):
+        """
+        A Config for talking to this server, with any extra `settings`.
+        """
+        config = Config()
+        config.createFromAPIKey(API_KEY)
+        config["endpoint"] = self.host
+        config["port"] = str(self.port)
+        config["api_version"] = self.api_version
+        config["ignore-ssl-errors"] = True
+        for k, v in settings.items():
+            config[k] = v
+        return config
+
+    def fail(self, status, times=1, path=None, method=None):
+        """
+        Answer the next `times` requests whose path (without the API
+        version) matches the regular expression `path`, and whose method
+        is `method`, if given, with `status`.
+        """
+        with self._lock:
+            self._failures.append(
+                [status, times, re.compile(path or ".*"), method]
+            )
+
+    def _injectError(self, method, path):
+        with self._lock:
+            for failure in self._failures:
+                status, times, pattern, fail_method = failure
+                if fail_method not in (None, method):
+                    continue
+                if pattern.fullmatch(path):
+                    failure[1] -= 1
+                    if failure[1] <= 0:
+                        self._failures.remove(failure)
+                    raise APIError(status, "injected failure")
+            failed = self.error_rate and self._random.random() < (
+                self.error_rate
+            )
+        if failed:
+            raise APIError(self.error_status, "injected failure")
+
+    def _delay(self):
+        latency = self.latency
+        if isinstance(latency, (tuple, list)):
+            with self._lock:
+                latency = self._random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+
+    def _bucket(self, method, target):
+        key = rate_limit_bucket(method, target, self.api_version)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                limit, period = self.bucket_limits.get(
+                    key, self.rate_limit or (self.UNLIMITED, 1)
+                )
+                if key not in self.bucket_limits and not self.rate_limit:
+                    bucket = _Unlimited(limit, period)
+                else:
+                    bucket = _Bucket(limit, period)
+                self._buckets[key] = bucket
+        return bucket
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--zones", type=int, default=0)
+    parser.add_argument("--records-per-zone", type=int, default=0)
+    parser.add_argument(
+        "--large-zone",
+        action="append",
+        default=[],
+        metavar="NAME=RECORDS",
+        help="add a zone of many records; may be repeated",
+    )
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument(
+        "--rate-limit",
+        metavar="LIMIT/PERIOD",
+        help="token bucket for every rate limit bucket, e.g. 100/1",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        nargs="+",
+        default=[0],
+        help="seconds to wait before answering, or a min and max",
+    )
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--compress", action="store_true")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    large_zones = {}
+    for spec in args.large_zone:
+        name, _, count = spec.partition("=")
+        large_zones[name] = int(count)
+    rate_limit = None
+    if args.rate_limit:
+        limit, _, period = args.rate_limit.partition("/")
+        rate_limit = (int(limit), int(period or 1))
+    latency = args.latency[0] if len(args.latency) == 1 else args.latency[:2]
+
+    server = StandInServer(
+        host=args.host,
+        port=args.port,
+        zones=args.zones,
+        records_per_zone=args.records_per_zone,
+        large_zones=large_zones,
+        page_size=args.page_size,
+        rate_limit=rate_limit,
+        latency=latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        compress=args.compress,
+        seed=args.seed,
+        verbose=args.verbose,
+    )
+    # the first line tells a parent process where to connect
+    print("listening on %s" % server.url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -101,8 +101,9 @@ class Zone(object):
         :attr:`ns1.rest.zones.Zones.PASSTHRU_FIELDS`
         Use `name` to pass a unique name for the zone otherwise this will
         default to the zone FQDN.
-        If zoneFile is passed, it should be a zone text file on the local
-        disk that will be used to populate the created zone file. When a
+        If zoneFile is passed, it is a zone file used to populate the created
+        zone: a path on the local disk (decompressed on the fly if it ends in
+        .gz or .zst), bytes, a file object, or an iterable of lines. When a
         zoneFile is passed only `name` and
         :attr:`ns1.rest.zones.Zones.ZONEFILE_FIELDS` are supported.
         """
@@ -116,7 +117,7 @@ class Zone(object):
             else:
                 return self
 
-        if zoneFile:
+        if zoneFile is not None:
             return self._rest.import_file(
                 self.zone,
                 zoneFile,
@@ -26,6 +26,10 @@ setup(
         "pytest-runner",
         "wheel",
     ],
+    extras_require={
+        # uploading zone files compressed with zstd (.zst)
+        "zstd": ["zstandard"],
+    },
     tests_require=[
         "pytest",
         "pytest-pep8",
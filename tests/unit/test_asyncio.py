@@ -0,0 +1,424 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from ns1.config import Config
+from ns1.rest.errors import AuthException, ResourceException
+from ns1.rest.resource import BaseResource
+from ns1.rest.transport.asyncio import AsyncioResponse, AsyncioTransport
+
+try:  # Python 3.3 +
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+@pytest.fixture
+def asyncio_config():
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "asyncio"
+    return config
+
+
+async def serve(responses, seen):
+    """
+    start a keep-alive HTTP/1.1 server on localhost answering each request
+    with the next of `responses`, a list of (status, headers, body)
+    """
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        while responses:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            length = 0
+            chunked = False
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                k, v = line.decode().split(":", 1)
+                if k.lower() == "content-length":
+                    length = int(v)
+                elif k.lower() == "transfer-encoding":
+                    chunked = v.strip() == "chunked"
+            if chunked:
+                body = b""
+                while True:
+                    size = int(await reader.readline(), 16)
+                    body += (await reader.readexactly(size + 2))[:size]
+                    if not size:
+                        break
+            else:
+                body = await reader.readexactly(length)
+            seen.append((request_line.decode().split()[:2], body))
+            status, headers, out = responses.pop(0)
+            head = ["HTTP/1.1 %d X" % status, "Content-Length: %d" % len(out)]
+            head.extend("%s: %s" % h for h in headers.items())
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + out)
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, port, connections
+
+
+def test_asyncio_transport(asyncio_config):
+    """
+    it should get transport from config
+    it should reuse one connection for sequential requests
+    it should call rate_limit_func and callback with decoded json
+    """
+    resource = BaseResource(asyncio_config)
+    transport = resource._transport
+    assert isinstance(transport, AsyncioTransport)
+    transport._rate_limit_func = mock.Mock(return_value=None)
+
+    async def run():
+        seen = []
+        responses = [
+            (200, {"X-RateLimit-Remaining": "5"}, b'{"a": 1}'),
+            (200, {}, b""),
+        ]
+        server, port, connections = await serve(responses, seen)
+        url = "http://127.0.0.1:%d/v1/zones" % port
+        first = await transport.send(
+            "PUT", url, data=json.dumps({"zone": "z"}), callback=lambda j: j
+        )
+        second = await transport.send("DELETE", url, params={"q": "x"})
+        transport.close()
+        server.close()
+        return first, second, seen, connections
+
+    first, second, seen, connections = asyncio.run(run())
+    assert first == {"a": 1}
+    assert second is None
+    assert seen == [
+        (["PUT", "/v1/zones"], b'{"zone": "z"}'),
+        (["DELETE", "/v1/zones?q=x"], b""),
+    ]
+    assert len(connections) == 1
+    transport._rate_limit_func.assert_any_call(
+        {"by": "customer", "limit": 10, "period": 1, "remaining": 5}
+    )
+
+
+def test_asyncio_transport_across_loops(asyncio_config):
+    """
+    it should drop connections pooled on an earlier, closed loop
+    """
+    transport = BaseResource(asyncio_config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+
+    async def run():
+        server, port, _ = await serve([(200, {}, b'{"a": 1}')], [])
+        try:
+            return await transport.send(
+                "GET", "http://127.0.0.1:%d/" % port, callback=lambda j: j
+            )
+        finally:
+            server.close()
+
+    assert asyncio.run(run()) == {"a": 1}
+    assert transport._pool
+    assert asyncio.run(run()) == {"a": 1}
+    transport.close()
+    assert transport._pool == {}
+
+
+def test_asyncio_transport_errors(asyncio_config):
+    resource = BaseResource(asyncio_config)
+    transport = resource._transport
+
+    callback = mock.Mock()
+
+    async def run(errback=None):
+        server, port, _ = await serve([(401, {}, b"{}")], [])
+        try:
+            return await transport.send(
+                "GET",
+                "http://127.0.0.1:%d/" % port,
+                callback=callback,
+                errback=errback,
+            )
+        finally:
+            transport.close()
+            server.close()
+
+    with pytest.raises(AuthException):
+        asyncio.run(run())
+
+    errback = mock.Mock(return_value="handled")
+    assert asyncio.run(run(errback)) == "handled"
+    assert errback.call_args[0][0].status == 401
+    callback.assert_not_called()
+
+
+def test_asyncio_transport_pagination_errback(asyncio_config):
+    """
+    it should stop following pagination once the errback has been called
+    """
+    asyncio_config["follow_pagination"] = True
+    transport = BaseResource(asyncio_config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    pagination_handler = mock.Mock()
+    callback = mock.Mock()
+
+    responses = [
+        (200, {"link": "<http://a.co/b>; rel=next;"}, b"[1]"),
+        (500, {"link": "<http://a.co/c>; rel=next;"}, b"{}"),
+    ]
+
+    async def _request(method, url, headers, body, dest=None):
+        status, headers, body = responses.pop(0)
+        return AsyncioResponse(method, url, status, "X", headers, body)
+
+    transport._request = _request
+
+    async def run():
+        return await transport.send(
+            "GET",
+            "https://a.co/a",
+            callback=callback,
+            errback=lambda resp: resp.status,
+            pagination_handler=pagination_handler,
+        )
+
+    assert asyncio.run(run()) == 500
+    pagination_handler.assert_not_called()
+    callback.assert_not_called()
+
+
+def test_asyncio_transport_pagination_after_upload(asyncio_config):
+    """
+    it should fetch later pages with a plain GET, without the upload
+    """
+    asyncio_config["follow_pagination"] = True
+    transport = BaseResource(asyncio_config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    seen = []
+    responses = [
+        (200, {"link": "<http://a.co/b>; rel=next;"}, b"[1]"),
+        (200, {}, b"[2]"),
+    ]
+
+    async def _request(method, url, headers, body, dest=None):
+        seen.append((method, url, headers, body))
+        status, headers, body = responses.pop(0)
+        return AsyncioResponse(method, url, status, "X", headers, body)
+
+    transport._request = _request
+    files = [("zonefile", ("a.zone", io.BytesIO(b"a"), "text/plain"))]
+
+    res = asyncio.run(
+        transport.send(
+            "PUT",
+            "https://a.co/a",
+            headers={"X-Test": "1"},
+            files=files,
+            pagination_handler=lambda a, b: a + b,
+        )
+    )
+    assert res == [1, 2]
+    assert seen[0][0] == "PUT"
+    assert seen[1][:2] == ("GET", "https://a.co/b")
+    assert seen[1][2] == {"X-Test": "1"}
+    assert seen[1][3] is None
+
+
+def test_asyncio_transport_pagination(asyncio_config):
+    asyncio_config["follow_pagination"] = True
+    resource = BaseResource(asyncio_config)
+    transport = resource._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+
+    pages = [
+        ({"link": "<http://a.co/b>; rel=next;"}, [{"1st": ""}]),
+        ({"link": "<http://a.co/c>; rel=next;"}, [{"2nd": ""}]),
+        ({}, [{"3rd": ""}]),
+    ]
+
+    async def _send(method, url, headers, body, errback, skip_json_parsing):
+        return pages.pop(0)
+
+    transport._send = _send
+
+    def pagination_handler(jsonOut, next_json):
+        jsonOut.extend(next_json)
+        return jsonOut
+
+    res = asyncio.run(
+        resource._make_request(
+            "GET", "my_path", pagination_handler=pagination_handler
+        )
+    )
+    assert res == [{"1st": ""}, {"2nd": ""}, {"3rd": ""}]
+
+
+def test_asyncio_transport_rate_limiting(asyncio_config):
+    """
+    it should wait out the rate limit delay with asyncio.sleep
+    """
+    transport = BaseResource(asyncio_config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=0.01)
+
+    async def run():
+        server, port, _ = await serve([(200, {}, b"{}")], [])
+        try:
+            with mock.patch("asyncio.sleep", mock.AsyncMock()) as sleep:
+                await transport.send("GET", "http://127.0.0.1:%d/" % port)
+            return sleep
+        finally:
+            transport.close()
+            server.close()
+
+    asyncio.run(run()).assert_awaited_once_with(0.01)
+
+
+def test_asyncio_transport_iter_pages(asyncio_config):
+    resource = BaseResource(asyncio_config)
+    transport = resource._transport
+
+    pages = [
+        ({"link": "<http://a.co/b>; rel=next;"}, {"records": [1, 2]}),
+        ({}, {"records": [3]}),
+    ]
+
+    async def _send(method, url, headers, body, errback, skip_json_parsing):
+        return pages.pop(0)
+
+    transport._send = _send
+
+    async def run():
+        items = resource._iter_request("GET", "zones/a.com", "records")
+        return [item async for item in items]
+
+    assert asyncio.run(run()) == [1, 2, 3]
+
+
+def test_asyncio_transport_download(asyncio_config):
+    """
+    it should write the raw body to the destination
+    it should not write error bodies to the destination
+    """
+    import io
+
+    transport = BaseResource(asyncio_config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    body = bytes(range(256)) * 1024
+
+    async def run():
+        seen = []
+        responses = [(200, {}, body), (404, {}, b'{"message": "gone"}')]
+        server, port, connections = await serve(responses, seen)
+        url = "http://127.0.0.1:%d/v1/report" % port
+        dest = io.BytesIO()
+        written = await transport.download("GET", url, dest)
+        assert written == len(body)
+        assert dest.getvalue() == body
+
+        dest = io.BytesIO()
+        with pytest.raises(ResourceException, match="gone"):
+            await transport.download("GET", url, dest)
+        assert dest.getvalue() == b""
+        assert len(connections) == 1
+        transport.close()
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_asyncio_transport_upload(asyncio_config):
+    """
+    it should stream file uploads and close the files
+    """
+    import io
+
+    transport = BaseResource(asyncio_config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    zone = b"a.com. 60 IN A 1.2.3.4\n" * 10000
+
+    async def run():
+        seen = []
+        server, port, connections = await serve([(200, {}, b"{}")], seen)
+        url = "http://127.0.0.1:%d/v1/import/zonefile/a.com" % port
+        f = io.BytesIO(zone)
+        files = [("zonefile", ("a.zone", f, "text/plain"))]
+        assert await transport.send("PUT", url, files=files) == {}
+        assert f.closed
+        assert zone in seen[0][1]
+        transport.close()
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_asyncio_transport_upload_unknown_length(asyncio_config):
+    """
+    it should send uploads of unknown length chunked
+    """
+    import io
+
+    transport = BaseResource(asyncio_config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    lines = ["a.com. 60 IN A 1.2.3.%d\n" % i for i in range(200)]
+    sources = [
+        io.StringIO("".join(lines)),
+        (line for line in lines),
+    ]
+
+    async def run():
+        seen = []
+        responses = [(200, {}, b"{}") for _ in sources]
+        server, port, connections = await serve(responses, seen)
+        url = "http://127.0.0.1:%d/v1/import/zonefile/a.com" % port
+        for source in sources:
+            files = [("zonefile", ("a.zone", source, "text/plain"))]
+            assert await transport.send("PUT", url, files=files) == {}
+        for _, body in seen:
+            assert "".join(lines).encode() in body
+        transport.close()
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_asyncio_transport_compression(asyncio_config):
+    """
+    it should decode compressed responses, whole and downloaded
+    it should gzip large request bodies when configured to
+    """
+    import gzip
+    import io
+
+    asyncio_config["compress_requests_over"] = 1024
+    transport = BaseResource(asyncio_config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    items = [{"zone": "z%d.com" % i} for i in range(500)]
+    body = gzip.compress(json.dumps(items).encode("utf-8"))
+
+    async def run():
+        seen = []
+        gzipped = {"Content-Encoding": "gzip"}
+        responses = [(200, gzipped, body)] * 2 + [(200, {}, b"{}")]
+        server, port, connections = await serve(responses, seen)
+        url = "http://127.0.0.1:%d/v1/zones" % port
+        assert await transport.send("GET", url) == items
+        dest = io.BytesIO()
+        written = await transport.download("GET", url, dest)
+        assert json.loads(dest.getvalue()) == items
+        assert written == len(dest.getvalue())
+
+        await transport.send("PUT", url, data=json.dumps(items))
+        assert json.loads(gzip.decompress(seen[2][1])) == items
+        assert len(connections) == 1
+        transport.close()
+        server.close()
+
+    asyncio.run(run())
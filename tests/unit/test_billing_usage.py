@@ -24,6 +24,29 @@ def billing_usage_config(config):
     return config
 
 
+@pytest.mark.parametrize(
+    "transport", ["basic", "requests", "asyncio", "twisted", "loopback"]
+)
+def test_billing_usage_after_other_resources(billing_usage_config, transport):
+    """
+    it should copy a config whose transports are already in use
+    """
+    import importlib.util
+
+    if transport in ("requests", "twisted"):
+        if importlib.util.find_spec(transport) is None:
+            pytest.skip("%s not found" % transport)
+    billing_usage_config["transport"] = transport
+    billing_usage_config["retries"] = 2
+    api = NS1(config=billing_usage_config)
+    zones = api.zones()
+    usage = api.billing_usage()
+    assert usage._config["api_version_before_resource"] is False
+    assert billing_usage_config["api_version_before_resource"] is True
+    assert usage._transport is not zones._transport
+    assert api.zones()._transport is zones._transport
+
+
 @pytest.mark.parametrize("url", ["billing-usage/queries"])
 def test_rest_get_billing_usage_for_queries(billing_usage_config, url):
     z = NS1(config=billing_usage_config).billing_usage()
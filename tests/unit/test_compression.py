@@ -0,0 +1,99 @@
+import gzip
+import zlib
+
+import pytest
+
+from ns1.rest.compression import (
+    ACCEPT_ENCODING,
+    compress_body,
+    decode_body,
+    decode_chunks,
+    get_decoder,
+    have_brotli,
+)
+
+BODY = b'{"records": [%s]}' % b", ".join(
+    b'{"domain": "r%d.example.com", "type": "A"}' % i for i in range(1000)
+)
+
+
+def split(data, size=7):
+    chunks = []
+    for start in range(0, len(data), size):
+        end = start + size
+        chunks.append(data[start:end])
+    return chunks
+
+
+def deflate(data, raw=False):
+    obj = zlib.compressobj(wbits=-zlib.MAX_WBITS if raw else zlib.MAX_WBITS)
+    return obj.compress(data) + obj.flush()
+
+
+def test_accept_encoding():
+    assert ACCEPT_ENCODING.startswith("gzip, deflate")
+    assert ("br" in ACCEPT_ENCODING) == have_brotli
+
+
+@pytest.mark.parametrize("header", [None, "", "identity", "Identity"])
+def test_identity(header):
+    assert get_decoder(header) is None
+    assert decode_body(BODY, header) == BODY
+
+
+@pytest.mark.parametrize(
+    "header,encoded",
+    [
+        ("gzip", gzip.compress(BODY)),
+        ("GZIP", gzip.compress(BODY)),
+        ("x-gzip", gzip.compress(BODY)),
+        ("deflate", deflate(BODY)),
+        ("deflate", deflate(BODY, raw=True)),
+        ("deflate, gzip", gzip.compress(deflate(BODY))),
+    ],
+)
+def test_decode(header, encoded):
+    """
+    it should decode whole bodies
+    it should decode bodies split at any point
+    """
+    assert decode_body(encoded, header) == BODY
+    chunks = decode_chunks(split(encoded), get_decoder(header))
+    assert b"".join(chunks) == BODY
+
+
+@pytest.mark.skipif(not have_brotli, reason="brotli not found")
+def test_decode_brotli():
+    import brotli
+
+    encoded = brotli.compress(BODY)
+    assert decode_body(encoded, "br") == BODY
+    assert b"".join(decode_chunks(split(encoded), get_decoder("br"))) == BODY
+
+
+def test_unsupported_encoding():
+    with pytest.raises(ValueError, match="compress"):
+        get_decoder("compress")
+
+
+def test_compress_body():
+    """
+    it should leave bodies alone when not configured
+    it should leave small, streamed or already encoded bodies alone
+    it should gzip large bodies, without changing the caller's headers
+    """
+    headers = {"X-NSONE-Key": "key"}
+    text = BODY.decode("utf-8")
+    assert compress_body(headers, text, None) == (headers, text)
+    assert compress_body(headers, text, len(BODY) + 1) == (headers, text)
+    chunks = iter([BODY])
+    assert compress_body(headers, chunks, 0) == (headers, chunks)
+    encoded = {"Content-Encoding": "br"}
+    assert compress_body(encoded, BODY, 0) == (encoded, BODY)
+
+    for data in (text, BODY):
+        new_headers, body = compress_body(headers, data, len(BODY))
+        assert new_headers == dict(headers, **{"Content-Encoding": "gzip"})
+        assert gzip.decompress(body) == BODY
+        assert len(body) < len(BODY) / 10
+    assert headers == {"X-NSONE-Key": "key"}
@@ -84,3 +84,31 @@ def test_load_from_str(config):
     assert config.getAPIKey() == key_cfg["keys"][key_cfg["default_key"]]["key"]
     endpoint = f'https://{defaults["endpoint"]}'
     assert config.getEndpoint() == endpoint
+
+
+def test_memoize(config):
+    """
+    it should build a value once
+    it should build it again after the key or config changes
+    """
+    config.loadFromDict(
+        {
+            "default_key": "test1",
+            "keys": {"test1": {"key": "key-1"}, "test2": {"key": "key-2"}},
+        }
+    )
+    calls = []
+
+    def build():
+        calls.append(config.getAPIKey())
+        return calls[-1]
+
+    assert config.memoize("key", build) == "key-1"
+    assert config.memoize("key", build) == "key-1"
+    assert calls == ["key-1"]
+
+    config.useKeyID("test2")
+    assert config.memoize("key", build) == "key-2"
+    config["endpoint"] = "api.example.com"
+    assert config.memoize("key", build) == "key-2"
+    assert calls == ["key-1", "key-2", "key-2"]
@@ -118,6 +118,14 @@ def test_rest_datasets_delete(datasets_config, dtId, url):
     )
 
 
+def test_rest_datasets_download_report(datasets_config):
+    z = NS1(config=datasets_config).datasets()
+    z._download = mock.MagicMock()
+    dest = object()
+    z.downloadReport("dt1", "rp1", dest)
+    z._download.assert_called_once_with("datasets/dt1/reports/rp1", dest)
+
+
 def test_rest_datasets_buildbody(datasets_config):
     z = ns1.rest.datasets.Datasets(datasets_config)
     kwargs = {
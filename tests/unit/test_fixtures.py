@@ -0,0 +1,59 @@
+import pytest
+
+from ns1.rest.zones import zone_retrieve_pagination
+from ns1.testing.fixtures import iter_pages, make_record, make_zone
+
+
+def test_make_zone():
+    """
+    it should cycle through record types
+    it should make the requested answers, padding and filters
+    """
+    zone = make_zone(
+        "a.com",
+        records=7,
+        types=("A", "MX", "TXT"),
+        answers=2,
+        answer_size=40,
+        filters=("up", "select_first_n"),
+    )
+    records = zone["records"]
+    assert [r["type"] for r in records] == [
+        "A",
+        "MX",
+        "TXT",
+        "A",
+        "MX",
+        "TXT",
+        "A",
+    ]
+    assert records[6]["domain"] == "r6.a.com"
+    assert len({r["id"] for r in records}) == 7
+    assert records[1]["answers"][1]["answer"] == [20, "mx1.a.com"]
+    assert len(records[2]["answers"][0]["answer"][0]) == 40
+    assert records[0]["answers"][0]["meta"] == {"up": True}
+    assert records[0]["filters"] == [
+        {"filter": "up", "config": {}},
+        {"filter": "select_first_n", "config": {"N": 1}},
+    ]
+
+
+def test_make_record_defaults():
+    record = make_record("a.com", 3)
+    assert record["answers"] == [{"answer": ["10.0.0.24"]}]
+    assert record["filters"] == []
+    with pytest.raises(ValueError):
+        make_record("a.com", 0, "NAPTR")
+
+
+def test_iter_pages():
+    """
+    it should split the zone into pages which merge back into it
+    """
+    pages = list(iter_pages("a.com", 25, 10, types=("A", "AAAA")))
+    assert [len(p["records"]) for p in pages] == [10, 10, 5]
+    merged = pages[0]
+    for page in pages[1:]:
+        merged = zone_retrieve_pagination(merged, page)
+    assert merged == make_zone("a.com", 25, types=("A", "AAAA"))
+    assert len(list(iter_pages("a.com", 0, 10))) == 1
@@ -0,0 +1,136 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import ns1
+from ns1.rest.transport.base import TransportBase
+
+# cumulative microseconds `import ns1` may take, as reported by python -X
+# importtime. It takes about 20ms on a laptop; the rest is slack for slow
+# CI machines.
+IMPORT_BUDGET = 75000
+
+# libraries, and parts of the SDK, `import ns1` must leave for first use
+DEFERRED = [
+    "asyncio",
+    "brotli",
+    "hashlib",
+    "http.client",
+    "ns1.alerting",
+    "ns1.rest.transport",
+    "orjson",
+    "requests",
+    "ssl",
+    "tempfile",
+    "twisted",
+    "ujson",
+    "urllib3",
+    "zstandard",
+]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(ns1.__file__)))
+
+
+def run(code, *options):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run(
+        [sys.executable] + list(options) + ["-c", code],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def imported(code, names=DEFERRED):
+    """
+    The modules of `names` imported by running `code`, leaving out those
+    already imported at startup (e.g. by .pth files).
+    """
+    code = "import sys, json\nstartup = set(sys.modules)\n%s\n%s" % (
+        code,
+        "print(json.dumps(sorted(set(sys.modules) - startup)))",
+    )
+    modules = json.loads(run(code).stdout)
+    return [m for m in names if m in modules]
+
+
+def test_import_budget():
+    def import_time():
+        lines = run("import ns1", "-X", "importtime").stderr.splitlines()
+        line = next(line for line in lines if line.endswith("| ns1"))
+        return int(line.split("|")[1])
+
+    # the quickest of a few runs, as the first may compile bytecode
+    assert min(import_time() for _ in range(3)) < IMPORT_BUDGET
+
+
+def test_import_defers_backends():
+    assert imported("import ns1") == []
+
+
+def test_transports_load_on_first_use():
+    """
+    it should only import the transport asked for
+    """
+    code = """
+import ns1
+config = ns1.Config()
+config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+config["transport"] = "loopback"
+ns1.NS1(config=config).zones()
+"""
+    transports = [
+        "ns1.rest.transport.%s" % name
+        for name in ("asyncio", "basic", "loopback", "requests", "twisted")
+    ]
+    assert imported(code) == ["ns1.rest.transport"]
+    assert imported(code, transports) == ["ns1.rest.transport.loopback"]
+
+
+def test_package_names_load_their_transport_only():
+    """
+    it should import only the transport defining a name looked up on the
+    package, and nothing for unknown names
+    """
+    transports = [
+        "ns1.rest.transport.%s" % name
+        for name in ("asyncio", "basic", "loopback", "requests", "twisted")
+    ]
+    code = """
+import ns1.rest.transport
+assert not hasattr(ns1.rest.transport, "Nope")
+"""
+    assert imported(code, transports) == []
+    code = "from ns1.rest.transport import LoopbackTransport"
+    assert imported(code, transports) == ["ns1.rest.transport.loopback"]
+
+
+def test_registry():
+    """
+    it should load built-in transports when looked up
+    it should know nothing of other names until registered
+    it should still expose the transports' names on the package
+    """
+    from ns1.rest.transport import BasicTransport
+    from ns1.rest.transport.basic import BasicTransport as basic
+
+    assert "basic" in TransportBase.REGISTRY
+    assert TransportBase.REGISTRY["basic"] is basic is BasicTransport
+    assert "nope" not in TransportBase.REGISTRY
+    assert TransportBase.REGISTRY.get("nope") is None
+    with pytest.raises(KeyError):
+        TransportBase.REGISTRY["nope"]
+    with pytest.raises(ImportError):
+        from ns1.rest.transport import Nope  # noqa: F401
+
+    TransportBase.REGISTRY["nope"] = basic
+    try:
+        assert TransportBase.REGISTRY.get("nope") is basic
+    finally:
+        del TransportBase.REGISTRY["nope"]
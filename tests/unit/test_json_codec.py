@@ -0,0 +1,113 @@
+import pytest
+
+from ns1.config import Config, ConfigException
+from ns1.rest.errors import RateLimitException, ResourceException
+from ns1.rest.json_codec import (
+    CODECS,
+    STDLIB,
+    get_codec,
+    have_orjson,
+    have_ujson,
+)
+from ns1.rest.resource import BaseResource
+
+try:  # Python 3.3 +
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+DOC = {
+    "zone": "a.com",
+    "records": [{"domain": "é.a.com", "ttl": 60, "meta": None}],
+    "link": "https://a.com/x",
+    "ratio": 0.5,
+    "enabled": True,
+}
+
+available = [name for name, codec in CODECS.items() if codec is not None]
+
+
+@pytest.mark.parametrize("name", available)
+def test_codec_round_trip(name):
+    """
+    it should encode to str and decode from str or bytes, like the stdlib
+    """
+    codec = get_codec(name)
+    text = codec.dumps(DOC)
+    assert isinstance(text, str)
+    assert STDLIB.loads(text) == DOC
+    assert codec.loads(text) == DOC
+    assert codec.loads(text.encode("utf-8")) == DOC
+    assert codec.loads(codec.dumps({1: "a"})) == {"1": "a"}
+    with pytest.raises(ValueError):
+        codec.loads(b"{")
+
+
+def test_get_codec_fallback():
+    """
+    it should fall back to the stdlib if the library is missing
+    it should raise for unknown codecs
+    """
+    with mock.patch.dict(CODECS, {"orjson": None, "ujson": None}):
+        assert get_codec("orjson") is STDLIB
+        assert get_codec("auto") is STDLIB
+    with pytest.raises(KeyError):
+        get_codec("yaml")
+
+
+@pytest.mark.skipif(not have_orjson, reason="orjson not found")
+def test_get_codec_auto():
+    assert get_codec("auto").name == "orjson"
+
+
+def test_config_json_codec():
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    assert config.getJSONCodec() is STDLIB
+    config["json_codec"] = "yaml"
+    with pytest.raises(ConfigException):
+        config.getJSONCodec()
+
+
+@pytest.mark.skipif(
+    not (have_orjson or have_ujson), reason="orjson/ujson not found"
+)
+def test_json_codec_used_for_requests():
+    """
+    it should encode request bodies and decode responses with the codec
+    """
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "basic"
+    config["json_codec"] = "auto"
+
+    resource = BaseResource(config)
+    codec = resource._codec
+    assert codec is not STDLIB
+    assert resource._transport._codec is codec
+
+    response = mock.Mock(status=200, headers={})
+    resource._transport._pool.urlopen = mock.Mock(
+        return_value=(response, b'{"id": 1}')
+    )
+    resource._transport._rate_limit_func = mock.Mock(return_value=None)
+    with mock.patch.object(codec, "dumps", return_value="{}") as dumps:
+        with mock.patch.object(codec, "loads", return_value={}) as loads:
+            resource._make_request("PUT", "zones/a.com", body={"ttl": 1})
+    dumps.assert_called_once_with({"ttl": 1})
+    loads.assert_called_once_with(b'{"id": 1}')
+
+
+def test_resource_exception_codec():
+    """
+    it should unwrap the error message with the given codec
+    """
+    codec = mock.Mock()
+    codec.loads.return_value = {"message": "zone not found"}
+    e = ResourceException("server error", None, b"...", codec)
+    assert str(e) == "server error: zone not found"
+    e = RateLimitException("rate limit exceeded", None, b"...", codec=codec)
+    assert str(e) == "rate limit exceeded: zone not found"
+    e = ResourceException("server error", None, b'{"message": "gone"}')
+    assert str(e) == "server error: gone"
@@ -0,0 +1,157 @@
+import io
+
+import pytest
+
+from ns1 import NS1
+from ns1.config import Config
+from ns1.rest.errors import RateLimitException, ResourceException
+from ns1.rest.transport.base import TransportBase
+from ns1.rest.transport.loopback import LoopbackTransport
+
+try:  # Python 3.3 +
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+@pytest.fixture
+def loopback_config():
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "loopback"
+    return config
+
+
+def test_registered():
+    assert TransportBase.REGISTRY["loopback"] is LoopbackTransport
+
+
+def test_canned_responses(loopback_config):
+    """
+    it should answer from the most recent matching route
+    it should answer with fresh objects every time
+    it should answer unmatched requests with a 404
+    it should record the requests made
+    """
+    api = NS1(config=loopback_config)
+    zones = api.zones()
+    transport = zones._transport
+    transport.route("GET", "zones/[^/]+", body={"zone": "any", "records": []})
+    transport.route("GET", "zones/a.com", body={"zone": "a.com"})
+
+    assert zones.retrieve("b.com") == {"zone": "any", "records": []}
+    first = zones.retrieve("a.com")
+    first["zone"] = "changed"
+    assert zones.retrieve("a.com") == {"zone": "a.com"}
+
+    with pytest.raises(ResourceException, match="Not Found"):
+        zones.delete("a.com")
+
+    request = transport.history[-1]
+    assert request.method == "DELETE"
+    assert request.path == "zones/a.com"
+    assert request.headers["X-NSONE-Key"] == "AAAAAAAAAAAAAAAAA"
+    assert len(transport.history) == 4
+
+
+def test_handler(loopback_config):
+    """
+    it should pass requests to handlers and answer with their result
+    """
+    api = NS1(config=loopback_config)
+    records = api.records()
+    transport = records._transport
+
+    def handler(request):
+        body = request.json()
+        body["id"] = "1234"
+        return 200, {"X-Request": request.params.get("x", "")}, body
+
+    transport.route("PUT", "zones/.*", handler=handler)
+    result = records.create("a.com", "www.a.com", "A", answers=["1.2.3.4"])
+    assert result["id"] == "1234"
+    assert result["domain"] == "www.a.com"
+    assert transport.history[-1].json()["answers"] == [{"answer": ["1.2.3.4"]}]
+
+
+def test_pagination(loopback_config):
+    """
+    it should serve pages by following Link headers
+    """
+    loopback_config["follow_pagination"] = True
+    api = NS1(config=loopback_config)
+    zones = api.zones()
+    transport = zones._transport
+    pages = [
+        [{"zone": "z%d.com" % (i * 2 + j)} for j in (0, 1)] for i in (0, 1, 2)
+    ]
+    transport.route("GET", "zones", pages=pages)
+
+    assert zones.list() == [z for page in pages for z in page]
+    assert list(zones.iter_list()) == [z for page in pages for z in page]
+    assert transport.history[-1].params == {"page": "2"}
+
+
+def test_rate_limiting(loopback_config):
+    """
+    it should report rate limit headers
+    it should refuse requests once a bucket is empty
+    it should keep a bucket per route
+    """
+    loopback_config["loopback_rate_limit"] = [2, 3600]
+    transport = NS1(config=loopback_config).zones()._transport
+    transport.route("*", ".*", body={})
+    seen = []
+    transport._rate_limit_func = seen.append
+
+    url = "https://api.nsone.net/v1/zones/a.com"
+    transport.send("GET", url)
+    transport.send("GET", url)
+    assert [rl["remaining"] for rl in seen] == [1, 0]
+    assert seen[0]["limit"] == 2
+    with pytest.raises(RateLimitException) as e:
+        transport.send("GET", url)
+    assert e.value.remaining == 0
+    transport.send("GET", "https://api.nsone.net/v1/zones/a.com/versions")
+    transport.send("PUT", url)
+
+
+def test_download(loopback_config):
+    transport = NS1(config=loopback_config).zones()._transport
+    body = bytes(range(256)) * 1024
+    transport.route("GET", "zones/a.com/file", body=body)
+    dest = io.BytesIO()
+    url = "https://api.nsone.net/v1/zones/a.com/file"
+    assert transport.download("GET", url, dest) == len(body)
+    assert dest.getvalue() == body
+
+
+def test_errback(loopback_config):
+    """
+    it should return the errback's result instead of calling the callback
+    it should stop following pagination once the errback has been called
+    """
+    loopback_config["follow_pagination"] = True
+    transport = NS1(config=loopback_config).zones()._transport
+    url = "https://api.nsone.net/v1/zones"
+
+    def handler(request):
+        if "page" in request.params:
+            return 500, {}, {"message": "broken"}
+        return 200, {"Link": "<%s?page=1>; rel=next;" % url}, [{"zone": "a"}]
+
+    transport.route("GET", "zones", handler=handler)
+    callback = mock.Mock()
+    pagination_handler = mock.Mock()
+
+    result = transport.send(
+        "GET",
+        url,
+        callback=callback,
+        errback=lambda resp: resp.status,
+        pagination_handler=pagination_handler,
+    )
+    assert result == 500
+    assert transport.history[-1].params == {"page": "1"}
+    pagination_handler.assert_not_called()
+    callback.assert_not_called()
@@ -0,0 +1,179 @@
+import gzip
+import io
+
+import pytest
+
+from ns1.rest.multipart import (
+    MultipartBody,
+    have_zstandard,
+    open_upload,
+)
+
+EXPECTED = (
+    b"--xyz\r\n"
+    b'Content-Disposition: form-data; name="zonefile"; filename="a.zone"\r\n'
+    b"Content-Type: text/plain\r\n\r\n"
+    b"a.com. 60 IN A 1.2.3.4\n"
+    b"\r\n"
+    b"--xyz--\r\n"
+)
+ZONE = b"a.com. 60 IN A 1.2.3.4\n"
+
+
+def body(f):
+    return MultipartBody([("zonefile", ("a.zone", f, "text/plain"))], "xyz")
+
+
+def test_multipart_body(tmpdir):
+    """
+    it should encode files as multipart/form-data
+    it should know its length for regular and in-memory files
+    it should close the files once they have been sent
+    """
+    path = tmpdir.join("a.zone")
+    path.write_binary(ZONE)
+    for f in (open(str(path), "rb"), io.BytesIO(ZONE)):
+        b = body(f)
+        assert b.content_type == "multipart/form-data; boundary=xyz"
+        assert b.length == len(EXPECTED)
+        assert len(b) == len(EXPECTED)
+        assert b"".join(b) == EXPECTED
+        assert f.closed
+
+
+def test_multipart_body_unknown_length(tmpdir):
+    """
+    it should not guess the length of text or compressed files
+    it should refuse len() when it doesn't know its length
+    """
+    path = tmpdir.join("a.zone.gz")
+    path.write_binary(gzip.compress(ZONE))
+    b = body(gzip.open(str(path), "rb"))
+    assert b.length is None
+    assert b
+    with pytest.raises(TypeError, match="length of this multipart body"):
+        len(b)
+    assert b"".join(b) == EXPECTED
+
+    b = body(io.StringIO(ZONE.decode()))
+    assert b.length is None
+    assert b"".join(b) == EXPECTED
+
+
+def test_multipart_body_streams_in_chunks():
+    """
+    it should read files a chunk at a time
+    it should close the files if abandoned
+    """
+    f = io.BytesIO(b"x" * (MultipartBody.CHUNK_SIZE * 3))
+    b = body(f)
+    chunks = iter(b)
+    next(chunks)
+    assert len(next(chunks)) == MultipartBody.CHUNK_SIZE
+    assert f.tell() == MultipartBody.CHUNK_SIZE
+    b.close()
+    assert f.closed
+    with pytest.raises(ValueError):
+        list(chunks)
+
+
+def test_open_upload_paths(tmpdir):
+    """
+    it should open paths, decompressing .gz files on the fly
+    """
+    path = tmpdir.join("a.zone")
+    path.write_binary(ZONE)
+    filename, f = open_upload(str(path), "x")
+    assert filename == str(path)
+    assert b"".join(body(f)) == EXPECTED
+
+    path = tmpdir.join("a.zone.gz")
+    path.write_binary(gzip.compress(ZONE))
+    filename, f = open_upload(path, "x")
+    assert filename == str(tmpdir.join("a.zone"))
+    assert b"".join(body(f)) == EXPECTED
+    assert f.closed
+
+
+@pytest.mark.skipif(not have_zstandard, reason="zstandard not found")
+def test_open_upload_zstd(tmpdir):
+    import zstandard
+
+    path = tmpdir.join("a.zone.zst")
+    path.write_binary(zstandard.ZstdCompressor().compress(ZONE))
+    filename, f = open_upload(str(path), "x")
+    assert filename == str(tmpdir.join("a.zone"))
+    assert b"".join(body(f)) == EXPECTED
+    assert f.closed
+
+
+def test_open_upload_content():
+    """
+    it should upload bytes, file objects and iterables of lines as given
+    it should batch lines into chunks
+    """
+    assert open_upload(ZONE, "a.zone") == ("a.zone", ZONE)
+    assert open_upload(bytearray(ZONE), "a.zone") == ("a.zone", ZONE)
+    assert b"".join(body(open_upload(ZONE, "a.zone")[1])) == EXPECTED
+
+    lines = (line for line in [ZONE.decode()])
+    assert open_upload(lines, "a.zone") == ("a.zone", lines)
+    assert b"".join(body(lines)) == EXPECTED
+
+    line = b"a.com. 60 IN A 1.2.3.4\n"
+    lines = [line] * 10000
+    chunks = list(body(lines))
+    assert b"".join(chunks[1:-2]) == line * 10000
+    assert all(len(c) < MultipartBody.CHUNK_SIZE + len(line) for c in chunks)
+    assert len(chunks) < 10
+
+
+LINES = [
+    "r%d.a.com. 60 IN A 10.0.%d.%d\n" % (i, i >> 8, i & 255)
+    for i in range(5000)
+]
+
+
+def upload_source(kind, tmpdir):
+    text = "".join(LINES)
+    if kind == "bytes":
+        return text.encode()
+    if kind == "gz":
+        path = tmpdir.join("a.zone.gz")
+        path.write_binary(gzip.compress(text.encode()))
+        return str(path)
+    if kind == "zst":
+        import zstandard
+
+        path = tmpdir.join("a.zone.zst")
+        path.write_binary(zstandard.ZstdCompressor().compress(text.encode()))
+        return str(path)
+    if kind == "text":
+        return io.StringIO(text)
+    return iter(LINES)
+
+
+@pytest.mark.parametrize("transport", ["basic", "requests", "asyncio"])
+@pytest.mark.parametrize("kind", ["bytes", "gz", "zst", "text", "lines"])
+def test_import_file_transports(tmpdir, transport, kind):
+    """
+    it should upload every kind of source over every transport
+    """
+    import asyncio
+
+    from ns1.rest.transport.requests import have_requests
+    from ns1.rest.zones import Zones
+    from ns1.testing.server import StandInServer
+
+    if transport == "requests" and not have_requests:
+        pytest.skip("requests not found")
+    if kind == "zst" and not have_zstandard:
+        pytest.skip("zstandard not found")
+
+    with StandInServer() as server:
+        zones = Zones(server.config(transport=transport))
+        result = zones.import_file("a.com", upload_source(kind, tmpdir))
+        if transport == "asyncio":
+            result = asyncio.run(result)
+        assert result["zone"] == "a.com"
+        assert "".join(LINES).encode() in server.api.zone_files["a.com"]
@@ -0,0 +1,212 @@
+import os
+import tempfile
+
+import pytest
+
+from ns1.config import Config
+from ns1.rest.rate_limiting import (
+    BucketRateLimiter,
+    depleted_rate_limit_func,
+    have_fcntl,
+    rate_limit_bucket,
+)
+from ns1.rest.resource import BaseResource
+
+try:  # Python 3.3 +
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+@pytest.mark.parametrize(
+    "method, url, want",
+    [
+        ("GET", "https://api.nsone.net/v1/zones", ("GET", "zones")),
+        (
+            "GET",
+            "https://api.nsone.net/v1/zones?after=b.com",
+            ("GET", "zones"),
+        ),
+        ("PUT", "https://api.nsone.net/v1/zones/a.com", ("PUT", "zones/{}")),
+        (
+            "PUT",
+            "https://api.nsone.net/v1/zones/a.com/www.a.com/A",
+            ("PUT", "zones/{}/{}/{}"),
+        ),
+        (
+            "GET",
+            "https://api.nsone.net/v1/zones/a.com/versions",
+            ("GET", "zones/{}/versions"),
+        ),
+        (
+            "GET",
+            "https://api.nsone.net/v1/stats/qps/a.com",
+            ("GET", "stats/qps/{}"),
+        ),
+        (
+            "GET",
+            "https://api.nsone.net/alerting/v1/alerts/4e6f3b2a",
+            ("GET", "alerting/alerts/{}"),
+        ),
+    ],
+)
+def test_rate_limit_bucket(method, url, want):
+    assert rate_limit_bucket(method, url, "v1") == want
+
+
+def test_bucket_rate_limiter():
+    limiter = BucketRateLimiter(depleted_rate_limit_func)
+    depleted = {"by": "customer", "limit": 10, "period": 5, "remaining": 0}
+    full = {"by": "customer", "limit": 10, "period": 5, "remaining": 9}
+
+    assert limiter.delay(("GET", "zones")) == 0
+
+    with mock.patch("time.monotonic", return_value=100.0):
+        limiter.update(("PUT", "zones/{}"), depleted)
+        limiter.update(("GET", "stats/qps"), full)
+    with mock.patch("time.monotonic", return_value=100.2):
+        assert limiter.delay(("PUT", "zones/{}")) == pytest.approx(0.3)
+        assert limiter.delay(("GET", "stats/qps")) == 0
+    with mock.patch("time.monotonic", return_value=101.0):
+        assert limiter.delay(("PUT", "zones/{}")) == 0
+
+
+def test_transport_rate_limits_by_bucket():
+    """
+    it should only wait before requests drawing from a depleted bucket
+    """
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "basic"
+    config["rate_limit_by_bucket"] = True
+    transport = BaseResource(config)._transport
+
+    resp = mock.Mock(status=200)
+    resp.headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Period": "10"}
+    transport._pool.urlopen = mock.Mock(return_value=(resp, b""))
+
+    zone = "https://api.nsone.net/v1/zones/a.com"
+    qps = "https://api.nsone.net/v1/stats/qps"
+    with mock.patch("ns1.rest.transport.base.time.sleep") as sleep:
+        transport.send("PUT", zone)
+        sleep.assert_not_called()
+        transport.send("GET", qps)
+        sleep.assert_not_called()
+        transport.send("PUT", zone)
+        assert sleep.call_count == 1
+        assert 0 < sleep.call_args[0][0] <= 1
+
+
+def test_token_bucket_rate_limiter():
+    """
+    it should hand out the remaining tokens without waiting
+    it should queue requests beyond them at the replenishment rate
+    it should re-seed from the latest response headers
+    """
+    from ns1.rest.rate_limiting import TokenBucketRateLimiter
+
+    limiter = TokenBucketRateLimiter()
+    rl = {"by": "customer", "limit": 4, "period": 2, "remaining": 2}
+    assert limiter.delay(None) == 0
+
+    with mock.patch("time.monotonic", return_value=100.0):
+        limiter.update(None, rl)
+        assert limiter.delay(None) == 0
+        assert limiter.delay(None) == 0
+        assert limiter.delay(None) == pytest.approx(0.5)
+        assert limiter.delay(None) == pytest.approx(1.0)
+    with mock.patch("time.monotonic", return_value=101.0):
+        # two tokens replenished, both already promised to waiters
+        assert limiter.delay(None) == pytest.approx(0.5)
+        limiter.update(None, dict(rl, remaining=0))
+        assert limiter.delay(None) == pytest.approx(1.0)
+
+
+def test_transport_token_bucket():
+    """
+    it should wait for a token before sending once it has been seeded
+    """
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "basic"
+    config["rate_limit_token_bucket"] = True
+    transport = BaseResource(config)._transport
+
+    resp = mock.Mock(status=200)
+    resp.headers = {
+        "X-RateLimit-Limit": "2",
+        "X-RateLimit-Period": "1",
+        "X-RateLimit-Remaining": "1",
+    }
+    transport._pool.urlopen = mock.Mock(return_value=(resp, b""))
+
+    url = "https://api.nsone.net/v1/zones"
+    with mock.patch("ns1.rest.transport.base.time.sleep") as sleep:
+        transport.send("GET", url)
+        transport.send("GET", url)
+        sleep.assert_not_called()
+        transport.send("GET", "https://api.nsone.net/v1/stats/qps")
+        assert sleep.call_count == 1
+        assert 0 < sleep.call_args[0][0] <= 0.5
+
+
+@pytest.mark.skipif(not have_fcntl, reason="fcntl not found")
+def test_shared_token_bucket_rate_limiter(tmpdir):
+    """
+    limiters on the same state file, as in separate processes, should draw
+    from the same token buckets
+    """
+    from ns1.rest.rate_limiting import SharedTokenBucketRateLimiter
+
+    path = str(tmpdir.join("state"))
+    worker1 = SharedTokenBucketRateLimiter(path)
+    worker2 = SharedTokenBucketRateLimiter(path)
+    rl = {"by": "customer", "limit": 4, "period": 2, "remaining": 1}
+    bucket = ("GET", "zones")
+
+    with mock.patch("time.monotonic", return_value=100.0):
+        assert worker2.delay(bucket) == 0
+        worker1.update(bucket, rl)
+        assert worker2.delay(bucket) == 0
+        assert worker1.delay(bucket) == pytest.approx(0.5)
+        assert worker2.delay(bucket) == pytest.approx(1.0)
+        # other buckets are independent
+        assert worker1.delay(("GET", "stats/qps")) == 0
+
+    # a forked child reopens the file rather than sharing the parent's lock,
+    # closing what it inherited
+    fd, mapping = worker1._fd, worker1._map
+    with mock.patch("os.getpid", return_value=-1):
+        with mock.patch("os.close", wraps=os.close) as close:
+            with mock.patch("time.monotonic", return_value=100.0):
+                assert worker1.delay(bucket) == pytest.approx(1.5)
+        assert worker1._pid == -1
+    close.assert_called_once_with(fd)
+    assert mapping.closed
+
+    # state from before a reboot is stamped ahead of the clock
+    with mock.patch("time.monotonic", return_value=5.0):
+        assert worker2.delay(bucket) == pytest.approx(2.0)
+        assert worker1.delay(bucket) == pytest.approx(2.5)
+
+
+def test_config_rate_limiter(config):
+    from ns1.rest.rate_limiting import (
+        SharedTokenBucketRateLimiter,
+        TokenBucketRateLimiter,
+    )
+
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    assert config.getRateLimiter() is None
+
+    config["rate_limit_by_bucket"] = True
+    assert isinstance(config.getRateLimiter(), BucketRateLimiter)
+
+    config["rate_limit_token_bucket"] = True
+    assert isinstance(config.getRateLimiter(), TokenBucketRateLimiter)
+
+    config["rate_limit_strategy"] = "shared"
+    limiter = config.getRateLimiter()
+    assert isinstance(limiter, SharedTokenBucketRateLimiter)
+    assert limiter._path.startswith(tempfile.gettempdir())
+    assert config.getRateLimitingFunc().__name__ == "default_rate_limit_func"
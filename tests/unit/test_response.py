@@ -0,0 +1,93 @@
+import pytest
+
+from ns1.config import Config
+from ns1.rest.errors import ResourceException
+from ns1.rest.json_codec import STDLIB
+from ns1.rest.resource import BaseResource
+from ns1.rest.response import LazyResponse
+from ns1.rest.zones import zone_retrieve_pagination
+
+try:  # Python 3.3 +
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+RL = {"by": "customer", "limit": 10, "period": 1, "remaining": 9}
+
+
+def lazy(body, codec=STDLIB):
+    return LazyResponse(200, {"x-ratelimit-limit": "10"}, body, RL, codec)
+
+
+def test_lazy_response_decodes_on_first_access():
+    """
+    it should not decode the body until its content is used
+    it should decode it only once
+    """
+    codec = mock.Mock(wraps=STDLIB)
+    resp = lazy(b'{"zone": "a.com", "records": [1, 2]}', codec)
+    assert resp.status == 200
+    assert resp.rate_limit["remaining"] == 9
+    assert resp.headers["x-ratelimit-limit"] == "10"
+    assert not resp.decoded
+    codec.loads.assert_not_called()
+
+    assert resp["zone"] == "a.com"
+    assert resp.get("records") == [1, 2]
+    assert "zone" in resp
+    assert sorted(resp) == ["records", "zone"]
+    assert len(resp) == 2
+    assert resp == {"zone": "a.com", "records": [1, 2]}
+    assert resp.decoded
+    codec.loads.assert_called_once()
+
+
+def test_lazy_response_mutation():
+    """
+    it should support the pagination handlers, which mutate the result
+    """
+    resp = lazy(b'{"records": [1]}')
+    resp = zone_retrieve_pagination(resp, lazy(b'{"records": [2]}'))
+    resp["ttl"] = 60
+    assert resp.data == {"records": [1, 2], "ttl": 60}
+    del resp["ttl"]
+    assert resp.keys() == {"records"}
+
+
+def test_lazy_response_empty_and_invalid():
+    """
+    it should be falsy with an empty body
+    it should raise for invalid json only once it is used
+    """
+    empty = lazy(b"")
+    assert not empty
+    assert empty.data is None
+
+    resp = lazy(b"{")
+    with pytest.raises(ResourceException):
+        resp["zone"]
+
+
+def test_transport_returns_lazy_responses():
+    """
+    it should return lazy responses with the lazy_responses setting
+    """
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "basic"
+    config["lazy_responses"] = True
+
+    resource = BaseResource(config)
+    response = mock.Mock(status=200, headers={"X-RateLimit-Remaining": "5"})
+    resource._transport._pool.urlopen = mock.Mock(
+        return_value=(response, b'{"id": "abc"}')
+    )
+    resource._transport._rate_limit_func = mock.Mock(return_value=None)
+
+    with mock.patch.object(resource._codec, "loads") as loads:
+        res = resource._make_request("POST", "zones/a.com", body={})
+        assert isinstance(res, LazyResponse)
+        assert res.rate_limit["remaining"] == 5
+        loads.assert_not_called()
+    assert res["id"] == "abc"
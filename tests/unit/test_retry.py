@@ -0,0 +1,113 @@
+import pytest
+
+from ns1.config import Config
+from ns1.rest.errors import RateLimitException, ResourceException
+from ns1.rest.resource import BaseResource
+from ns1.rest.retry import RetryPolicy
+
+try:  # Python 3.3 +
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+RL = {"by": "customer", "limit": 10, "period": 5, "remaining": 0}
+
+
+@pytest.fixture(autouse=True)
+def no_jitter():
+    with mock.patch("random.uniform", side_effect=lambda a, b: b):
+        yield
+
+
+@pytest.mark.parametrize(
+    "method, status, want",
+    [
+        ("GET", None, 1.0),
+        ("GET", 503, 1.0),
+        ("DELETE", 500, 1.0),
+        ("POST", 503, None),
+        ("POST", None, None),
+        ("GET", 404, None),
+        ("GET", 200, None),
+        # 429s are retried for every method, starting from the token time
+        ("POST", 429, 0.5),
+    ],
+)
+def test_retry_policy_delay(method, status, want):
+    policy = RetryPolicy(3, backoff=1.0)
+    assert policy.delay(method, 0, status, RL) == want
+
+
+def test_retry_policy_backoff_and_limits():
+    policy = RetryPolicy(3, backoff=1.0, max_backoff=3.0)
+    assert [policy.delay("GET", i, 503) for i in range(4)] == [
+        1.0,
+        2.0,
+        3.0,
+        None,
+    ]
+
+
+def test_retry_policy_budget():
+    policy = RetryPolicy(3, budget_ratio=0.5, max_budget=2)
+    assert policy.delay("GET", 0, 503) is not None
+    assert policy.delay("GET", 0, 503) is not None
+    assert policy.delay("GET", 0, 503) is None
+    policy.deposit()
+    assert policy.delay("GET", 0, 503) is None
+    policy.deposit()
+    assert policy.delay("GET", 0, 503) is not None
+
+
+def _basic_resource(retries):
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "basic"
+    config["retries"] = retries
+    return BaseResource(config)
+
+
+def _response(status, headers=None):
+    resp = mock.Mock(status=status)
+    resp.headers = headers or {}
+    return resp, b'{"message": "x"}' if status >= 300 else b"{}"
+
+
+def test_transport_retries():
+    """
+    it should retry transient errors and 429s until one succeeds
+    it should give up on non-idempotent requests and when out of retries
+    """
+    resource = _basic_resource(2)
+    transport = resource._transport
+    transport._pool.urlopen = mock.Mock(
+        side_effect=[
+            _response(503),
+            ConnectionRefusedError(),
+            _response(429, {"X-RateLimit-Limit": "4"}),
+            _response(200),
+        ]
+    )
+    with mock.patch("ns1.rest.transport.base.time.sleep") as sleep:
+        with pytest.raises(RateLimitException):
+            resource._make_request("GET", "zones")
+        assert sleep.call_count == 2
+        assert transport._pool.urlopen.call_count == 3
+
+        assert resource._make_request("GET", "zones") == {}
+
+        transport._pool.urlopen = mock.Mock(return_value=_response(503))
+        with pytest.raises(ResourceException):
+            resource._make_request("POST", "zones/a.com")
+        assert transport._pool.urlopen.call_count == 1
+
+
+def test_transport_no_retries_by_default():
+    resource = _basic_resource(0)
+    assert resource._transport._retry is None
+    resource._transport._pool.urlopen = mock.Mock(
+        side_effect=[_response(503), _response(200)]
+    )
+    with pytest.raises(ResourceException):
+        resource._make_request("GET", "zones")
@@ -0,0 +1,173 @@
+import time
+
+import pytest
+
+from ns1 import NS1
+from ns1.rest.errors import RateLimitException, ResourceException
+from ns1.testing.server import StandInAPI, StandInServer
+
+try:  # Python 3.3 +
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+
+@pytest.fixture
+def server():
+    with StandInServer(
+        zones=25,
+        records_per_zone=3,
+        large_zones={"big.test": 25},
+        page_size=10,
+    ) as server:
+        yield server
+
+
+@pytest.fixture
+def api(server):
+    return NS1(config=server.config(transport="basic", follow_pagination=True))
+
+
+def test_zones(api):
+    """
+    it should list synthetic and large zones across pages
+    it should create, update and delete zones
+    """
+    zones = api.zones()
+    listed = zones.list()
+    assert [z["zone"] for z in listed] == [
+        "z%d.test" % i for i in range(25)
+    ] + ["big.test"]
+    assert len(list(zones.iter_list())) == 26
+
+    zones.create("new.test", refresh=100)
+    assert zones.retrieve("new.test")["refresh"] == 100
+    zones.update("z3.test", ttl=60)
+    assert zones.retrieve("z3.test")["ttl"] == 60
+    zones.delete("z4.test")
+    zones.delete("new.test")
+    with pytest.raises(ResourceException, match="zone not found"):
+        zones.retrieve("z4.test")
+    assert len(zones.list()) == 25
+    with pytest.raises(ResourceException, match="already exists"):
+        zones.create("z5.test")
+
+
+def test_records(api):
+    """
+    it should page through the records of a zone
+    it should create, update and delete records
+    """
+    zone = api.zones().retrieve("big.test")
+    assert len(zone["records"]) == 25
+    assert zone["records"][7]["domain"] == "r7.big.test"
+    assert list(api.zones().iter_records("big.test"))[7]["domain"] == (
+        "r7.big.test"
+    )
+
+    records = api.records()
+    created = records.create(
+        "z1.test", "www.z1.test", "A", answers=["1.2.3.4"]
+    )
+    assert created["answers"] == [{"answer": ["1.2.3.4"]}]
+    records.update("z1.test", "r0.z1.test", "A", ttl=5)
+    assert records.retrieve("z1.test", "r0.z1.test", "A")["ttl"] == 5
+    records.delete("z1.test", "r1.z1.test", "A")
+    zone = api.zones().retrieve("z1.test")
+    assert {r["domain"] for r in zone["records"]} == {
+        "r0.z1.test",
+        "r2.z1.test",
+        "www.z1.test",
+    }
+    with pytest.raises(ResourceException, match="record not found"):
+        records.retrieve("z1.test", "r1.z1.test", "A")
+
+
+def test_stats_monitoring_data(api):
+    """
+    it should serve stats, monitoring and data endpoints
+    """
+    assert "qps" in api.stats().qps("z1.test")
+    assert len(api.stats().usage()) == 26
+    assert api.stats().usage("z1.test")[0]["zone"] == "z1.test"
+
+    jobs = api.monitors()
+    job = jobs.create({"name": "ping", "job_type": "ping"})
+    assert jobs.retrieve(job["id"])["name"] == "ping"
+    assert [j["id"] for j in jobs.list()] == [job["id"]]
+    assert "ping" in api.monitoring_jobtypes().list()
+
+    source = api.datasource().create("src", "nsone_v1")
+    feed = api.datafeed().create(source["id"], "feed", config={"label": "x"})
+    assert api.datafeed().list(source["id"]) == [feed]
+    api.datasource().publish(source["id"], {"x": {"up": True}})
+
+
+def test_rate_limiting():
+    """
+    it should answer with the state of the request's bucket
+    it should refuse requests once the bucket is empty
+    """
+    with StandInServer(zones=2, rate_limit=(2, 3600)) as server:
+        api = NS1(config=server.config(transport="basic"))
+        seen = []
+        zones = api.zones()
+        zones._transport._rate_limit_func = seen.append
+        zones.retrieve("z0.test")
+        zones.retrieve("z1.test")
+        with pytest.raises(RateLimitException):
+            zones.retrieve("z0.test")
+        zones.list()
+        assert [rl["remaining"] for rl in seen] == [1, 0, 0, 1]
+        assert seen[0]["limit"] == 2
+
+
+def test_injected_errors_and_latency():
+    with StandInServer(zones=2, latency=0.05) as server:
+        api = NS1(config=server.config(transport="basic"))
+        server.fail(503, path="zones/z1.test")
+        with pytest.raises(ResourceException, match="injected failure"):
+            api.zones().retrieve("z1.test")
+        start = time.monotonic()
+        api.zones().retrieve("z1.test")
+        assert time.monotonic() - start >= 0.05
+        assert server.requests == 2
+
+
+def test_compression():
+    with StandInServer(large_zones={"big.test": 200}, compress=True) as s:
+        config = s.config(transport="basic", compress_requests_over=10)
+        api = NS1(config=config)
+        assert len(api.zones().retrieve("big.test")["records"]) == 200
+        api.records().create("big.test", "www.big.test", "A", answers=["1"])
+        assert s.api.handle("GET", "zones/big.test/www.big.test/A", {}, None)
+
+
+def test_synthetic_zones_are_not_stored():
+    api = StandInAPI(zones=100000, records_per_zone=1000)
+    status, zone, more = api.handle("GET", "zones/z99999.test", {}, None)
+    assert len(zone["records"]) == 1000
+    assert api._zones == {}
+
+
+@pytest.mark.parametrize("maker", ["cryptography", "openssl"])
+def test_self_signed_cert(tmpdir, maker):
+    """
+    it should make a certificate for localhost with whatever is available
+    """
+    import shutil
+    import ssl
+    import sys
+
+    from ns1.testing.server import _self_signed_cert
+
+    if maker == "openssl" and shutil.which("openssl") is None:
+        pytest.skip("openssl not found")
+    if maker == "cryptography":
+        pytest.importorskip("cryptography")
+        path = _self_signed_cert(str(tmpdir))
+    else:
+        with mock.patch.dict(sys.modules, {"cryptography": None}):
+            path = _self_signed_cert(str(tmpdir))
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(path)
@@ -67,3 +67,12 @@ def test_usage(stats_config, value, expected):
         errback=None,
         pagination_handler=ns1.rest.stats.stats_usage_pagination,
     )
+
+
+def test_iter_usage(stats_config):
+    s = ns1.rest.stats.Stats(stats_config)
+    s._iter_request = mock.MagicMock()
+    s.iter_usage(zone="test.com", period="1h")
+    s._iter_request.assert_called_once_with(
+        "GET", "stats/usage/test.com?period=1h"
+    )
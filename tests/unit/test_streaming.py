@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from ns1.rest.streaming import iter_json_array
+
+
+def chunked(text, size):
+    data = text.encode("utf-8")
+    chunks = []
+    for start in range(0, len(data), size):
+        end = start + size
+        chunks.append(data[start:end])
+    return chunks
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 4096])
+def test_iter_json_array_chunk_boundaries(size):
+    """
+    it should decode the same items however the body is split up
+    """
+    records = [
+        {"domain": "a.com", "type": "A", "answers": [["1.2.3.4"]]},
+        {"domain": "é.com", "ttl": 3600, "meta": None},
+        12345,
+        -1.5e3,
+        "str",
+        True,
+    ]
+    doc = json.dumps({"zone": "a.com", "records": records, "ttl": 3600})
+    assert list(iter_json_array(chunked(doc, size), "records")) == records
+
+
+def test_iter_json_array_number_at_end_of_chunk():
+    """
+    it should not cut a number short at the end of the buffer
+    """
+    chunks = [b"[12", b"34, 5", b"6]"]
+    assert list(iter_json_array(chunks)) == [1234, 56]
+
+
+def test_iter_json_array_rest():
+    """
+    it should collect the other members of the document in `rest`
+    """
+    rest = {}
+    doc = '{"zone": "a.com", "records": [1, 2], "ttl": 60}'
+    items = iter_json_array(chunked(doc, 3), "records", rest)
+    assert list(items) == [1, 2]
+    assert rest == {"zone": "a.com", "ttl": 60}
+
+
+def test_iter_json_array_empty():
+    """
+    it should yield nothing for an empty body, array, or object
+    """
+    assert list(iter_json_array([])) == []
+    assert list(iter_json_array([b" [ ] "])) == []
+    assert list(iter_json_array([b"{}"], "records")) == []
+    assert list(iter_json_array([b'{"zone": "a"}'], "records")) == []
+
+
+def test_iter_json_array_invalid():
+    """
+    it should raise ValueError on malformed or truncated documents
+    """
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"records": [1, 2'], "records"))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b"[1 2]"]))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b"[1] [2]"]))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b"{}"]))
@@ -43,7 +43,7 @@ class MockResponse(object):
         protocol.dataReceived(json.dumps(self.body).encode("utf-8"))
         protocol.connectionLost(self)
 
-    def check(self, reason):
+    def check(self, *errorTypes):
         return True
 
 
@@ -68,7 +68,7 @@ def test_twisted():
     # setup mocks
 
     # rate-limiting
-    resource._transport._rate_limit_func = mock.Mock()
+    resource._transport._rate_limit_func = mock.Mock(return_value=None)
 
     # first response
     d1 = defer.Deferred()
@@ -144,3 +144,418 @@ def test_twisted():
 
     # errback was not called
     eb.assert_not_called()
+
+
+@pytest.mark.skipif(not have_twisted, reason="twisted not found")
+def test_twisted_concurrency_limit():
+    """
+    it should share a persistent connection pool between requests
+    it should hold requests beyond twisted_concurrency until one finishes
+    it should keep response state on the request, not the transport
+    """
+    from twisted.internet import defer
+
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "twisted"
+    config["twisted_concurrency"] = 1
+    config["pool_size"] = 7
+
+    transport = BaseResource(config)._transport
+    assert transport.pool.persistent
+    assert transport.pool.maxPersistentPerHost == 7
+    assert transport.agent._agent._pool is transport.pool
+
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    first = defer.Deferred()
+    second = defer.Deferred()
+    transport.agent.request = mock.Mock(side_effect=[first, second])
+
+    responses = []
+
+    def cb(jsonOut, body, response):
+        responses.append(response)
+        return jsonOut
+
+    results = []
+    for _ in range(2):
+        d = transport.send("GET", "https://a.co/", callback=cb)
+        d.addCallback(results.append)
+
+    assert transport.agent.request.call_count == 1
+    first.callback(MockResponse(body={"n": 1}))
+    assert transport.agent.request.call_count == 2
+    second.callback(MockResponse(body={"n": 2}))
+
+    assert results == [{"n": 1}, {"n": 2}]
+    assert responses[0] is not responses[1]
+    assert not hasattr(transport, "response")
+
+
+def _paged_responses(pages):
+    responses = []
+    for i in range(pages):
+        headers = {}
+        if i < pages - 1:
+            headers["Link"] = ["<http://a.co/%d>; rel=next;" % (i + 1)]
+        responses.append(MockResponse(headers=headers, body=[i]))
+    return responses
+
+
+@pytest.mark.skipif(not have_twisted, reason="twisted not found")
+def test_twisted_pagination_is_iterative():
+    """
+    it should follow thousands of pages without growing the stack
+    it should stream pages to page_callback instead of accumulating
+    """
+    from twisted.internet import defer
+
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "twisted"
+    config["follow_pagination"] = True
+
+    transport = BaseResource(config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    pages = 3000
+
+    def handler(jsonOut, next_json):
+        jsonOut.extend(next_json)
+        return jsonOut
+
+    transport.agent.request = mock.Mock(
+        side_effect=[defer.succeed(r) for r in _paged_responses(pages)]
+    )
+    results = []
+    d = transport.send("GET", "https://a.co/0", pagination_handler=handler)
+    d.addCallback(results.append)
+    assert results == [list(range(pages))]
+
+    transport.agent.request = mock.Mock(
+        side_effect=[defer.succeed(r) for r in _paged_responses(pages)]
+    )
+    streamed = []
+    results = []
+    d = transport.send("GET", "https://a.co/0", page_callback=streamed.append)
+    d.addCallback(results.append)
+    assert results == [None]
+    assert streamed == [[i] for i in range(pages)]
+
+
+@pytest.mark.skipif(not have_twisted, reason="twisted not found")
+def test_twisted_rate_limiting_does_not_block():
+    """
+    it should wait out the rate limit delay on the reactor, not in a sleep
+    """
+    from twisted.internet import defer, task
+
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "twisted"
+
+    transport = BaseResource(config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=5)
+    transport.agent.request = mock.Mock(
+        return_value=defer.succeed(MockResponse(body={"a": 1}))
+    )
+
+    clock = task.Clock()
+    results = []
+    with mock.patch("ns1.rest.transport.twisted.reactor", clock):
+        with mock.patch("time.sleep") as sleep:
+            d = transport.send("GET", "https://a.co/")
+            d.addCallback(results.append)
+            assert results == []
+            clock.advance(5)
+    assert results == [{"a": 1}]
+    sleep.assert_not_called()
+
+
+@pytest.mark.skipif(not have_twisted, reason="twisted not found")
+def test_twisted_iter_items():
+    """
+    it should iterate over the items of each page as it arrives, with
+    `async for`, through the resource classes
+    it should raise for error statuses
+    """
+    from twisted.internet import defer
+
+    from ns1.rest.errors import ResourceException
+    from ns1.rest.zones import Zones
+
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "twisted"
+
+    zones = Zones(config)
+    transport = zones._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    link = ['<https://a.co/v1/zones/a.com?page=2>; rel="next"']
+    transport.agent.request = mock.Mock(
+        side_effect=[
+            defer.succeed(
+                MockResponse(body={"records": [1, 2]}, headers={"Link": link})
+            ),
+            defer.succeed(MockResponse(body={"records": [3]})),
+        ]
+    )
+
+    async def consume():
+        items = []
+        async for item in zones.iter_records("a.com"):
+            # the next page is requested once this one is consumed
+            items.append((item, transport.agent.request.call_count))
+        return items
+
+    results = []
+    defer.ensureDeferred(consume()).addCallback(results.append)
+    assert results == [[(1, 1), (2, 1), (3, 2)]]
+    assert transport.agent.request.call_args[0][1] == (
+        b"https://a.co/v1/zones/a.com?page=2"
+    )
+
+    transport.agent.request = mock.Mock(
+        return_value=defer.succeed(MockResponse(code=404, body={}))
+    )
+    failures = []
+    defer.ensureDeferred(consume()).addErrback(failures.append)
+    assert failures[0].check(ResourceException)
+
+
+@pytest.mark.skipif(not have_twisted, reason="twisted not found")
+def test_twisted_download():
+    """
+    it should write the raw body to the destination, not decode it
+    it should raise for error statuses without writing anything
+    """
+    import io
+
+    from twisted.internet import defer
+
+    from ns1.rest.errors import ResourceException
+
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "twisted"
+
+    transport = BaseResource(config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    transport.agent.request = mock.Mock(
+        return_value=defer.succeed(MockResponse(body={"a": 1}))
+    )
+    dest = io.BytesIO()
+    results = []
+    d = transport.download("GET", "https://a.co/report", dest)
+    d.addCallback(results.append)
+    assert dest.getvalue() == b'{"a": 1}'
+    assert results == [8]
+
+    link = ['<https://a.co/report?page=2>; rel="next"']
+    transport.agent.request = mock.Mock(
+        side_effect=[
+            defer.succeed(MockResponse(body={"a": 1}, headers={"Link": link})),
+            defer.succeed(MockResponse(body={"a": 2})),
+        ]
+    )
+    dest = io.BytesIO()
+    results = []
+    d = transport.download("GET", "https://a.co/report", dest)
+    d.addCallback(results.append)
+    assert dest.getvalue() == b'{"a": 1}\n{"a": 2}'
+    assert results == [17]
+    assert transport.agent.request.call_args[0][1] == (
+        b"https://a.co/report?page=2"
+    )
+
+    transport.agent.request = mock.Mock(
+        return_value=defer.succeed(MockResponse(code=404, body={}))
+    )
+    dest = io.BytesIO()
+    failures = []
+    d = transport.download("GET", "https://a.co/report", dest)
+    d.addErrback(failures.append)
+    assert failures[0].check(ResourceException)
+    assert dest.getvalue() == b""
+
+
+@pytest.mark.skipif(not have_twisted, reason="twisted not found")
+def test_twisted_upload():
+    """
+    it should produce the upload a chunk at a time, with its length
+    it should close the uploaded files
+    """
+    import io
+
+    from twisted.internet import defer, task
+
+    from ns1.rest.transport.twisted import MultipartProducer
+
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "twisted"
+
+    transport = BaseResource(config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    transport.agent.request = mock.Mock(
+        return_value=defer.succeed(MockResponse(body={}))
+    )
+
+    zone = b"a.com. 60 IN A 1.2.3.4\n" * 10000
+    f = io.BytesIO(zone)
+    files = [("zonefile", ("a.zone", f, "text/plain"))]
+    transport.send("PUT", "https://a.co/import", files=files)
+    method, url, headers, producer = transport.agent.request.call_args[0]
+    assert isinstance(producer, MultipartProducer)
+    assert headers.getRawHeaders("Content-Type")[0].startswith(
+        "multipart/form-data"
+    )
+    # the body was never produced, but the file is closed regardless
+    assert f.closed
+
+    f = io.BytesIO(zone)
+    _, upload = transport._multipart(
+        {}, [("zonefile", ("a.zone", f, "text/plain"))]
+    )
+    producer = MultipartProducer(upload)
+    consumer = mock.Mock()
+    clock = task.Clock()
+    cooperator = task.Cooperator(scheduler=lambda x: clock.callLater(0, x))
+    with mock.patch(
+        "ns1.rest.transport.twisted.cooperate", cooperator.cooperate
+    ):
+        done = []
+        producer.startProducing(consumer).addCallback(done.append)
+        while not done:
+            clock.advance(0)
+    body = b"".join(c[0][0] for c in consumer.write.call_args_list)
+    assert len(body) == producer.length
+    assert zone in body
+    assert f.closed
+
+
+@pytest.mark.skipif(not have_twisted, reason="twisted not found")
+@pytest.mark.parametrize("kind", ["gz", "text", "lines"])
+def test_twisted_upload_unknown_length(tmpdir, kind):
+    """
+    it should produce uploads whose length isn't known, for Twisted to send
+    chunked
+    """
+    import gzip
+    import io
+
+    from twisted.internet import task
+    from twisted.web.iweb import UNKNOWN_LENGTH
+
+    from ns1.rest.multipart import open_upload
+    from ns1.rest.transport.twisted import MultipartProducer
+
+    lines = ["r%d.a.com. 60 IN A 1.2.3.4\n" % i for i in range(10000)]
+    zone = "".join(lines)
+    if kind == "gz":
+        source = tmpdir.join("a.zone.gz")
+        source.write_binary(gzip.compress(zone.encode()))
+        source = str(source)
+    elif kind == "text":
+        source = io.StringIO(zone)
+    else:
+        source = iter(lines)
+
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "twisted"
+    transport = BaseResource(config)._transport
+    filename, content = open_upload(source, "a.zone")
+    _, upload = transport._multipart(
+        {}, [("zonefile", (filename, content, "text/plain"))]
+    )
+    producer = MultipartProducer(upload)
+    assert producer.length is UNKNOWN_LENGTH
+
+    consumer = mock.Mock()
+    clock = task.Clock()
+    cooperator = task.Cooperator(scheduler=lambda x: clock.callLater(0, x))
+    with mock.patch(
+        "ns1.rest.transport.twisted.cooperate", cooperator.cooperate
+    ):
+        done = []
+        producer.startProducing(consumer).addCallback(done.append)
+        while not done:
+            clock.advance(0)
+    body = b"".join(c[0][0] for c in consumer.write.call_args_list)
+    assert zone.encode() in body
+
+
+@pytest.mark.skipif(not have_twisted, reason="twisted not found")
+def test_twisted_compression():
+    """
+    it should ask for compressed responses and decode them
+    it should gzip large request bodies when configured to
+    """
+    import gzip
+    import zlib
+
+    from twisted.internet import defer
+    from twisted.web.http_headers import Headers
+
+    from ns1.rest.compression import ACCEPT_ENCODING
+
+    items = [{"zone": "z%d.com" % i} for i in range(500)]
+
+    class DeflatedResponse(MockResponse):
+        def __init__(self):
+            MockResponse.__init__(self)
+            self.headers = Headers({"Content-Encoding": ["deflate"]})
+
+        def deliverBody(self, protocol):
+            data = zlib.compress(json.dumps(items).encode("utf-8"))
+            for i in range(0, len(data), 100):
+                end = i + 100
+                protocol.dataReceived(data[i:end])
+            protocol.connectionLost(self)
+
+    config = Config()
+    config.createFromAPIKey("AAAAAAAAAAAAAAAAA")
+    config["transport"] = "twisted"
+    config["compress_requests_over"] = 1024
+
+    transport = BaseResource(config)._transport
+    transport._rate_limit_func = mock.Mock(return_value=None)
+    agent = transport.agent._agent
+    agent.request = mock.Mock(
+        side_effect=lambda *args: defer.succeed(DeflatedResponse())
+    )
+    results = []
+    d = transport.send("GET", "https://a.co/zones")
+    d.addCallback(results.append)
+    assert results == [items]
+    headers = agent.request.call_args[0][2]
+    accept = headers.getRawHeaders(b"accept-encoding")
+    assert accept == [ACCEPT_ENCODING.replace(" ", "").encode("ascii")]
+
+    data = json.dumps(items)
+    transport.send("PUT", "https://a.co/zones", headers={}, data=data)
+    headers, producer = agent.request.call_args[0][2:]
+    assert headers.getRawHeaders("Content-Encoding") == ["gzip"]
+    assert gzip.decompress(producer.body).decode("utf-8") == data
+
+
+@pytest.mark.skipif(not have_twisted, reason="twisted not found")
+def test_twisted_no_validation_policy():
+    """
+    with ignore-ssl-errors, it should verify neither the certificate nor
+    the hostname, but still send the hostname for SNI
+    """
+    from OpenSSL import SSL
+
+    from ns1.rest.transport.twisted import NoValidationPolicy
+
+    creator = NoValidationPolicy().creatorForNetloc(b"a.co", 443)
+    connection = creator.clientConnectionForTLS(mock.Mock())
+    assert connection.get_context().get_verify_mode() == SSL.VERIFY_NONE
+    assert connection.get_servername() == b"a.co"
+
+    # IP addresses are not sent for SNI
+    creator = NoValidationPolicy().creatorForNetloc(b"127.0.0.1", 443)
+    connection = creator.clientConnectionForTLS(mock.Mock())
+    assert connection.get_context().get_verify_mode() == SSL.VERIFY_NONE
+    assert connection.get_servername() is None
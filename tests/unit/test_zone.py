@@ -53,6 +53,57 @@ def test_rest_zone_retrieve(zones_config, zone, url):
     )
 
 
+def test_rest_zone_download(zones_config):
+    z = ns1.rest.zones.Zones(zones_config)
+    z._download = mock.MagicMock()
+    dest = object()
+    z.download("test.zone", dest)
+    z._download.assert_called_once_with("zones/test.zone", dest)
+
+
+@pytest.mark.parametrize("transport", ["basic", "requests", "asyncio"])
+def test_rest_zone_download_pages(transport):
+    """
+    it should write every page of a paginated zone, separated by newlines
+    """
+    import asyncio
+    import io
+    import json
+
+    from ns1.rest.transport.requests import have_requests
+    from ns1.testing.server import StandInServer
+
+    if transport == "requests" and not have_requests:
+        pytest.skip("requests not found")
+
+    with StandInServer(large_zones={"big.test": 25}, page_size=10) as server:
+        z = ns1.rest.zones.Zones(server.config(transport=transport))
+        dest = io.BytesIO()
+        written = z.download("big.test", dest)
+        if transport == "asyncio":
+            written = asyncio.run(written)
+    assert written == len(dest.getvalue())
+    pages = [json.loads(page) for page in dest.getvalue().split(b"\n")]
+    assert [len(page["records"]) for page in pages] == [10, 10, 5]
+    assert pages[2]["records"][4]["domain"] == "r24.big.test"
+
+
+def test_rest_zone_iter_list(zones_config):
+    z = ns1.rest.zones.Zones(zones_config)
+    z._iter_request = mock.MagicMock()
+    z.iter_list()
+    z._iter_request.assert_called_once_with("GET", "zones")
+
+
+def test_rest_zone_iter_records(zones_config):
+    z = ns1.rest.zones.Zones(zones_config)
+    z._iter_request = mock.MagicMock()
+    z.iter_records("test.zone")
+    z._iter_request.assert_called_once_with(
+        "GET", "zones/test.zone", "records"
+    )
+
+
 @pytest.mark.parametrize(
     "zone, url", [("test.zone", "zones/test.zone/versions")]
 )
@@ -192,6 +243,23 @@ def test_rest_zone_import_file(zones_config, zone, name, url, networks, views):
     )
 
 
+def test_rest_zone_import_file_content(zones_config):
+    """
+    it should import zone files from bytes and iterables of lines
+    """
+    z = ns1.rest.zones.Zones(zones_config)
+    z._make_request = mock.MagicMock()
+
+    lines = iter(["test.zone. 60 IN A 1.2.3.4\n"])
+    for source in (b"test.zone. 60 IN A 1.2.3.4\n", lines):
+        z._make_request.reset_mock()
+        z.import_file("test.zone", source)
+        files = z._make_request.call_args[1]["files"]
+        assert files == [
+            ("zonefile", ("test.zone.zone", source, "text/plain"))
+        ]
+
+
 @pytest.mark.parametrize(
     "zone, url, name",
     [("test.zone", "zones/test.zone/versions?force=false", "new.zone")],